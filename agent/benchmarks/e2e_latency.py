@@ -0,0 +1,161 @@
+"""
+Offline end-to-end latency harness: the real AgentSession wiring against local stand-ins.
+
+Recorded WAV utterances are played into the session in real time; the STT returns the scripted
+transcripts, the LLM the scripted tool calls and replies, and the TTS silence, each after a
+configurable delay. Tool calls go to the fake MCP server, so MCP latency is part of the turn.
+
+    uv run -m benchmarks.e2e_latency recordings/script.json
+    uv run -m benchmarks.e2e_latency script.json --min-silence 0.3 --no-preemptive --tool-latency-ms 800
+
+The script is a JSON file:
+
+    {
+      "llm_ttft": 0.35,
+      "turns": [
+        {"audio": "turn1.wav", "transcript": "What's the weather in Paris?",
+         "steps": [{"tool_calls": [{"name": "tool_0000", "arguments": {"param_0": "Paris"}}]},
+                   {"text": "It is sunny in Paris."}]}
+      ]
+    }
+
+Time to first audio is measured per turn from the end of the recorded utterance to the first
+frame the session sends to the audio output.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from livekit.agents import Agent
+from livekit.agents.voice.events import AgentStateChangedEvent
+from livekit.plugins import silero
+
+from benchmarks.run import fake_server_config
+from benchmarks.standins import Script, ScriptedLLM, ScriptedSTT, SilentTTS, TimingAudioOutput, WavAudioInput, read_wav
+from src.ctsm.mcp.agent_tools import MCPToolsIntegration
+from src.ctsm.mcp.util import get_mcps_from_config
+from src.ctsm.session import create_session
+from src.ctsm.turn_metrics import TurnLatencyTracker, percentile
+
+# Upper bound for a single reply, so a script that never gets an answer does not hang the run
+REPLY_TIMEOUT = 60.0
+
+
+async def run_script(script: Script, script_dir: Path, args: argparse.Namespace) -> Dict[str, Any]:
+    utterances = [read_wav(script_dir / turn.audio) for turn in script.turns]
+
+    vad_engine = silero.VAD.load(min_silence_duration=args.min_silence, activation_threshold=args.activation_threshold)
+    session = create_session(
+        stt_engine=ScriptedSTT(script),
+        llm_engine=ScriptedLLM(script),
+        tts_engine=SilentTTS(script),
+        vad_engine=vad_engine,
+        preemptive_generation=args.preemptive,
+    )
+
+    # The agent is done with a turn when it stops speaking
+    reply_done = asyncio.Event()
+
+    def on_agent_state_changed(event: AgentStateChangedEvent) -> None:
+        if event.old_state == "speaking" and event.new_state != "speaking":
+            reply_done.set()
+
+    session.on("agent_state_changed", on_agent_state_changed)
+
+    async def wait_for_reply(index: int) -> None:
+        reply_done.clear()
+        try:
+            await asyncio.wait_for(reply_done.wait(), REPLY_TIMEOUT)
+        except asyncio.TimeoutError:
+            logging.warning(f"Turn {index + 1}: no reply within {REPLY_TIMEOUT} seconds")
+
+    audio_input = WavAudioInput(utterances, wait_for_reply)
+    audio_output = TimingAudioOutput()
+    session.input.audio = audio_input
+    session.output.audio = audio_output
+
+    agent = Agent(instructions="You are a helpful voice AI assistant.")
+    mcp_servers = get_mcps_from_config([fake_server_config(tools=args.tools, latency_ms=args.tool_latency_ms)])
+    mcp_tools = await MCPToolsIntegration.attach_servers(agent, mcp_servers, required_servers=[mcp_servers[0].name])
+
+    tracker = TurnLatencyTracker(args.metrics_dir) if args.metrics_dir else None
+    if tracker:
+        tracker.attach(session)
+
+    try:
+        await session.start(agent)
+        await audio_input.finished.wait()
+    finally:
+        await session.aclose()
+        await mcp_tools.aclose()
+        await asyncio.gather(*(server.cleanup() for server in mcp_servers))
+        if tracker:
+            await tracker.aclose()
+
+    turns: List[Dict[str, Any]] = []
+    for index, utterance_end in enumerate(audio_input.utterance_ends):
+        first_audio = next((start for start in audio_output.segment_starts if start > utterance_end), None)
+        ttfa = round(first_audio - utterance_end, 4) if first_audio is not None else None
+        turns.append({"turn": index + 1, "transcript": script.turns[index].transcript, "time_to_first_audio": ttfa})
+
+    measured = [turn["time_to_first_audio"] for turn in turns if turn["time_to_first_audio"] is not None]
+    return {
+        "parameters": {
+            "min_silence": args.min_silence,
+            "activation_threshold": args.activation_threshold,
+            "preemptive_generation": args.preemptive,
+            "tool_latency_ms": args.tool_latency_ms,
+            "stt_delay": script.stt_delay,
+            "llm_ttft": script.llm_ttft,
+            "tts_ttfb": script.tts_ttfb,
+        },
+        "turns": turns,
+        "time_to_first_audio": {"p50": percentile(measured, 0.5), "p95": percentile(measured, 0.95), "count": len(measured)},
+        "stages": tracker.summary() if tracker else {},
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Offline end-to-end turn latency harness")
+    parser.add_argument("script", type=Path, help="JSON script with the turns and the stand-in delays")
+    parser.add_argument("--min-silence", type=float, default=0.55, help="VAD silence in seconds that ends the user's turn")
+    parser.add_argument("--activation-threshold", type=float, default=0.5, help="VAD speech probability threshold")
+    parser.add_argument("--preemptive", action=argparse.BooleanOptionalAction, default=True, help="Preemptive generation")
+    parser.add_argument("--tool-latency-ms", type=float, default=0.0, help="Latency of each fake MCP tool call")
+    parser.add_argument("--tools", type=int, default=10, help="Number of tools on the fake MCP server")
+    parser.add_argument("--stt-delay", type=float, help="Override the script's STT delay")
+    parser.add_argument("--llm-ttft", type=float, help="Override the script's LLM time to first token")
+    parser.add_argument("--tts-ttfb", type=float, help="Override the script's TTS time to first byte")
+    parser.add_argument("--metrics-dir", type=Path, help="Also record the per-stage breakdown with TurnLatencyTracker here")
+    parser.add_argument("--output", type=Path, help="Write the report as JSON")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+
+    script = Script.load(args.script)
+    overrides = {"stt_delay": args.stt_delay, "llm_ttft": args.llm_ttft, "tts_ttfb": args.tts_ttfb}
+    script = script.model_copy(update={key: value for key, value in overrides.items() if value is not None})
+
+    started = time.perf_counter()
+    report = asyncio.run(run_script(script, args.script.parent, args))
+    report["wall_seconds"] = round(time.perf_counter() - started, 2)
+
+    for turn in report["turns"]:
+        ttfa = f"{turn['time_to_first_audio'] * 1000:.0f} ms" if turn["time_to_first_audio"] is not None else "no audio"
+        print(f"Turn {turn['turn']}: {ttfa}  {turn['transcript']}")
+    summary = report["time_to_first_audio"]
+    print(f"Time to first audio: p50 {summary['p50'] * 1000:.0f} ms, p95 {summary['p95'] * 1000:.0f} ms over {summary['count']} turns")
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2))
+        print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+A local MCP stdio server with synthetic tools, used by the benchmarks.
+
+    python -m benchmarks.fake_mcp_server --tools 100 --schema-properties 8 --result-bytes 2048 --latency-ms 20
+    python -m benchmarks.fake_mcp_server --latency-ms 6000 --progress-steps 3
+"""
+
+import argparse
+import asyncio
+import json
+from typing import Any, Dict, List
+
+from mcp import types
+from mcp.server.lowlevel import Server
+from mcp.server.stdio import stdio_server
+
+
+def build_tools(count: int, schema_properties: int, description_chars: int) -> List[types.Tool]:
+    """Synthetic tools with a mix of property types and one nested object, like real MCP servers."""
+    tools = []
+    for index in range(count):
+        properties: Dict[str, Any] = {}
+        for prop in range(schema_properties):
+            kind = ("string", "integer", "boolean", "array")[prop % 4]
+            schema: Dict[str, Any] = {"type": kind, "description": f"Parameter {prop} of tool {index}"}
+            if kind == "array":
+                schema["items"] = {"type": "string"}
+            properties[f"param_{prop}"] = schema
+        properties["options"] = {
+            "type": "object",
+            "properties": {"limit": {"type": "integer"}, "verbose": {"type": "boolean"}},
+        }
+        tools.append(types.Tool(
+            name=f"tool_{index:04d}",
+            description=(f"Synthetic tool {index}. " * (description_chars // 20 + 1))[:description_chars],
+            inputSchema={"type": "object", "properties": properties, "required": ["param_0"] if schema_properties else []},
+            annotations=types.ToolAnnotations(readOnlyHint=index % 2 == 0),
+        ))
+    return tools
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake MCP stdio server for benchmarks")
+    parser.add_argument("--tools", type=int, default=10, help="Number of tools")
+    parser.add_argument("--schema-properties", type=int, default=4, help="Properties in each input schema")
+    parser.add_argument("--description-chars", type=int, default=200, help="Length of each tool description")
+    parser.add_argument("--result-bytes", type=int, default=1024, help="Size of each tool result")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Artificial latency of each tool call")
+    parser.add_argument("--progress-steps", type=int, default=0, help="Progress notifications sent during each call, if asked for")
+    args = parser.parse_args()
+
+    tools = build_tools(args.tools, args.schema_properties, args.description_chars)
+    server = Server("ctsm-fake-mcp", version="1.0.0")
+
+    @server.list_tools()
+    async def list_tools() -> List[types.Tool]:
+        return tools
+
+    @server.call_tool(validate_input=False)
+    async def call_tool(name: str, arguments: Dict[str, Any]) -> List[types.TextContent]:
+        meta = server.request_context.meta
+        progress_token = meta.progressToken if meta is not None else None
+        steps = args.progress_steps if progress_token is not None else 0
+        for step in range(steps):
+            await asyncio.sleep(args.latency_ms / 1000 / (steps + 1))
+            await server.request_context.session.send_progress_notification(
+                progress_token, step + 1, total=steps + 1, message=f"Step {step + 1} of {steps + 1}"
+            )
+        if args.latency_ms:
+            await asyncio.sleep(args.latency_ms / 1000 / (steps + 1))
+        payload = json.dumps({"tool": name, "arguments": arguments, "data": ""})
+        padding = "x" * max(args.result_bytes - len(payload), 0)
+        return [types.TextContent(type="text", text=json.dumps({"tool": name, "arguments": arguments, "data": padding}))]
+
+    async def run():
+        async with stdio_server() as (read, write):
+            await server.run(read, write, server.create_initialization_options())
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Import-time profile of the agent startup, built from python -X importtime.
+
+    uv run -m benchmarks.importtime                   # report in benchmarks/results/importtime-<commit>.json
+    uv run -m benchmarks.importtime --top 40
+
+Two scenarios are profiled in fresh interpreters: the agent (electron_main plus the LiveKit
+plugins, as the packaged executable imports them before the worker starts) and the MCP pool
+host (electron_main only). Each reports the total import time, the slowest modules by
+cumulative time and the top-level packages by their own time.
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from benchmarks.run import RESULTS_DIR, current_commit
+
+AGENT_DIR = Path(__file__).parent.parent
+
+SCENARIOS = {
+    "agent": "import src.ctsm.electron_main; from src.ctsm.startup import import_plugins; import_plugins()",
+    "pool_host": "import src.ctsm.electron_main",
+}
+
+# "import time: self [us] | cumulative | imported package", nesting is shown by indentation
+LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """Parses the -X importtime output into one entry per module, times in milliseconds."""
+    modules = []
+    for line in stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules.append({
+                "module": name,
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+                "depth": (len(indent) - 1) // 2,
+            })
+    return modules
+
+
+def profile(code: str, top: int) -> Dict[str, Any]:
+    """Runs the code in a fresh interpreter with -X importtime and summarizes the imports."""
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([str(AGENT_DIR / "src"), str(AGENT_DIR)])}
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=AGENT_DIR, env=env, capture_output=True, text=True, check=False)
+    wall_ms = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        # The last line of the traceback names the import that failed
+        return {"error": result.stderr.strip().splitlines()[-1] if result.stderr.strip() else f"exit code {result.returncode}"}
+
+    modules = parse_importtime(result.stderr)
+    packages: Dict[str, float] = {}
+    for module in modules:
+        package = module["module"].split(".")[0]
+        packages[package] = packages.get(package, 0.0) + module["self_ms"]
+
+    return {
+        "wall_ms": round(wall_ms, 1),
+        "import_ms": round(sum(module["self_ms"] for module in modules), 1),
+        "modules": len(modules),
+        "slowest_modules": [
+            {key: module[key] for key in ("module", "self_ms", "cumulative_ms")}
+            for module in sorted(modules, key=lambda module: module["cumulative_ms"], reverse=True)[:top]
+        ],
+        "packages": {name: round(ms, 1) for name, ms in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]},
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Import-time profile of the agent startup")
+    parser.add_argument("--top", type=int, default=25, help="Modules and packages listed per scenario")
+    parser.add_argument("--output", type=Path, help="Report file, benchmarks/results/importtime-<commit>.json if not set")
+    args = parser.parse_args(argv)
+
+    commit = current_commit()
+    report: Dict[str, Any] = {"commit": commit, "timestamp": time.time(), "python": sys.version.split()[0], "scenarios": {}}
+    for name, code in SCENARIOS.items():
+        result = profile(code, args.top)
+        report["scenarios"][name] = result
+        if "error" in result:
+            print(f"{name}: failed, {result['error']}")
+            continue
+        print(f"{name}: {result['import_ms']:.0f} ms in imports ({result['modules']} modules), {result['wall_ms']:.0f} ms wall")
+        for package, ms in list(result["packages"].items())[:10]:
+            print(f"    {package:<30} {ms:8.1f} ms")
+
+    output = args.output or RESULTS_DIR / f"importtime-{commit}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"Report written to {output}")
+
+
+if __name__ == "__main__":
+    main()
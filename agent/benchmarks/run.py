@@ -0,0 +1,253 @@
+"""
+Benchmarks of the MCP layer against the local fake MCP server.
+
+    uv run -m benchmarks.run                          # all benchmarks, results in benchmarks/results/<commit>.json
+    uv run -m benchmarks.run --only invoke_tool       # a single benchmark
+    uv run -m benchmarks.run --compare benchmarks/results/abc1234.json
+
+Every benchmark reports wall-clock timings in milliseconds (or operations per second) so results
+of two commits can be compared with --compare.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional
+
+from benchmarks.fake_mcp_server import build_tools
+from src.ctsm.mcp import schema as schema_module
+from src.ctsm.mcp.agent_tools import MCPToolsIntegration
+from src.ctsm.mcp.schema import SchemaCompactionConfig, SchemaCompactor
+from src.ctsm.mcp.server import MCPServer
+from src.ctsm.mcp.util import MCPServerConfig, MCPUtil, get_mcps_from_config
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+# A metric that got worse by more than this fraction is reported as a regression
+REGRESSION_THRESHOLD = 0.10
+
+
+def fake_server_config(tools: int = 10, schema_properties: int = 4, result_bytes: int = 1024, latency_ms: float = 0.0,
+                       max_in_flight: int = 4) -> MCPServerConfig:
+    """Configuration of a fake MCP server with the given tool count, schema size, result size and latency."""
+    return MCPServerConfig(
+        command=sys.executable,
+        args=[
+            "-m", "benchmarks.fake_mcp_server",
+            "--tools", str(tools),
+            "--schema-properties", str(schema_properties),
+            "--result-bytes", str(result_bytes),
+            "--latency-ms", str(latency_ms),
+        ],
+        name=f"Fake MCP Server ({tools} tools)",
+        max_in_flight=max_in_flight,
+    )
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Milliseconds statistics of a list of durations in seconds."""
+    ordered = sorted(samples)
+    return {
+        "n": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3),
+        "min_ms": round(ordered[0] * 1000, 3),
+    }
+
+
+async def timed(fn: Callable[..., Awaitable[Any]], *args: Any, **kwargs: Any) -> float:
+    started = time.perf_counter()
+    await fn(*args, **kwargs)
+    return time.perf_counter() - started
+
+
+async def connect_server(config: MCPServerConfig) -> MCPServer:
+    server = get_mcps_from_config([config])[0]
+    await server.connect()
+    return server
+
+
+async def bench_connect(rounds: int) -> Dict[str, Any]:
+    """get_mcps_from_config until the server is connected and initialized."""
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        server = await connect_server(fake_server_config())
+        samples.append(time.perf_counter() - started)
+        await server.cleanup()
+    return {"connect": summarize(samples)}
+
+
+async def bench_prepare_dynamic_tools(rounds: int, tool_counts: List[int]) -> Dict[str, Any]:
+    """prepare_dynamic_tools on an already connected server: tools/list, schema conversion and decoration."""
+    results = {}
+    for count in tool_counts:
+        server = await connect_server(fake_server_config(tools=count, schema_properties=8))
+        try:
+            samples = []
+            for _ in range(rounds):
+                server.invalidate_tools_cache()
+                samples.append(await timed(MCPToolsIntegration.prepare_dynamic_tools, [server], auto_connect=False))
+            results[f"tools_{count}"] = summarize(samples)
+        finally:
+            await server.cleanup()
+    return results
+
+
+async def bench_create_decorated_tool(tool_count: int) -> Dict[str, Any]:
+    """Throughput of turning FunctionTools into LiveKit function tools."""
+    server = await connect_server(fake_server_config(tools=tool_count, schema_properties=8))
+    try:
+        function_tools = await MCPUtil.get_function_tools(server, True)
+        results = {}
+        for label, tools in (("strict", function_tools), ("non_strict", await MCPUtil.get_function_tools(server, False))):
+            started = time.perf_counter()
+            for tool in tools:
+                MCPToolsIntegration._create_decorated_tool(tool)
+            elapsed = time.perf_counter() - started
+            results[label] = {"n": len(tools), "ops_per_second": round(len(tools) / elapsed, 1), "mean_ms": round(elapsed / len(tools) * 1000, 4)}
+        return results
+    finally:
+        await server.cleanup()
+
+
+async def bench_invoke_tool(calls: int, concurrency_levels: List[int], latency_ms: float, result_bytes: int) -> Dict[str, Any]:
+    """Round-trip latency and throughput of invoke_tool with several callers at once."""
+    results = {}
+    for concurrency in concurrency_levels:
+        server = await connect_server(
+            fake_server_config(result_bytes=result_bytes, latency_ms=latency_ms, max_in_flight=max(concurrency_levels))
+        )
+        try:
+            tool = (await MCPUtil.get_function_tools(server, True))[0]
+            samples: List[float] = []
+            counter = iter(range(calls))
+
+            async def caller(tool: Any, counter: Iterator[int], samples: List[float]):
+                for index in counter:
+                    samples.append(await timed(tool.on_invoke_tool, None, json.dumps({"param_0": f"call {index}"})))
+
+            started = time.perf_counter()
+            await asyncio.gather(*(caller(tool, counter, samples) for _ in range(concurrency)))
+            elapsed = time.perf_counter() - started
+            results[f"concurrency_{concurrency}"] = {**summarize(samples), "calls_per_second": round(calls / elapsed, 1)}
+        finally:
+            await server.cleanup()
+    return results
+
+
+async def bench_schema_compaction(tool_counts: List[int]) -> Dict[str, Any]:
+    """Prompt tokens saved by compacting verbose tool schemas, and the time it takes, cold and memoized."""
+    results = {}
+    for count in tool_counts:
+        tools = build_tools(count, schema_properties=8, description_chars=1200)
+        schema_module._compacted.clear()
+        compactor = SchemaCompactor(SchemaCompactionConfig())
+        timings = {}
+        for label in ("cold", "memoized"):
+            started = time.perf_counter()
+            for tool in tools:
+                compactor.compact(tool.name, tool.description, tool.inputSchema)
+            timings[f"{label}_mean_ms"] = round((time.perf_counter() - started) / count * 1000, 4)
+        stats = compactor.stats()
+        saved = stats["tokens_before"] - stats["tokens_after"]
+        results[f"tools_{count}"] = {
+            "n": count,
+            **timings,
+            "tokens_saved": saved,
+            "saved_percent": round(saved / stats["tokens_before"] * 100, 1),
+        }
+    return results
+
+
+def current_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[str]:
+    """Lists the metrics that regressed; higher is worse for *_ms, lower is worse for *_per_second."""
+    regressions = []
+    for bench, groups in current["benchmarks"].items():
+        for group, metrics in groups.items():
+            old_metrics = baseline.get("benchmarks", {}).get(bench, {}).get(group, {})
+            for metric, value in metrics.items():
+                old = old_metrics.get(metric)
+                if not old or metric == "n":
+                    continue
+                change = (value - old) / old
+                worse = change > REGRESSION_THRESHOLD if metric.endswith("_ms") else change < -REGRESSION_THRESHOLD
+                line = f"{bench}.{group}.{metric}: {old} -> {value} ({change:+.1%})"
+                print(("REGRESSION " if worse else "           ") + line)
+                if worse:
+                    regressions.append(line)
+    return regressions
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    benchmarks: Dict[str, Callable[[], Awaitable[Dict[str, Any]]]] = {
+        "connect": lambda: bench_connect(args.rounds),
+        "prepare_dynamic_tools": lambda: bench_prepare_dynamic_tools(args.rounds, args.tool_counts),
+        "create_decorated_tool": lambda: bench_create_decorated_tool(max(args.tool_counts)),
+        "invoke_tool": lambda: bench_invoke_tool(args.calls, args.concurrency, args.latency_ms, args.result_bytes),
+        "schema_compaction": lambda: bench_schema_compaction(args.tool_counts),
+    }
+    results = {}
+    for name, bench in benchmarks.items():
+        if args.only and name not in args.only:
+            continue
+        print(f"Running {name}...", flush=True)
+        results[name] = await bench()
+        print(json.dumps(results[name], indent=2), flush=True)
+    return results
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="MCP layer benchmarks")
+    parser.add_argument("--only", nargs="*", help="Benchmarks to run, all if not set")
+    parser.add_argument("--rounds", type=int, default=5, help="Repetitions of the connect and prepare benchmarks")
+    parser.add_argument("--tool-counts", type=int, nargs="+", default=[10, 100, 1000], help="Tool counts for prepare_dynamic_tools")
+    parser.add_argument("--calls", type=int, default=200, help="Tool calls per concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16], help="Concurrent callers of invoke_tool")
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="Artificial latency of each fake tool call")
+    parser.add_argument("--result-bytes", type=int, default=4096, help="Size of each fake tool result")
+    parser.add_argument("--output", type=Path, help="Result file, benchmarks/results/<commit>.json if not set")
+    parser.add_argument("--compare", type=Path, help="Earlier result file to compare against; exits 1 on regressions")
+    args = parser.parse_args(argv)
+
+    # The benchmarks measure the code, not the logging
+    logging.basicConfig(level=logging.WARNING)
+
+    commit = current_commit()
+    report = {
+        "commit": commit,
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {key: str(value) if isinstance(value, Path) else value for key, value in vars(args).items()},
+        "benchmarks": asyncio.run(run(args)),
+    }
+    output = args.output or RESULTS_DIR / f"{commit}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"Results written to {output}")
+
+    if args.compare:
+        regressions = compare(json.loads(args.compare.read_text()), report)
+        if regressions:
+            print(f"{len(regressions)} metrics regressed by more than {REGRESSION_THRESHOLD:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
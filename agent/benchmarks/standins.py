@@ -0,0 +1,287 @@
+"""
+Local stand-ins for the speech and LLM services, with scripted, configurable delays.
+
+They implement the livekit-agents plugin interfaces, so the real AgentSession runs against them
+unchanged: STT and TTS are wrapped in the session's stream adapters exactly like non-streaming
+providers, and the LLM's tool calls go through the registered MCP tools.
+"""
+
+import asyncio
+import json
+import time
+import wave
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+from livekit import rtc
+from livekit.agents import APIConnectOptions, llm, stt, tts, utils
+from livekit.agents.types import DEFAULT_API_CONNECT_OPTIONS, NOT_GIVEN, NotGivenOr
+from livekit.agents.voice import io
+from pydantic import BaseModel
+
+# Bytes per sample of the 16-bit PCM recordings
+PCM16_SAMPLE_WIDTH = 2
+
+
+class ScriptedToolCall(BaseModel):
+    name: str
+    arguments: Dict[str, Any] = {}
+
+
+class ScriptedStep(BaseModel):
+    # Tool calls emitted by this LLM response; the next step runs once their outputs are in
+    tool_calls: List[ScriptedToolCall] = []
+    # Text spoken by this LLM response
+    text: str = ""
+
+
+class ScriptedTurn(BaseModel):
+    # Recorded utterance played into the session, relative to the script file
+    audio: str
+    # What the STT stand-in returns for the utterance
+    transcript: str
+    # LLM responses of the turn, in order
+    steps: List[ScriptedStep] = [ScriptedStep(text="Sure, here you go.")]
+
+
+class Script(BaseModel):
+    turns: List[ScriptedTurn]
+    # Seconds from the end of an utterance to the final transcript
+    stt_delay: float = 0.15
+    # Seconds from the LLM request to the first token
+    llm_ttft: float = 0.35
+    # Streaming speed of the LLM text
+    llm_tokens_per_second: float = 60.0
+    # Seconds from the TTS request to the first audio
+    tts_ttfb: float = 0.2
+
+    @classmethod
+    def load(cls, path: Path) -> "Script":
+        return cls.model_validate(json.loads(path.read_text()))
+
+
+class ScriptedSTT(stt.STT):
+    """Returns the scripted transcripts in order, one per utterance detected by the VAD."""
+
+    def __init__(self, script: Script):
+        super().__init__(capabilities=stt.STTCapabilities(streaming=False, interim_results=False))
+        self.script = script
+        self._next_turn = 0
+
+    async def _recognize_impl(
+        self,
+        buffer: utils.AudioBuffer,
+        *,
+        language: NotGivenOr[str] = NOT_GIVEN,
+        conn_options: APIConnectOptions,
+    ) -> stt.SpeechEvent:
+        await asyncio.sleep(self.script.stt_delay)
+        turns = self.script.turns
+        text = turns[self._next_turn].transcript if self._next_turn < len(turns) else ""
+        self._next_turn += 1
+        return stt.SpeechEvent(
+            type=stt.SpeechEventType.FINAL_TRANSCRIPT,
+            alternatives=[stt.SpeechData(language="en", text=text, confidence=1.0)],
+        )
+
+
+class ScriptedLLM(llm.LLM):
+    """Plays back the scripted responses: the turn is the number of user messages, the step the tool outputs since."""
+
+    def __init__(self, script: Script):
+        super().__init__()
+        self.script = script
+
+    @property
+    def model(self) -> str:
+        return "scripted"
+
+    def chat(
+        self,
+        *,
+        chat_ctx: llm.ChatContext,
+        tools: Optional[List[Any]] = None,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+        parallel_tool_calls: NotGivenOr[bool] = NOT_GIVEN,
+        tool_choice: NotGivenOr[llm.ToolChoice] = NOT_GIVEN,
+        extra_kwargs: NotGivenOr[Dict[str, Any]] = NOT_GIVEN,
+    ) -> llm.LLMStream:
+        return ScriptedLLMStream(self, chat_ctx=chat_ctx, tools=tools or [], conn_options=conn_options)
+
+    def step_for(self, chat_ctx: llm.ChatContext) -> ScriptedStep:
+        turn_index, step_index = -1, 0
+        for item in chat_ctx.items:
+            if item.type == "message" and item.role == "user":
+                turn_index, step_index = turn_index + 1, 0
+            elif item.type == "function_call_output":
+                step_index += 1
+        if not 0 <= turn_index < len(self.script.turns):
+            return ScriptedStep(text="Hello, how can I help?")
+        # Parallel tool calls produce several outputs for one step
+        remaining = step_index
+        for step in self.script.turns[turn_index].steps:
+            if remaining == 0:
+                return step
+            remaining -= len(step.tool_calls)
+        return ScriptedStep(text="Done.")
+
+
+class ScriptedLLMStream(llm.LLMStream):
+    async def _run(self) -> None:
+        script = self._llm.script
+        step = self._llm.step_for(self._chat_ctx)
+        request_id = utils.shortuuid("scripted_")
+        await asyncio.sleep(script.llm_ttft)
+
+        for call in step.tool_calls:
+            self._event_ch.send_nowait(llm.ChatChunk(
+                id=request_id,
+                delta=llm.ChoiceDelta(role="assistant", tool_calls=[llm.FunctionToolCall(
+                    name=call.name, arguments=json.dumps(call.arguments), call_id=utils.shortuuid("call_"),
+                )]),
+            ))
+        for index, word in enumerate(step.text.split(" ") if step.text else []):
+            if index:
+                await asyncio.sleep(1 / script.llm_tokens_per_second)
+            self._event_ch.send_nowait(llm.ChatChunk(id=request_id, delta=llm.ChoiceDelta(role="assistant", content=word + " ")))
+
+
+class SilentTTS(tts.TTS):
+    """Returns silence as long as the text would take to speak, after the scripted first-byte delay."""
+
+    SAMPLE_RATE = 24000
+    # Roughly the speaking rate of the production voice
+    SECONDS_PER_CHAR = 0.06
+
+    def __init__(self, script: Script):
+        super().__init__(capabilities=tts.TTSCapabilities(streaming=False), sample_rate=self.SAMPLE_RATE, num_channels=1)
+        self.script = script
+
+    def synthesize(self, text: str, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS) -> tts.ChunkedStream:
+        return SilentChunkedStream(tts=self, input_text=text, conn_options=conn_options)
+
+
+class SilentChunkedStream(tts.ChunkedStream):
+    async def _run(self, output_emitter: tts.AudioEmitter) -> None:
+        output_emitter.initialize(
+            request_id=utils.shortuuid("silence_"), sample_rate=SilentTTS.SAMPLE_RATE, num_channels=1, mime_type="audio/pcm",
+        )
+        await asyncio.sleep(self._tts.script.tts_ttfb)
+        duration = max(len(self._input_text) * SilentTTS.SECONDS_PER_CHAR, 0.1)
+        chunk = bytes(2 * SilentTTS.SAMPLE_RATE // 10)
+        for _ in range(int(duration * 10)):
+            output_emitter.push(chunk)
+        output_emitter.flush()
+
+
+def read_wav(path: Path, sample_rate: int = 16000) -> np.ndarray:
+    """Reads a 16-bit PCM WAV file as mono int16 samples at the given rate."""
+    with wave.open(str(path), "rb") as wav:
+        if wav.getsampwidth() != PCM16_SAMPLE_WIDTH:
+            raise ValueError(f"{path} must be 16-bit PCM")
+        samples = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+        if wav.getnchannels() > 1:
+            samples = samples.reshape(-1, wav.getnchannels()).mean(axis=1).astype(np.int16)
+        source_rate = wav.getframerate()
+    if source_rate != sample_rate:
+        positions = np.linspace(0, len(samples) - 1, int(len(samples) * sample_rate / source_rate))
+        samples = np.interp(positions, np.arange(len(samples)), samples).astype(np.int16)
+    return samples
+
+
+class WavAudioInput(io.AudioInput):
+    """
+    Plays recorded utterances into the session in real time, like a microphone would.
+
+    Each utterance is followed by silence until wait_for_reply() returns, so the next one starts
+    only after the agent answered. The time each utterance ends is recorded as the turn's reference.
+    """
+
+    SAMPLE_RATE = 16000
+    FRAME_MS = 10
+
+    def __init__(self, utterances: List[np.ndarray], wait_for_reply: Callable[[int], Any], gap: float = 0.5):
+        """
+        Args:
+            utterances: Samples of each user utterance
+            wait_for_reply: Awaited after each utterance with its index, returns when the reply is done
+            gap: Seconds of silence between the reply and the next utterance
+        """
+        super().__init__(label="WavAudioInput")
+        self._frames = self._generate(utterances, wait_for_reply, gap)
+        self.utterance_ends: List[float] = []
+        self.finished = asyncio.Event()
+
+    def _frame(self, samples: np.ndarray) -> rtc.AudioFrame:
+        return rtc.AudioFrame(samples.tobytes(), self.SAMPLE_RATE, 1, len(samples))
+
+    async def _generate(self, utterances: List[np.ndarray], wait_for_reply, gap: float):
+        frame_size = self.SAMPLE_RATE * self.FRAME_MS // 1000
+        silence = np.zeros(frame_size, dtype=np.int16)
+        next_at = time.monotonic()
+
+        async def paced(samples: np.ndarray):
+            nonlocal next_at
+            next_at += len(samples) / self.SAMPLE_RATE
+            await asyncio.sleep(max(next_at - time.monotonic(), 0))
+            return self._frame(samples)
+
+        for index, samples in enumerate(utterances):
+            for _ in range(int(gap * 1000 / self.FRAME_MS)):
+                yield await paced(silence)
+            for start in range(0, len(samples), frame_size):
+                chunk = samples[start:start + frame_size]
+                yield await paced(np.pad(chunk, (0, frame_size - len(chunk))))
+            self.utterance_ends.append(time.time())
+            reply = asyncio.ensure_future(wait_for_reply(index))
+            # Keep the microphone open while the agent answers, the VAD needs the trailing silence
+            while not reply.done():
+                yield await paced(silence)
+            next_at = time.monotonic()
+        self.finished.set()
+        while True:
+            yield await paced(silence)
+
+    async def __anext__(self) -> rtc.AudioFrame:
+        return await self._frames.__anext__()
+
+
+class TimingAudioOutput(io.AudioOutput):
+    """Discards the agent's audio but records when the first frame of each segment arrives, and plays it out in real time."""
+
+    def __init__(self):
+        super().__init__(label="TimingAudioOutput", capabilities=io.AudioOutputCapabilities(pause=False))
+        self.segment_starts: List[float] = []
+        self._segment_duration = 0.0
+        self._capturing = False
+        self._playout: Optional[asyncio.Task] = None
+
+    async def capture_frame(self, frame: rtc.AudioFrame) -> None:
+        await super().capture_frame(frame)
+        if not self._capturing:
+            self._capturing = True
+            self._segment_duration = 0.0
+            self.segment_starts.append(time.time())
+        self._segment_duration += frame.duration
+
+    def flush(self) -> None:
+        super().flush()
+        if not self._capturing:
+            return
+        self._capturing = False
+        duration = self._segment_duration
+
+        async def play():
+            await asyncio.sleep(duration)
+            self.on_playback_finished(playback_position=duration, interrupted=False)
+
+        self._playout = asyncio.create_task(play())
+
+    def clear_buffer(self) -> None:
+        if self._playout is not None and not self._playout.done():
+            self._playout.cancel()
+            self.on_playback_finished(playback_position=0.0, interrupted=True)
+        elif self._capturing:
+            self._capturing = False
+            self.on_playback_finished(playback_position=0.0, interrupted=True)
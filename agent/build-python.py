@@ -64,7 +64,7 @@ except:
 
 a = Analysis(
     ['src/ctsm/electron_main.py'],
-    pathex=[],
+    pathex=['src'],
     binaries=[],
     datas=[
         ('src/ctsm/mcp', 'ctsm/mcp'),
@@ -79,10 +79,32 @@ a = Analysis(
         'livekit.plugins.cartesia',
         'livekit.plugins.silero',
         'livekit.plugins.noise_cancellation',
+        'src.ctsm.config',
+        'src.ctsm.history',
+        'src.ctsm.host',
         'src.ctsm.mcp.agent_tools',
+        'src.ctsm.mcp.content',
         'src.ctsm.mcp.context',
+        'src.ctsm.mcp.metrics',
+        'src.ctsm.mcp.pool',
+        'src.ctsm.mcp.prefetch',
+        'src.ctsm.mcp.progress',
+        'src.ctsm.mcp.reducer',
+        'src.ctsm.mcp.result_cache',
+        'src.ctsm.mcp.schema',
+        'src.ctsm.mcp.scheduler',
+        'src.ctsm.mcp.single_flight',
+        'src.ctsm.mcp.tool_cache',
+        'src.ctsm.mcp.tool_index',
+        'src.ctsm.mcp.tracing',
         'src.ctsm.mcp.util',
+        'src.ctsm.memory',
+        'src.ctsm.model_registry',
         'src.ctsm.models',
+        'src.ctsm.prompt',
+        'src.ctsm.session',
+        'src.ctsm.startup',
+        'src.ctsm.turn_metrics',
     ],
     hookspath=['.'],
     hooksconfig={},
@@ -94,19 +116,19 @@ a = Analysis(
 
 pyz = PYZ(a.pure)
 
+# Onedir layout: the bytecode archive and native libraries stay on disk next to the
+# executable, instead of being unpacked to a temporary directory on every start.
+# UPX is off, compressed libraries would be decompressed on every load.
 exe = EXE(
     pyz,
     a.scripts,
-    a.binaries,
-    a.datas,
     [],
+    exclude_binaries=True,
     name='ctsm-agent',
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
-    upx=True,
-    upx_exclude=[],
-    runtime_tmpdir=None,
+    upx=False,
     console=True,
     disable_windowed_traceback=False,
     argv_emulation=False,
@@ -114,6 +136,16 @@ exe = EXE(
     codesign_identity=None,
     entitlements_file=None,
 )
+
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx=False,
+    upx_exclude=[],
+    name='ctsm-agent',
+)
 '''
 
     with open('ctsm.spec', 'w') as f:
@@ -127,13 +159,13 @@ exe = EXE(
     python_dist = Path('python-dist')
     python_dist.mkdir(exist_ok=True)
 
-    # Copy the executable
+    # Copy the onedir bundle: the executable with its _internal directory
     exe_name = 'ctsm-agent.exe' if sys.platform == 'win32' else 'ctsm-agent'
-    exe_path = Path('dist') / exe_name
+    bundle_path = Path('dist') / 'ctsm-agent'
 
-    if exe_path.exists():
-        shutil.copy2(exe_path, python_dist / exe_name)
-        print(f"✅ Python executable created: {python_dist / exe_name}")
+    if (bundle_path / exe_name).exists():
+        shutil.copytree(bundle_path, python_dist / 'ctsm-agent')
+        print(f"✅ Python executable created: {python_dist / 'ctsm-agent' / exe_name}")
     else:
         print("❌ Failed to create Python executable")
         sys.exit(1)
@@ -19,7 +19,7 @@ except:
 
 a = Analysis(
     ['src/ctsm/electron_main.py'],
-    pathex=[],
+    pathex=['src'],
     binaries=[],
     datas=[
         ('src/ctsm/mcp', 'ctsm/mcp'),
@@ -34,10 +34,32 @@ a = Analysis(
         'livekit.plugins.cartesia',
         'livekit.plugins.silero',
         'livekit.plugins.noise_cancellation',
+        'src.ctsm.config',
+        'src.ctsm.history',
+        'src.ctsm.host',
         'src.ctsm.mcp.agent_tools',
+        'src.ctsm.mcp.content',
         'src.ctsm.mcp.context',
+        'src.ctsm.mcp.metrics',
+        'src.ctsm.mcp.pool',
+        'src.ctsm.mcp.prefetch',
+        'src.ctsm.mcp.progress',
+        'src.ctsm.mcp.reducer',
+        'src.ctsm.mcp.result_cache',
+        'src.ctsm.mcp.schema',
+        'src.ctsm.mcp.scheduler',
+        'src.ctsm.mcp.single_flight',
+        'src.ctsm.mcp.tool_cache',
+        'src.ctsm.mcp.tool_index',
+        'src.ctsm.mcp.tracing',
         'src.ctsm.mcp.util',
+        'src.ctsm.memory',
+        'src.ctsm.model_registry',
         'src.ctsm.models',
+        'src.ctsm.prompt',
+        'src.ctsm.session',
+        'src.ctsm.startup',
+        'src.ctsm.turn_metrics',
     ],
     hookspath=['.'],
     hooksconfig={},
@@ -49,19 +71,19 @@ a = Analysis(
 
 pyz = PYZ(a.pure)
 
+# Onedir layout: the bytecode archive and native libraries stay on disk next to the
+# executable, instead of being unpacked to a temporary directory on every start.
+# UPX is off, compressed libraries would be decompressed on every load.
 exe = EXE(
     pyz,
     a.scripts,
-    a.binaries,
-    a.datas,
     [],
+    exclude_binaries=True,
     name='ctsm-agent',
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
-    upx=True,
-    upx_exclude=[],
-    runtime_tmpdir=None,
+    upx=False,
     console=True,
     disable_windowed_traceback=False,
     argv_emulation=False,
@@ -69,3 +91,13 @@ exe = EXE(
     codesign_identity=None,
     entitlements_file=None,
 )
+
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx=False,
+    upx_exclude=[],
+    name='ctsm-agent',
+)
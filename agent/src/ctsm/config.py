@@ -0,0 +1,251 @@
+"""
+The Electron config: how it reaches the agent, and how a changed config is applied to a running session.
+
+Electron hands the config over in a file (``CTSM_CONFIG_FILE``) or an inherited pipe (``CTSM_CONFIG_FD``),
+so the secrets in it never show up in the process list. A JSON argument is still accepted from older
+launchers. When the config changes, only what changed is applied: new instructions go to the running
+agent, added and removed MCP servers are started and stopped on their own, and everything else stays up.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from src.ctsm.mcp.agent_tools import MCPToolRegistry
+from src.ctsm.mcp.server import MCPServer
+from src.ctsm.mcp.util import MCPServerConfig, get_mcps_from_config
+from src.ctsm.session import (
+    assemble_instructions,
+    history_config,
+    mcp_pool_config,
+    mcp_server_configs,
+    tool_progress_config,
+    tool_retrieval_config,
+)
+
+logger = logging.getLogger(__name__)
+
+CONFIG_FILE_ENV = "CTSM_CONFIG_FILE"
+CONFIG_FD_ENV = "CTSM_CONFIG_FD"
+
+# Keys applied to the running agent with update_instructions
+INSTRUCTION_KEYS = ("systemPrompt", "userContext")
+# Keys applied to the running agent's tool selector
+RETRIEVAL_KEYS = ("toolRetrieval",)
+# Keys applied to the running agent's history manager
+HISTORY_KEYS = ("history",)
+# Keys applied to the status phrases of slow tool calls
+PROGRESS_KEYS = ("toolProgress",)
+# Keys applied by starting and stopping single MCP servers; the pool settings only apply to servers started later
+SERVER_KEYS = ("mcpServers", "mcpPool")
+# Keys the running session does not depend on
+IGNORED_KEYS = ("agentProfiles", "residentAgent", "mcpMinReadyServers")
+# Secrets that only reach the MCP servers, through their arguments
+SERVER_SECRETS = ("aciApiKey",)
+
+
+def read_config(argv: Sequence[str]) -> Optional[Dict[str, Any]]:
+    """
+    Reads the config from the file or pipe named in the environment, or from a JSON argument.
+
+    Args:
+        argv: The command line, searched for a JSON argument if the environment names no file or pipe
+
+    Returns:
+        The config, or None if none was passed
+    """
+    path = os.environ.get(CONFIG_FILE_ENV)
+    if path:
+        return json.loads(Path(path).read_text(encoding="utf-8"))
+
+    fd = os.environ.get(CONFIG_FD_ENV)
+    if fd:
+        with os.fdopen(int(fd), encoding="utf-8") as f:
+            return json.load(f)
+
+    # Older launchers pass the config as an argument (skip the 'console' command)
+    for arg in argv[1:]:
+        if arg != "console" and arg.startswith("{"):
+            logger.warning("Config passed on the command line, where other processes can read the secrets in it")
+            return json.loads(arg)
+    return None
+
+
+def describe_config(config: Dict[str, Any]) -> str:
+    """A summary of the config for the logs, without the secrets and the prompt."""
+    user_name = (config.get("userContext") or {}).get("name") or "Unknown"
+    servers = [server.get("name") for server in config.get("mcpServers") or []]
+    secrets = sorted(name for name, value in (config.get("secrets") or {}).items() if value)
+    return (
+        f"user {user_name}, system prompt of {len(config.get('systemPrompt') or '')} chars, "
+        f"MCP servers {servers}, secrets set {secrets}"
+    )
+
+
+def server_key(config: MCPServerConfig) -> str:
+    """Identifies a server configuration; a running server is kept only if nothing in it changed."""
+    return json.dumps(config.model_dump(mode="json"), sort_keys=True)
+
+
+class ConfigDiff:
+    """What changed between two configs, grouped by how the change is applied."""
+
+    def __init__(self, old: Dict[str, Any], new: Dict[str, Any]):
+        self.instructions_changed = any(old.get(key) != new.get(key) for key in INSTRUCTION_KEYS)
+        self.retrieval_changed = any(old.get(key) != new.get(key) for key in RETRIEVAL_KEYS)
+        self.history_changed = any(old.get(key) != new.get(key) for key in HISTORY_KEYS)
+        self.progress_changed = any(old.get(key) != new.get(key) for key in PROGRESS_KEYS)
+
+        old_servers = {server_key(config): config for config in mcp_server_configs(old)}
+        new_servers = {server_key(config): config for config in mcp_server_configs(new)}
+        self.added: List[MCPServerConfig] = [config for key, config in new_servers.items() if key not in old_servers]
+        self.removed: List[MCPServerConfig] = [config for key, config in old_servers.items() if key not in new_servers]
+
+        handled = INSTRUCTION_KEYS + RETRIEVAL_KEYS + HISTORY_KEYS + PROGRESS_KEYS + SERVER_KEYS + IGNORED_KEYS + ("secrets",)
+        self.restart_keys = sorted(key for key in set(old) | set(new) if key not in handled and old.get(key) != new.get(key))
+        old_secrets = {name: value for name, value in (old.get("secrets") or {}).items() if name not in SERVER_SECRETS}
+        new_secrets = {name: value for name, value in (new.get("secrets") or {}).items() if name not in SERVER_SECRETS}
+        if old_secrets != new_secrets:
+            self.restart_keys.append("secrets")
+
+    @property
+    def restart_required(self) -> bool:
+        """Whether the change needs a new session, e.g. new API keys for the voice pipeline."""
+        return bool(self.restart_keys)
+
+    @property
+    def empty(self) -> bool:
+        return not (
+            self.instructions_changed or self.retrieval_changed or self.history_changed or self.progress_changed
+            or self.added or self.removed or self.restart_keys
+        )
+
+    def summary(self) -> Dict[str, Any]:
+        """The changes by name, safe to log."""
+        return {
+            "instructions": self.instructions_changed,
+            "tool_retrieval": self.retrieval_changed,
+            "history": self.history_changed,
+            "tool_progress": self.progress_changed,
+            "added_servers": [config.name for config in self.added],
+            "removed_servers": [config.name for config in self.removed],
+            "restart_keys": self.restart_keys,
+        }
+
+
+class ConfigReloader:
+    """
+    Applies config changes to a running session in place.
+
+    Changes that cannot be applied in place are only reported in the returned diff; the caller decides
+    whether they are worth a new session.
+    """
+
+    def __init__(self, config: Dict[str, Any], agent, mcp_tools: MCPToolRegistry, servers: Dict[str, MCPServer], context: Any):
+        """
+        Args:
+            config: The config the session was started with
+            agent: The running agent
+            mcp_tools: The registry of the agent's MCP tools
+            servers: The session's servers by server_key(), updated as servers are added and removed
+            context: The context the instructions were built with
+        """
+        self.config = config
+        self.agent = agent
+        self.mcp_tools = mcp_tools
+        self.servers = servers
+        self.context = context
+        self._lock = asyncio.Lock()
+
+    async def apply(self, new_config: Dict[str, Any]) -> ConfigDiff:
+        """Applies what can be applied in place and returns the diff to the previous config."""
+        async with self._lock:
+            diff = ConfigDiff(self.config, new_config)
+            if diff.empty:
+                return diff
+            logger.info(f"Applying config change: {diff.summary()}")
+
+            # Removed first, a changed server keeps its name and replaces the old one's tools
+            for server_config in diff.removed:
+                await self.mcp_tools.remove_server(server_config.name)
+                server = self.servers.pop(server_key(server_config), None)
+                if server is not None:
+                    await server.cleanup()
+            if diff.added:
+                added = get_mcps_from_config(diff.added, pool_config=mcp_pool_config(new_config))
+                for server_config, server in zip(diff.added, added, strict=True):
+                    self.servers[server_key(server_config)] = server
+                await self.mcp_tools.start_servers(added, required_servers=[config.name for config in diff.added if config.required])
+
+            if diff.instructions_changed:
+                assembled = assemble_instructions(new_config, self.context)
+                logger.info(f"Agent {assembled.describe()}")
+                await self.agent.update_instructions(assembled.text)
+                memory = getattr(self.agent, "memory", None)
+                if memory is not None:
+                    memory.sync_profile(new_config.get("userContext") or {})
+            tool_selector = getattr(self.agent, "tool_selector", None)
+            if diff.retrieval_changed and tool_selector is not None:
+                tool_selector.config = tool_retrieval_config(new_config.get("toolRetrieval") or {})
+            history = getattr(self.agent, "history", None)
+            if diff.history_changed and history is not None:
+                history.config = history_config(new_config.get("history") or {})
+            progress = self.mcp_tools.policies.progress
+            if diff.progress_changed and progress is not None:
+                progress.config = tool_progress_config(new_config.get("toolProgress") or {})
+
+            self.config = new_config
+            return diff
+
+
+class ConfigFileWatcher:
+    """Calls back with the new config whenever the config file is replaced."""
+
+    def __init__(self, path: Path, on_change: Callable[[Dict[str, Any]], Awaitable[Any]], interval: float = 1.0):
+        """
+        Args:
+            path: The config file
+            on_change: Called with the new config
+            interval: Seconds between checks of the file's modification time
+        """
+        self.path = path
+        self.on_change = on_change
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._watch(), name="config-watcher")
+
+    def _mtime(self) -> Optional[int]:
+        try:
+            return self.path.stat().st_mtime_ns
+        except OSError:
+            return None
+
+    async def _watch(self) -> None:
+        last_mtime = self._mtime()
+        while True:
+            await asyncio.sleep(self.interval)
+            mtime = self._mtime()
+            if mtime is None or mtime == last_mtime:
+                continue
+            try:
+                config = json.loads(self.path.read_text(encoding="utf-8"))
+            except (OSError, json.JSONDecodeError) as e:
+                # Caught mid-write, read again on the next check
+                logger.debug(f"Could not read the config file yet: {e}")
+                continue
+            last_mtime = mtime
+            try:
+                await self.on_change(config)
+            except Exception:
+                logger.exception("Failed to apply the changed config")
+
+    async def aclose(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
@@ -1,158 +1,185 @@
 import asyncio
-import json
 import logging
 import os
 import sys
-from typing import Any, Dict
+from pathlib import Path
+from typing import Any, Dict, Optional
 
 from livekit import agents
-from livekit.agents import Agent, AgentSession, RoomInputOptions
-from livekit.plugins import cartesia, deepgram, noise_cancellation, openai, silero
-
-from ctsm.prompt import BASE_PROMPT
-from src.ctsm.mcp.agent_tools import MCPToolsIntegration
+from livekit.agents import RoomInputOptions
+
+from src.ctsm.config import (
+    CONFIG_FD_ENV,
+    CONFIG_FILE_ENV,
+    ConfigFileWatcher,
+    ConfigReloader,
+    describe_config,
+    read_config,
+    server_key,
+)
 from src.ctsm.mcp.context import get_context
-from src.ctsm.mcp.util import MCPServerConfig, get_mcps_from_config
+from src.ctsm.mcp.tracing import configure_file_tracing
+from src.ctsm.mcp.util import get_mcps_from_config
+from src.ctsm.model_registry import ModelUsage, load_noise_cancellation, load_vad, prewarm, registry
+from src.ctsm.session import (
+    DEFAULT_SYSTEM_PROMPT,
+    assemble_instructions,
+    attach_mcp_tools,
+    create_agent,
+    create_voice_session,
+    greeting_instructions,
+    mcp_pool_config,
+    mcp_server_configs,
+)
+from src.ctsm.startup import StartupTimer, import_plugins
+from src.ctsm.turn_metrics import TurnLatencyTracker
 
 logger = logging.getLogger(__name__)
 
-# Store original argv globally so load_config_from_args can access it
+# Store original argv globally so load_config can access it
 _original_argv = None
 
+# Created when the executable starts, so the startup phases include the imports
+_startup_timer: Optional[StartupTimer] = None
 
-def load_config_from_args() -> Dict[str, Any]:
-    """Load configuration from command line arguments passed by Electron."""
-    global _original_argv
-    argv_to_search = _original_argv if _original_argv else sys.argv
 
-    # Find the config JSON in arguments (skip 'console' command)
-    config_json = None
-    for arg in argv_to_search[1:]:
-        if arg != "console" and arg.startswith("{"):
-            config_json = arg
-            break
+def load_config() -> Dict[str, Any]:
+    """Load the configuration Electron passed in a file, a pipe or, from older launchers, an argument."""
+    config = read_config(_original_argv if _original_argv else sys.argv)
+    if config is None:
+        raise ValueError(f"Configuration required in {CONFIG_FILE_ENV}, {CONFIG_FD_ENV} or as argument")
+    return config
 
-    if not config_json:
-        raise ValueError("Configuration JSON required as argument")
 
+def load_config_or_env() -> Dict[str, Any]:
+    """The Electron config, or API keys from the environment if Electron passed none."""
     try:
-        return json.loads(config_json)
-    except json.JSONDecodeError as e:
-        logger.error(f"Invalid configuration JSON: {e}")
-        raise
-
-
-async def entrypoint(ctx: agents.JobContext):
-    # Load configuration from Electron
-    try:
-        electron_config = load_config_from_args()
-        logger.info(f"Loaded configuration from Electron: {electron_config.get('userContext', {}).get('name', 'Unknown')}")
-        logger.info(f"Loaded configuration from Electron: {electron_config}")
+        electron_config = load_config()
+        logger.info(f"Loaded configuration from Electron: {describe_config(electron_config)}")
+        return electron_config
     except Exception as e:
         logger.error(f"Failed to load configuration: {e}")
         # Fallback to environment variables
-        electron_config = {
+        return {
             "secrets": {
                 "openaiApiKey": os.environ.get("OPENAI_API_KEY", ""),
                 "deepgramApiKey": os.environ.get("DEEPGRAM_API_KEY", ""),
                 "cartesiaApiKey": os.environ.get("CARTESIA_API_KEY", ""),
                 "aciApiKey": os.environ.get("ACI_API_KEY", ""),
             },
-            "systemPrompt": "You are a helpful voice AI assistant.",
+            "systemPrompt": DEFAULT_SYSTEM_PROMPT,
             "mcpServers": [],
             "userContext": {"name": "", "preferences": "", "additionalInfo": ""},
         }
 
+
+async def entrypoint(ctx: agents.JobContext):
+    startup_timer = _startup_timer or StartupTimer()
+    startup_timer.mark("entrypoint")
+
+    # The models come from the process registry, loaded by prewarm() before the first job;
+    # if they are not there yet, the VAD loads in a thread while the MCP servers start
+    models = ctx.proc.userdata.get("models", registry)
+    model_usage = ModelUsage()
+    vad_loading = asyncio.create_task(asyncio.to_thread(models.get, "vad", load_vad, model_usage))
+
+    electron_config = load_config_or_env()
+
+    # Optional offline tracing of MCP startup and tool calls, written as OTLP JSON
+    trace_file = electron_config.get("traceFile") or os.environ.get("CTSM_TRACE_FILE")
+    if trace_file:
+        tracer_provider = configure_file_tracing(Path(trace_file))
+
+        async def flush_traces():
+            tracer_provider.shutdown()
+
+        ctx.add_shutdown_callback(flush_traces)
+
+    metrics_dir = electron_config.get("metricsDir")
+    if metrics_dir:
+        startup_timer.directory = Path(metrics_dir)
+    startup_timer.mark("config")
+
     # Get user context
     context = await get_context()
-
-    # Build enhanced context with user info
-    user_context_parts = []
-    if electron_config.get("userContext", {}).get("name"):
-        user_context_parts.append(f"User name: {electron_config['userContext']['name']}")
-    if electron_config.get("userContext", {}).get("preferences"):
-        user_context_parts.append(f"User preferences: {electron_config['userContext']['preferences']}")
-    if electron_config.get("userContext", {}).get("additionalInfo"):
-        user_context_parts.append(f"Additional context: {electron_config['userContext']['additionalInfo']}")
-
-    user_context_str = "\n".join(user_context_parts)
-    full_context = f"{context}\n\n{user_context_str}" if user_context_str else context
-
-    # Create system prompt with context
-    system_prompt = electron_config.get("systemPrompt", "You are a helpful voice AI assistant.")
-    prompt_with_context = f"{BASE_PROMPT}\n\n{system_prompt}\n\nUser context: {full_context}"
-
-    # Create MCP server configurations from Electron config
-    mcp_server_configs = []
-    for server in electron_config.get("mcpServers", []):
-        # Handle ACI server specially to inject API key
-        if "aci-mcp" in " ".join(server.get("args", [])):
-            # Replace the ACI_API_KEY placeholder in the command
-            args = []
-            for arg in server.get("args", []):
-                if "$ACI_API_KEY" in arg:
-                    arg = arg.replace("$ACI_API_KEY", electron_config["secrets"]["aciApiKey"])
-                args.append(arg)
-            server["args"] = args
-
-        mcp_server_configs.append(MCPServerConfig(command=server["command"], args=server["args"], name=server["name"]))
-
-    # Create MCP servers
-    mcp_servers = get_mcps_from_config(mcp_server_configs)
-    await asyncio.sleep(0.5)
-
-    class Assistant(Agent):
-        def __init__(self) -> None:
-            super().__init__(instructions=prompt_with_context)
-
-    agent = await MCPToolsIntegration.create_agent_with_tools(
-        agent_class=Assistant,
-        mcp_servers=mcp_servers,
-    )
+    assembled = assemble_instructions(electron_config, context)
+    instructions = assembled.text
+
+    # Create MCP servers from the Electron config
+    server_configs = mcp_server_configs(electron_config)
+    mcp_servers = get_mcps_from_config(server_configs, pool_config=mcp_pool_config(electron_config))
+
+    # Start all servers in parallel; only the required ones delay the greeting
+    agent = create_agent(electron_config, instructions)
+    ctx.add_shutdown_callback(agent.aclose)
+    mcp_tools = await attach_mcp_tools(agent, electron_config, server_configs, mcp_servers)
+    ctx.add_shutdown_callback(mcp_tools.aclose)
+    startup_timer.mark("mcp_ready")
+
+    # Changes Electron writes to the config file are applied to the running session
+    config_file = os.environ.get(CONFIG_FILE_ENV)
+    if config_file:
+        servers = {server_key(config): server for config, server in zip(server_configs, mcp_servers, strict=True)}
+        reloader = ConfigReloader(electron_config, agent, mcp_tools, servers, context)
+
+        async def reload_config(new_config: Dict[str, Any]) -> None:
+            diff = await reloader.apply(new_config)
+            if diff.restart_required:
+                logger.warning(f"Changes to {diff.restart_keys} apply when the agent is started again")
+
+        config_watcher = ConfigFileWatcher(Path(config_file), reload_config)
+        config_watcher.start()
+        ctx.add_shutdown_callback(config_watcher.aclose)
 
     # Create session with API keys from Electron
-    session = AgentSession(
-        turn_detection="vad",
-        stt=deepgram.STT(
-            model="nova-3",
-            language="en",
-            api_key=electron_config["secrets"].get("deepgramApiKey", "NOT_SET"),
-        ),
-        llm=openai.LLM(
-            model="gpt-4o",  # Changed from gpt-5 to available model
-            api_key=electron_config["secrets"].get("openaiApiKey", "NOT_SET"),
-        ),
-        tts=cartesia.TTS(
-            model="sonic-2",
-            language="en",
-            api_key=electron_config["secrets"].get("cartesiaApiKey", "NOT_SET"),
-        ),
-        vad=silero.VAD.load(),
-        preemptive_generation=True,
-        max_tool_steps=5,
-        use_tts_aligned_transcript=True,
-    )
+    session = create_voice_session(electron_config, await vad_loading)
+    startup_timer.mark("vad_loaded")
+    noise_filter = models.get("noise_cancellation", load_noise_cancellation, model_usage)
+    models.record_job(model_usage, Path(metrics_dir) if metrics_dir else None)
 
-    logger.info(f"System prompt: {prompt_with_context}...")
-    logger.info(f"Full context: {full_context}...")
+    # Per-turn latency breakdown: VAD end, STT final, LLM first token, tool calls, TTS first audio
+    turn_tracker = TurnLatencyTracker(Path(metrics_dir) if metrics_dir else None)
+    turn_tracker.attach(session)
+    ctx.add_shutdown_callback(turn_tracker.aclose)
+
+    logger.info(f"Agent {assembled.describe()}")
     await session.start(
         room=ctx.room,
         agent=agent,
         room_input_options=RoomInputOptions(
-            noise_cancellation=noise_cancellation.BVC(),
+            noise_cancellation=noise_filter,
         ),
     )
+    startup_timer.mark("session_started")
+    startup_timer.attach(session)
 
     # Generate greeting with user name if available
-    user_name = electron_config.get("userContext", {}).get("name", "")
-    greeting_instruction = f"Greet the user{f' by name ({user_name})' if user_name else ''} and ask how you can help."
-    await session.generate_reply(instructions=greeting_instruction)
+    await session.generate_reply(instructions=greeting_instructions(electron_config))
 
 
 if __name__ == "__main__":
+    # The packaged executable doubles as the MCP server pool host
+    if len(sys.argv) > 1 and sys.argv[1] == "mcp-pool":
+        from src.ctsm.mcp.pool import main as run_pool_host
+
+        run_pool_host(sys.argv[2:])
+        sys.exit(0)
+
+    # Resident mode: one warm process runs session after session, driven by Electron over stdin
+    if len(sys.argv) > 1 and sys.argv[1] == "host":
+        from src.ctsm.host import main as run_agent_host
+
+        run_agent_host(sys.argv[2:])
+        sys.exit(0)
+
     # Store original argv globally
     _original_argv = sys.argv.copy()
 
+    # The pool host above never needs the plugins, so they are only imported for the agent
+    _startup_timer = StartupTimer()
+    import_plugins()
+    _startup_timer.mark("imports")
+
     # Filter out the config JSON from sys.argv before passing to agents CLI
     filtered_argv = [arg for arg in sys.argv if not (arg.startswith("{") and arg.endswith("}"))]
     sys.argv = filtered_argv
@@ -161,6 +188,6 @@ if __name__ == "__main__":
     os.environ["LIVEKIT_CONSOLE_DISABLE_STDIN"] = "1"
 
     try:
-        agents.cli.run_app(agents.WorkerOptions(entrypoint_fnc=entrypoint))
+        agents.cli.run_app(agents.WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm))
     finally:
         sys.argv = _original_argv
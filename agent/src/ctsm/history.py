@@ -0,0 +1,236 @@
+import asyncio
+import contextvars
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from livekit.agents import llm
+from pydantic import BaseModel
+
+from src.ctsm.mcp.schema import count_tokens, trim_text
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PROMPT = (
+    "You maintain the memory of a voice assistant's conversation. Merge the earlier summary and the new "
+    "part of the conversation into one summary of at most {words} words. Keep names, facts about the user, "
+    "decisions, results the assistant reported and requests that are still open. Leave out small talk. "
+    "Reply with the summary only."
+)
+# Bytes of a tool output the summarizer sees
+SUMMARY_TOOL_OUTPUT_BYTES = 600
+
+
+class HistoryConfig(BaseModel):
+    # Whether the chat history sent to the LLM is compacted
+    enabled: bool = True
+    # Turns, counted from the user's messages, sent verbatim
+    keep_turns: int = 6
+    # Estimated token ceiling of the history sent with each request, the instructions included
+    max_tokens: int = 4000
+    # Whether turns older than keep_turns are summarized in the background
+    summarize: bool = True
+    # Token budget of the summary
+    summary_tokens: int = 300
+
+
+def item_tokens(item: llm.ChatItem) -> int:
+    """Estimated tokens of a chat item, as the LLM sees it."""
+    if item.type == "message":
+        return count_tokens(item.text_content or "")
+    if item.type == "function_call":
+        return count_tokens(item.name) + count_tokens(item.arguments or "")
+    if item.type == "function_call_output":
+        return count_tokens(item.output or "")
+    return 0
+
+
+def _stub(item: llm.FunctionCallOutput) -> llm.FunctionCallOutput:
+    text = f"[Output of {item.name} removed from the history, call the tool again if it is needed]"
+    return item.model_copy(update={"output": text})
+
+
+def _stub_outputs(turn: List[llm.ChatItem]) -> Tuple[List[llm.ChatItem], int]:
+    """The turn with its tool outputs stubbed, and the number of outputs stubbed."""
+    stubbed = [_stub(item) if item.type == "function_call_output" else item for item in turn]
+    return stubbed, sum(1 for item in turn if item.type == "function_call_output")
+
+
+def _split_turns(items: List[llm.ChatItem]) -> Tuple[List[llm.ChatItem], List[List[llm.ChatItem]]]:
+    """Splits a history into its system messages and its turns, each starting at a user message."""
+    pinned: List[llm.ChatItem] = []
+    turns: List[List[llm.ChatItem]] = [[]]
+    for item in items:
+        if item.type == "message" and item.role in ("system", "developer"):
+            pinned.append(item)
+            continue
+        if item.type == "message" and item.role == "user" and turns[-1]:
+            turns.append([])
+        turns[-1].append(item)
+    return pinned, [turn for turn in turns if turn]
+
+
+class HistoryManager:
+    """
+    Keeps the chat history sent to the LLM at a flat size over long sessions.
+
+    The last keep_turns turns go out verbatim. Older turns are replaced by a summary once the
+    background summarizer has covered them; until then they keep their messages and tool calls,
+    but their tool outputs become short stubs. If the history is still above max_tokens, the oldest
+    unsummarized turns are dropped and then the tool outputs of the kept turns, all but the current
+    one, are stubbed. The agent's own chat context is left complete, only the copy each request is
+    sent with is compacted, so the summarizer can always read the turns it has not covered yet.
+    """
+
+    def __init__(self, config: HistoryConfig):
+        self.config = config
+        self._summary: Optional[str] = None
+        # Id of the last item the summary covers
+        self._summarized_id: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self.requests = 0
+        self.tokens_before = 0
+        self.tokens_after = 0
+        self.stubbed_outputs = 0
+        self.dropped_turns = 0
+        self.summaries = 0
+        self.summary_failures = 0
+
+    @property
+    def summary(self) -> Optional[str]:
+        """The summary of the turns that left the window, if one was written."""
+        return self._summary
+
+    def compact(self, chat_ctx: llm.ChatContext, llm_engine: Any = None) -> llm.ChatContext:
+        """
+        Returns the compacted history for a request, and starts summarizing old turns if needed.
+
+        Args:
+            chat_ctx: The chat context of the request, not modified
+            llm_engine: The LLM the summaries are written with; without one old turns are only stubbed and dropped
+
+        Returns:
+            The chat context to send
+        """
+        if not self.config.enabled:
+            return chat_ctx
+
+        items = list(chat_ctx.items)
+        # System messages, like the instructions, stay where they are
+        pinned, turns = _split_turns(items)
+        keep = max(self.config.keep_turns, 1)
+        summary, unsummarized = self._summarized(turns[:-keep])
+        recent = turns[-keep:]
+
+        old, stubbed = [], 0
+        for turn in unsummarized:
+            stubbed_turn, count = _stub_outputs(turn)
+            old.append(stubbed_turn)
+            stubbed += count
+
+        # Tokens are counted once per item and subtracted as turns are dropped
+        before = sum(item_tokens(item) for item in items)
+        old_tokens = [sum(item_tokens(item) for item in turn) for turn in old]
+        recent_tokens = [sum(item_tokens(item) for item in turn) for turn in recent]
+        after = sum(item_tokens(item) for item in pinned) + (item_tokens(summary) if summary else 0)
+        after += sum(old_tokens) + sum(recent_tokens)
+
+        dropped = 0
+        while dropped < len(old) and after > self.config.max_tokens:
+            after -= old_tokens[dropped]
+            dropped += 1
+        old = old[dropped:]
+        if after > self.config.max_tokens:
+            for index in range(len(recent) - 1):
+                recent[index], count = _stub_outputs(recent[index])
+                stubbed += count
+                after += sum(item_tokens(item) for item in recent[index]) - recent_tokens[index]
+
+        self.requests += 1
+        self.tokens_before += before
+        self.tokens_after += after
+        self.stubbed_outputs += stubbed
+        self.dropped_turns += dropped
+        if after < before:
+            logger.debug(f"Compacted the history from {before} to {after} tokens")
+
+        if unsummarized and self.config.summarize and isinstance(llm_engine, llm.LLM) and self._task is None:
+            self._start_summary(llm_engine, [item for turn in unsummarized for item in turn])
+
+        compacted = pinned + ([summary] if summary else []) + [item for turn in old + recent for item in turn]
+        return llm.ChatContext(compacted)
+
+    def _summarized(self, old: List[List[llm.ChatItem]]) -> Tuple[Optional[llm.ChatMessage], List[List[llm.ChatItem]]]:
+        """The summary message, if the summary covers some of the old turns, and the old turns it does not cover."""
+        if self._summary is None:
+            return None, old
+        ids = [item.id for turn in old for item in turn]
+        if self._summarized_id not in ids:
+            return None, old
+        # Whole turns are summarized, the summary ends at a turn boundary
+        covered = ids.index(self._summarized_id) + 1
+        start = 0
+        while start < len(old) and covered >= len(old[start]):
+            covered -= len(old[start])
+            start += 1
+        summary = llm.ChatMessage(role="system", content=[f"Summary of the earlier conversation:\n{self._summary}"])
+        return summary, old[start:]
+
+    def _start_summary(self, llm_engine: llm.LLM, items: List[llm.ChatItem]) -> None:
+        # A fresh context keeps the reply's speech id off the summary's LLM metrics
+        self._task = asyncio.get_running_loop().create_task(
+            self._summarize(llm_engine, items), name="history-summary", context=contextvars.Context()
+        )
+        self._task.add_done_callback(self._summary_done)
+
+    def _summary_done(self, task: asyncio.Task) -> None:
+        self._task = None
+        if not task.cancelled() and task.exception() is not None:
+            self.summary_failures += 1
+            logger.warning(f"Could not summarize the earlier conversation: {task.exception()}")
+
+    async def _summarize(self, llm_engine: llm.LLM, items: List[llm.ChatItem]) -> None:
+        lines = []
+        for item in items:
+            if item.type == "message" and item.text_content:
+                lines.append(f"{item.role.capitalize()}: {item.text_content}")
+            elif item.type == "function_call":
+                lines.append(f"Assistant called {item.name}({item.arguments})")
+            elif item.type == "function_call_output":
+                lines.append(f"{item.name} returned: {trim_text(item.output or '', SUMMARY_TOOL_OUTPUT_BYTES // 4)}")
+        prompt = f"Earlier summary:\n{self._summary or '(none)'}\n\nNew part of the conversation:\n" + "\n".join(lines)
+
+        chat_ctx = llm.ChatContext.empty()
+        chat_ctx.add_message(role="system", content=SUMMARY_PROMPT.format(words=self.config.summary_tokens * 3 // 4))
+        chat_ctx.add_message(role="user", content=prompt)
+        parts = []
+        async with llm_engine.chat(chat_ctx=chat_ctx) as stream:
+            async for chunk in stream:
+                if chunk.delta is not None and chunk.delta.content:
+                    parts.append(chunk.delta.content)
+        summary = "".join(parts).strip()
+        if not summary:
+            raise ValueError("the LLM returned an empty summary")
+
+        self._summary = trim_text(summary, self.config.summary_tokens)
+        self._summarized_id = items[-1].id
+        self.summaries += 1
+        logger.info(f"Summarized {len(items)} history items into {count_tokens(self._summary)} tokens")
+
+    async def aclose(self) -> None:
+        """Cancels a summary still being written."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Average history tokens per request before and after compaction, and the work done to keep it there."""
+        return {
+            "requests": self.requests,
+            "average_tokens_before": round(self.tokens_before / self.requests) if self.requests else 0,
+            "average_tokens_after": round(self.tokens_after / self.requests) if self.requests else 0,
+            "stubbed_outputs": self.stubbed_outputs,
+            "dropped_turns": self.dropped_turns,
+            "summaries": self.summaries,
+            "summary_failures": self.summary_failures,
+        }
@@ -0,0 +1,316 @@
+"""
+Resident agent host: one warm process that runs conversation after conversation.
+
+Electron starts the packaged executable once with the ``host`` command and drives it with one
+JSON command per line on stdin:
+
+    {"command": "config", "config": {...}}    store the config and connect its MCP servers ahead of time,
+                                              or apply it to the running session
+    {"command": "start", "config": {...}}     start a session, with a new config if one is given
+    {"command": "stop"}                       end the running session
+    {"command": "shutdown"}                   end the session and exit
+
+The host answers with one JSON event per line on stdout (ready, started, reloaded, stopped, error). The
+plugins, the VAD model, the HTTP connection pool and the connected MCP servers are kept between
+sessions, so starting a session only creates the agent and the AgentSession. A config sent while a
+session runs is applied in place where possible: new instructions go to the running agent and only
+added or removed MCP servers are started or stopped.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from livekit.agents import AgentSession, vad
+from livekit.agents.utils import http_context
+from livekit.agents.voice.chat_cli import ChatCLI
+from opentelemetry.sdk.trace import TracerProvider
+
+from src.ctsm.config import ConfigDiff, ConfigReloader, server_key
+from src.ctsm.mcp.agent_tools import MCPToolRegistry
+from src.ctsm.mcp.context import get_context
+from src.ctsm.mcp.pool import MCPPoolConfig
+from src.ctsm.mcp.server import MCPServer
+from src.ctsm.mcp.tracing import configure_file_tracing
+from src.ctsm.mcp.util import MCPServerConfig, get_mcps_from_config
+from src.ctsm.model_registry import ModelUsage, load_vad, registry
+from src.ctsm.session import (
+    Assistant,
+    assemble_instructions,
+    attach_mcp_tools,
+    create_agent,
+    create_voice_session,
+    greeting_instructions,
+    mcp_pool_config,
+    mcp_server_configs,
+)
+from src.ctsm.startup import StartupTimer, import_plugins
+from src.ctsm.turn_metrics import TurnLatencyTracker
+
+logger = logging.getLogger(__name__)
+
+
+class ConsoleAudio(ChatCLI):
+    """
+    The local microphone and speaker of the console mode, for a session started by the host.
+
+    ChatCLI's terminal interface is left out: it reads keys from stdin, which carries the host commands.
+    """
+
+    async def _main_task(self) -> None:
+        await self._done_fut
+        self._update_microphone(enable=False)
+        self._update_speaker(enable=False)
+
+    async def aclose(self) -> None:
+        """Closes the audio streams."""
+        if not self._done_fut.done():
+            self._done_fut.set_result(None)
+        if self._main_atask is not None:
+            await self._main_atask
+
+
+class AgentHost:
+    """Runs one session at a time on models and MCP servers that stay loaded between sessions."""
+
+    def __init__(self):
+        self.config: Optional[Dict[str, Any]] = None
+        self.vad: Optional[vad.VAD] = None
+        # Connected servers by server_key(), kept while a config uses them
+        self._servers: Dict[str, MCPServer] = {}
+        self._session: Optional[AgentSession] = None
+        self._console: Optional[ConsoleAudio] = None
+        self._agent: Optional[Assistant] = None
+        self._mcp_tools: Optional[MCPToolRegistry] = None
+        self._turn_tracker: Optional[TurnLatencyTracker] = None
+        self._reloader: Optional[ConfigReloader] = None
+        # The global tracer provider can only be set once, so all sessions write to the first trace file
+        self._tracer_provider: Optional[TracerProvider] = None
+        self._lock = asyncio.Lock()
+        self._background_tasks: set[asyncio.Task] = set()
+
+    @staticmethod
+    def emit(event: str, **fields: Any) -> None:
+        """Writes an event for Electron to stdout."""
+        sys.stdout.write(json.dumps({"event": event, **fields}) + "\n")
+        sys.stdout.flush()
+
+    async def warm_up(self) -> None:
+        """Loads the VAD model once for all sessions."""
+        self.vad = await asyncio.to_thread(registry.get, "vad", load_vad)
+
+    def _servers_for(self, configs: List[MCPServerConfig], pool_config: MCPPoolConfig) -> List[MCPServer]:
+        """The servers of a config: connected ones are reused, new ones created, unused ones shut down."""
+        servers: Dict[str, MCPServer] = {}
+        for config in configs:
+            key = server_key(config)
+            servers[key] = self._servers.pop(key, None) or get_mcps_from_config([config], pool_config=pool_config)[0]
+        for server in self._servers.values():
+            logger.info(f"MCP server {server.name} is no longer configured, shutting it down")
+            self._track(asyncio.create_task(server.cleanup()))
+        self._servers = servers
+        return list(servers.values())
+
+    def _configure_tracing(self, config: Dict[str, Any]) -> None:
+        """Starts the optional offline tracing of MCP startup and tool calls, once per host process."""
+        trace_file = config.get("traceFile") or os.environ.get("CTSM_TRACE_FILE")
+        if trace_file and self._tracer_provider is None:
+            self._tracer_provider = configure_file_tracing(Path(trace_file))
+
+    async def prepare(self, config: Dict[str, Any]) -> None:
+        """Stores the config for the next session and connects its MCP servers in the background."""
+        async with self._lock:
+            self._prepare(config)
+
+    def _prepare(self, config: Dict[str, Any]) -> None:
+        self._configure_tracing(config)
+        self.config = config
+        for server in self._servers_for(mcp_server_configs(config), mcp_pool_config(config)):
+            self._track(asyncio.create_task(self._preconnect(server)))
+
+    @staticmethod
+    async def _preconnect(server: MCPServer) -> None:
+        try:
+            await server.connect()
+        except Exception as e:
+            # The session retries when it starts and reports the failure there
+            logger.warning(f"Could not connect to MCP server {server.name} ahead of time: {e}")
+
+    async def start(self, config: Optional[Dict[str, Any]] = None) -> None:
+        """Starts a session, replacing the running one."""
+        async with self._lock:
+            await self._start(config)
+
+    async def _start(self, config: Optional[Dict[str, Any]]) -> None:
+        # Electron keeps its session state when one session replaces another
+        await self._stop(emit=False)
+        if config is not None:
+            self.config = config
+        if self.config is None:
+            raise ValueError("No configuration, send a config command first")
+        if self.vad is None:
+            await self.warm_up()
+        electron_config = self.config
+        self._configure_tracing(electron_config)
+        model_usage = ModelUsage()
+        vad_engine = registry.get("vad", load_vad, model_usage)
+
+        metrics_dir = Path(electron_config["metricsDir"]) if electron_config.get("metricsDir") else None
+        startup_timer = StartupTimer(started_at=time.time(), directory=metrics_dir)
+
+        try:
+            context = await get_context()
+            server_configs = mcp_server_configs(electron_config)
+            mcp_servers = self._servers_for(server_configs, mcp_pool_config(electron_config))
+            assembled = assemble_instructions(electron_config, context)
+            logger.info(f"Agent {assembled.describe()}")
+            agent = self._agent = create_agent(electron_config, assembled.text)
+            self._mcp_tools = await attach_mcp_tools(agent, electron_config, server_configs, mcp_servers)
+            self._reloader = ConfigReloader(electron_config, agent, self._mcp_tools, self._servers, context)
+            startup_timer.mark("mcp_ready")
+
+            session = self._session = create_voice_session(electron_config, vad_engine)
+            registry.record_job(model_usage, metrics_dir)
+            self._turn_tracker = TurnLatencyTracker(metrics_dir)
+            self._turn_tracker.attach(session)
+
+            self._console = ConsoleAudio(session)
+            await self._console.start()
+            await session.start(agent)
+        except Exception:
+            await self._stop()
+            raise
+
+        def on_close(_) -> None:
+            # The session ended on its own, e.g. after an unrecoverable error
+            if self._session is session:
+                self._track(asyncio.create_task(self.stop()))
+
+        session.on("close", on_close)
+        startup_timer.mark("session_started")
+        startup_timer.attach(session)
+
+        session.generate_reply(instructions=greeting_instructions(electron_config))
+        self.emit("started", seconds=startup_timer.phases["session_started"])
+
+    async def reload(self, config: Dict[str, Any]) -> None:
+        """
+        Applies a changed config to the running session, or keeps it for the next one.
+
+        Changes to the instructions and the MCP servers are applied in place. Anything else, like new
+        API keys, starts a new session on the same models and on the servers that did not change.
+        """
+        async with self._lock:
+            if self._reloader is None:
+                # No session running
+                self._prepare(config)
+                return
+            diff = ConfigDiff(self._reloader.config, config)
+            if not diff.restart_required:
+                await self._reloader.apply(config)
+                self.config = config
+                self.emit("reloaded", restarted=False, **diff.summary())
+                return
+            await self._start(config)
+            self.emit("reloaded", restarted=True, **diff.summary())
+
+    async def stop(self) -> None:
+        """Ends the running session; models and MCP servers stay loaded."""
+        async with self._lock:
+            await self._stop()
+
+    async def _stop(self, emit: bool = True) -> None:
+        if self._session is None and self._agent is None and self._mcp_tools is None:
+            return
+        session, self._session = self._session, None
+        self._reloader = None
+        if session is not None:
+            await session.aclose()
+        if self._console is not None:
+            await self._console.aclose()
+            self._console = None
+        if self._mcp_tools is not None:
+            await self._mcp_tools.aclose()
+            self._mcp_tools = None
+        if self._agent is not None:
+            await self._agent.aclose()
+            self._agent = None
+        if self._turn_tracker is not None:
+            await self._turn_tracker.aclose()
+            self._turn_tracker = None
+        if emit:
+            self.emit("stopped")
+
+    async def aclose(self) -> None:
+        """Ends the session and shuts down the MCP servers."""
+        await self.stop()
+        for task in list(self._background_tasks):
+            task.cancel()
+        await asyncio.gather(*self._background_tasks, return_exceptions=True)
+        await asyncio.gather(*(server.cleanup() for server in self._servers.values()), return_exceptions=True)
+        self._servers.clear()
+        if self._tracer_provider is not None:
+            # Flushes the spans still batched
+            self._tracer_provider.shutdown()
+            self._tracer_provider = None
+
+    def _track(self, task: asyncio.Task) -> None:
+        """Keeps a reference to a background task until it finishes."""
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def handle(self, message: Dict[str, Any]) -> bool:
+        """Runs one command. Returns False once the host should exit."""
+        command = message.get("command")
+        if command == "config":
+            await self.reload(message["config"])
+        elif command == "start":
+            await self.start(message.get("config"))
+        elif command == "stop":
+            await self.stop()
+        elif command == "shutdown":
+            return False
+        else:
+            raise ValueError(f"Unknown command: {command}")
+        return True
+
+    async def serve(self) -> None:
+        """Reads commands from stdin until shutdown or end of input."""
+        # Plugins share one HTTP session, so connections to the providers stay open between sessions
+        http_context._new_session_ctx()
+        try:
+            await self.warm_up()
+            self.emit("ready")
+            while True:
+                # A thread works on every platform, unlike pipe transports on Windows
+                line = await asyncio.to_thread(sys.stdin.readline)
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    if not await self.handle(json.loads(line)):
+                        break
+                except Exception as e:
+                    logger.exception("Host command failed")
+                    self.emit("error", message=str(e))
+        finally:
+            await self.aclose()
+            await http_context._close_http_ctx()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Resident agent host driven over stdin")
+    parser.add_argument("--log-level", default="INFO", help="Logging level")
+    args = parser.parse_args(argv)
+
+    # Logs go to stderr, stdout carries the events
+    logging.basicConfig(level=args.log_level, stream=sys.stderr)
+    import_plugins()
+    asyncio.run(AgentHost().serve())
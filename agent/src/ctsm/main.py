@@ -1,4 +1,3 @@
-import asyncio
 import logging
 import os
 import subprocess
@@ -67,7 +66,6 @@ async def entrypoint(ctx: agents.JobContext):
 
     # Create MCP servers from config
     mcp_servers = get_mcps_from_config(configuration.servers)
-    await asyncio.sleep(0.5)
 
     class Assistant(Agent):
         def __init__(self) -> None:
@@ -1,19 +1,22 @@
 import asyncio
+import dataclasses
 import inspect
 import json
 import logging
 import typing
-from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, Type, Union, cast
-from uuid import uuid4
+from typing import Any, Callable, Dict, List, Optional, Sequence
 
-from livekit.agents import AgentSession, ChatContext, JobContext
-from livekit.agents import FunctionTool as Tool
-from mcp import CallToolRequest
+from mcp.types import Tool as MCPTool
 
-from .server import MCPServer, MCPServerSse
+from .prefetch import PrefetchConfig, Prefetcher
+from .result_cache import ToolResultCache
+from .server import MCPServer
+from .single_flight import SingleFlight
+from .tool_cache import CachedToolList, ToolListCache
+from .tracing import tracer
 
 # Import from the MCP module
-from .util import FunctionTool, MCPUtil
+from .util import FunctionTool, MCPUtil, ToolPolicies
 
 logger = logging.getLogger("mcp-agent-tools")
 
@@ -38,38 +41,86 @@ class MCPToolsIntegration:
         Returns:
             List of decorated tool functions ready to be added to a LiveKit agent
         """
-        prepared_tools = []
-
         # Ensure all servers are connected if auto_connect is True
         if auto_connect:
-            for server in mcp_servers:
-                if not getattr(server, 'connected', False):
-                    try:
-                        logger.debug(f"Auto-connecting to MCP server: {server.name}")
-                        await server.connect()
-                    except Exception as e:
-                        logger.error(f"Failed to connect to MCP server {server.name}: {e}")
-
-        # Process each server
-        for server in mcp_servers:
-            logger.info(f"Fetching tools from MCP server: {server.name}")
+            await asyncio.gather(*(MCPToolsIntegration._connect_server(server) for server in mcp_servers))
+
+        # Fetch tools from every server concurrently, keeping the server order in the result
+        results = await asyncio.gather(
+            *(MCPToolsIntegration._prepare_server_tools(server, convert_schemas_to_strict) for server in mcp_servers)
+        )
+        return [tool for server_tools in results for tool in server_tools]
+
+    @staticmethod
+    async def _connect_server(server: MCPServer, timeout: Optional[float] = None) -> bool:
+        """
+        Connects to a single MCP server, giving up after the timeout.
+
+        Args:
+            server: The MCPServer instance to connect
+            timeout: Seconds to wait for the connection, or None to wait indefinitely
+
+        Returns:
+            True if the server is connected, False otherwise
+        """
+        if getattr(server, 'session', None) is not None:
+            return True
+        try:
+            logger.debug(f"Connecting to MCP server: {server.name}")
+            await asyncio.wait_for(server.connect(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            logger.error(f"Timed out after {timeout}s connecting to MCP server {server.name}")
+            await server.cleanup()
+        except Exception as e:
+            logger.error(f"Failed to connect to MCP server {server.name}: {e}")
+        return False
+
+    @staticmethod
+    async def _prepare_server_tools(server: MCPServer, convert_schemas_to_strict: bool,
+                                    result_cache: Optional[ToolResultCache] = None) -> List[Callable]:
+        """
+        Fetches the tools of a single connected MCP server and decorates them for LiveKit.
+
+        Args:
+            server: The connected MCPServer instance
+            convert_schemas_to_strict: Whether to convert JSON schemas to strict format
+            result_cache: Cache for results of read-only tools
+
+        Returns:
+            List of decorated tool functions, empty if the tools could not be fetched
+        """
+        logger.info(f"Fetching tools from MCP server: {server.name}")
+        try:
+            mcp_tools = await MCPUtil.get_function_tools(
+                server, convert_schemas_to_strict=convert_schemas_to_strict, policies=ToolPolicies(result_cache=result_cache)
+            )
+            logger.info(f"Received {len(mcp_tools)} tools from {server.name}")
+        except Exception as e:
+            logger.error(f"Failed to fetch tools from {server.name}: {e}")
+            return []
+
+        return MCPToolsIntegration._decorate_tools(mcp_tools)
+
+    @staticmethod
+    def _decorate_tools(function_tools: List[FunctionTool]) -> List[Callable]:
+        """
+        Decorates FunctionTools for LiveKit, skipping the ones that fail.
+
+        Args:
+            function_tools: The FunctionTool instances to convert
+
+        Returns:
+            List of decorated tool functions
+        """
+        prepared_tools = []
+        for tool_instance in function_tools:
             try:
-                mcp_tools = await MCPUtil.get_function_tools(
-                    server, convert_schemas_to_strict=convert_schemas_to_strict
-                )
-                logger.info(f"Received {len(mcp_tools)} tools from {server.name}")
+                decorated_tool = MCPToolsIntegration._create_decorated_tool(tool_instance)
+                prepared_tools.append(decorated_tool)
+                logger.debug(f"Successfully prepared tool: {tool_instance.name}")
             except Exception as e:
-                logger.error(f"Failed to fetch tools from {server.name}: {e}")
-                continue
-
-            # Process each tool from this server
-            for tool_instance in mcp_tools:
-                try:
-                    decorated_tool = MCPToolsIntegration._create_decorated_tool(tool_instance)
-                    prepared_tools.append(decorated_tool)
-                    logger.debug(f"Successfully prepared tool: {tool_instance.name}")
-                except Exception as e:
-                    logger.error(f"Failed to prepare tool '{tool_instance.name}': {e}")
+                logger.error(f"Failed to prepare tool '{tool_instance.name}': {e}")
 
         return prepared_tools
 
@@ -120,9 +171,11 @@ class MCPToolsIntegration:
 
             async def tool_impl_raw(raw_arguments: dict[str, object], context: RunContext):
                 logger.info(f"Invoking tool '{tool.name}' with raw_arguments: {raw_arguments}")
-                input_json = json.dumps(raw_arguments)
-                result_str = await tool.on_invoke_tool(None, input_json)
-                logger.info(f"Tool '{tool.name}' result: {result_str}")
+                with tracer.start_as_current_span("json.dumps", attributes={"mcp.tool.name": tool.name}):
+                    input_json = json.dumps(raw_arguments)
+                result_str = await MCPToolsIntegration._invoke_interruptible(tool, input_json, context)
+                if result_str is not None:
+                    MCPToolsIntegration._log_result(tool.name, result_str)
                 return result_str
 
             tool_impl_raw.__name__ = tool.name
@@ -138,22 +191,69 @@ class MCPToolsIntegration:
             return function_tool(raw_schema=raw_schema)(tool_impl_raw)
         else:
             # For default mode, use the parameter-based signature
-            async def tool_impl(**kwargs):
-                input_json = json.dumps(kwargs)
+            from livekit.agents import RunContext
+
+            async def tool_impl(_run_context: RunContext, **kwargs):
+                with tracer.start_as_current_span("json.dumps", attributes={"mcp.tool.name": tool.name}):
+                    input_json = json.dumps(kwargs)
                 logger.info(f"Invoking tool '{tool.name}' with args: {kwargs}")
-                result_str = await tool.on_invoke_tool(None, input_json)
-                logger.info(f"Tool '{tool.name}' result: {result_str}")
+                result_str = await MCPToolsIntegration._invoke_interruptible(tool, input_json, _run_context)
+                if result_str is not None:
+                    MCPToolsIntegration._log_result(tool.name, result_str)
                 return result_str
 
+            # The RunContext is injected by LiveKit and left out of the schema given to the LLM
+            params.insert(0, inspect.Parameter(name="_run_context", kind=inspect.Parameter.POSITIONAL_OR_KEYWORD, annotation=RunContext))
+
             # Set function metadata for default mode
             tool_impl.__signature__ = inspect.Signature(parameters=params)
             tool_impl.__name__ = tool.name
             tool_impl.__doc__ = tool.description
-            tool_impl.__annotations__ = {'return': str, **annotations}
+            tool_impl.__annotations__ = {'return': str, '_run_context': RunContext, **annotations}
 
             logger.debug(f"Creating function tool '{tool.name}' with default schema generation")
             return function_tool()(tool_impl)
 
+    @staticmethod
+    async def _invoke_interruptible(tool: FunctionTool, input_json: str, context) -> Optional[str]:
+        """
+        Invokes a tool and cancels the call if the user interrupts the speech it belongs to.
+
+        Args:
+            tool: The FunctionTool to invoke
+            input_json: The tool arguments as JSON
+            context: The LiveKit RunContext of the call
+
+        Returns:
+            The tool result, or None if the call was interrupted
+        """
+        speech_handle = getattr(context, "speech_handle", None)
+        if speech_handle is None:
+            return await tool.on_invoke_tool(context, input_json)
+
+        call = asyncio.ensure_future(tool.on_invoke_tool(context, input_json))
+        try:
+            await speech_handle.wait_if_not_interrupted([call])
+        except asyncio.CancelledError:
+            call.cancel()
+            raise
+        if not call.done():
+            # Cancelling the call tells the server to stop working on it
+            logger.info(f"Cancelling tool '{tool.name}', the user interrupted the agent")
+            call.cancel()
+            await asyncio.gather(call, return_exceptions=True)
+            return None
+        return call.result()
+
+    @staticmethod
+    def _log_result(tool_name: str, result_str: str, preview_chars: int = 300) -> None:
+        """Logs a preview of a tool result; the full result only at debug level."""
+        if len(result_str) > preview_chars:
+            logger.info(f"Tool '{tool_name}' result ({len(result_str)} chars): {result_str[:preview_chars]}...")
+            logger.debug(f"Tool '{tool_name}' full result: {result_str}")
+        else:
+            logger.info(f"Tool '{tool_name}' result: {result_str}")
+
     @staticmethod
     async def register_with_agent(agent, mcp_servers: List[MCPServer],
                                  convert_schemas_to_strict: bool = True,
@@ -191,9 +291,55 @@ class MCPToolsIntegration:
 
         return tools
 
+    @staticmethod
+    async def attach_servers(agent, mcp_servers: List[MCPServer], *,
+                             convert_schemas_to_strict: bool = True,
+                             connect_timeout: Optional[float] = 20.0,
+                             required_servers: Optional[Sequence[str]] = None,
+                             min_ready_servers: int = 0,
+                             tool_cache: Optional[ToolListCache] = None,
+                             prefetch_config: Optional[PrefetchConfig] = None,
+                             policies: Optional[ToolPolicies] = None) -> "MCPToolRegistry":
+        """
+        Starts all MCP servers in parallel and registers their tools on an existing agent.
+
+        Returns once the minimum set of servers is ready. Servers that come up later add
+        their tools to the running agent in the background.
+
+        Args:
+            agent: The LiveKit agent instance
+            mcp_servers: List of MCP servers to start
+            convert_schemas_to_strict: Whether to convert JSON schemas to strict format
+            connect_timeout: Default connect timeout in seconds, used when a server has none of its own
+            required_servers: Names of the servers that must be ready (or have failed) before returning
+            min_ready_servers: Minimum number of servers that must be ready before returning
+            tool_cache: On-disk tool list cache; cached tools are registered before their server is up
+            prefetch_config: Follow-up calls to run in the background, needs a result cache
+            policies: The caches and policies the tools are invoked with
+
+        Returns:
+            The MCPToolRegistry tracking the agent's MCP tools
+        """
+        registry = MCPToolRegistry(
+            agent,
+            convert_schemas_to_strict=convert_schemas_to_strict,
+            tool_cache=tool_cache,
+            prefetch_config=prefetch_config,
+            policies=policies,
+        )
+        await registry.start_servers(
+            mcp_servers,
+            connect_timeout=connect_timeout,
+            required_servers=required_servers,
+            min_ready_servers=min_ready_servers,
+        )
+        return registry
+
     @staticmethod
     async def create_agent_with_tools(agent_class, mcp_servers: List[MCPServer], agent_kwargs: Dict = None,
-                                    convert_schemas_to_strict: bool = True) -> Any:
+                                    convert_schemas_to_strict: bool = True, *,
+                                    connect_timeout: Optional[float] = None,
+                                    min_ready_servers: Optional[int] = None) -> Any:
         """
         Factory method to create and initialize an agent with MCP tools already loaded.
 
@@ -202,42 +348,246 @@ class MCPToolsIntegration:
             mcp_servers: List of MCP servers to register with the agent
             agent_kwargs: Additional keyword arguments to pass to the agent constructor
             convert_schemas_to_strict: Whether to convert JSON schemas to strict format
+            connect_timeout: Per-server connect timeout in seconds, None to wait indefinitely
+            min_ready_servers: Number of servers to wait for, defaults to all of them
 
         Returns:
             An initialized agent instance with MCP tools registered
         """
-        # Connect to MCP servers
-        for server in mcp_servers:
-            if not getattr(server, 'connected', False):
-                try:
-                    logger.debug(f"Connecting to MCP server: {server.name}")
-                    await server.connect()
-                except Exception as e:
-                    logger.error(f"Failed to connect to MCP server {server.name}: {e}")
-
         # Create agent instance
         agent_kwargs = agent_kwargs or {}
         agent = agent_class(**agent_kwargs)
 
-        # Prepare tools
-        tools = await MCPToolsIntegration.prepare_dynamic_tools(
+        await MCPToolsIntegration.attach_servers(
+            agent,
             mcp_servers,
             convert_schemas_to_strict=convert_schemas_to_strict,
-            auto_connect=False  # Already connected above
+            connect_timeout=connect_timeout,
+            min_ready_servers=len(mcp_servers) if min_ready_servers is None else min_ready_servers,
         )
+        return agent
 
-        # Register tools with agent
-        if tools and hasattr(agent, '_tools') and isinstance(agent._tools, list):
-            agent._tools.extend(tools)
-            logger.info(f"Registered {len(tools)} MCP tools with agent")
 
-            # Log the names of registered tools
-            tool_names = [getattr(t, '__name__', 'unknown') for t in tools]
-            logger.info(f"Registered tool names: {tool_names}")
+class MCPToolRegistry:
+    """
+    Keeps the MCP tools registered on an agent, grouped by the server that provides them.
+    Tools of a server can be added or replaced while the agent is running.
+    """
+
+    def __init__(self, agent, convert_schemas_to_strict: bool = True, tool_cache: Optional[ToolListCache] = None,
+                 prefetch_config: Optional[PrefetchConfig] = None, policies: Optional[ToolPolicies] = None):
+        """
+        Args:
+            agent: The LiveKit agent whose tools are managed
+            convert_schemas_to_strict: Whether to convert JSON schemas to strict format
+            tool_cache: On-disk tool list cache, None to always fetch tools from the servers
+            prefetch_config: Follow-up calls to run in the background, ignored without a result cache
+            policies: The caches and policies the tools are invoked with; the registry adds its own call
+                coalescing and prefetcher. A policy that is not set leaves its feature off
+        """
+        self.agent = agent
+        self.convert_schemas_to_strict = convert_schemas_to_strict
+        self.tool_cache = tool_cache
+        policies = policies or ToolPolicies()
+        # Cached strict schemas are only used if they were compacted with the same settings
+        schema_compactor = policies.schema_compactor
+        self._schema_signature = schema_compactor.signature() if schema_compactor is not None else None
+        # Shared by all tools of the agent, so repeated calls across generations coalesce
+        single_flight = SingleFlight()
+        prefetcher = None
+        if prefetch_config is not None and prefetch_config.rules and policies.result_cache is not None:
+            prefetcher = Prefetcher(
+                prefetch_config, policies.result_cache, single_flight, self.server_for_tool, content_pipeline=policies.content_pipeline,
+            )
+        # A copy, the caller's policies may be shared with other registries
+        self.policies = dataclasses.replace(policies, single_flight=single_flight, prefetcher=prefetcher)
+        # Tools the agent had before any MCP tools were registered
+        self._base_tools: List[Callable] = list(getattr(agent, 'tools', None) or getattr(agent, '_tools', None) or [])
+        self._server_tools: Dict[str, List[Callable]] = {}
+        self._servers: Dict[str, MCPServer] = {}
+        self._background_tasks: set[asyncio.Task] = set()
+        self._sync_lock = asyncio.Lock()
+
+    @property
+    def tools(self) -> List[Callable]:
+        """All tools currently registered, base tools first."""
+        return self._base_tools + [tool for tools in self._server_tools.values() for tool in tools]
+
+    @property
+    def servers(self) -> List[MCPServer]:
+        """The servers whose tools are registered."""
+        return list(self._servers.values())
+
+    def server_for_tool(self, tool_name: str) -> Optional[MCPServer]:
+        """Returns the server providing a registered tool, or None if no server provides it."""
+        for server_name, tools in self._server_tools.items():
+            if any(getattr(t, '__name__', None) == tool_name for t in tools):
+                return self._servers.get(server_name)
+        return None
+
+    async def start_servers(self, mcp_servers: List[MCPServer],
+                            connect_timeout: Optional[float] = 20.0,
+                            required_servers: Optional[Sequence[str]] = None,
+                            min_ready_servers: int = 0) -> None:
+        """
+        Connects to all servers in parallel and registers the tools of each one as soon as it is ready.
+
+        Args:
+            mcp_servers: List of MCP servers to start
+            connect_timeout: Default connect timeout in seconds, used when a server has none of its own
+            required_servers: Names of the servers to wait for before returning
+            min_ready_servers: Minimum number of servers that must be ready before returning
+        """
+        required = set(required_servers or [])
+        pending: Dict[asyncio.Task, MCPServer] = {}
+        for server in mcp_servers:
+            timeout = getattr(server, 'connect_timeout', None) or connect_timeout
+            task = asyncio.create_task(self._start_server(server, timeout), name=f"mcp-start-{server.name}")
+            self._track(task)
+            pending[task] = server
+
+        ready = 0
+        started_at = asyncio.get_running_loop().time()
+        while pending and (required or ready < min_ready_servers):
+            done, _ = await asyncio.wait(pending.keys(), return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                server = pending.pop(task)
+                required.discard(server.name)
+                if not task.cancelled() and task.result():
+                    ready += 1
+
+        elapsed = asyncio.get_running_loop().time() - started_at
+        logger.info(f"{ready} MCP server(s) ready after {elapsed:.2f}s, {len(pending)} still starting in the background")
+
+    async def _start_server(self, server: MCPServer, timeout: Optional[float]) -> bool:
+        """Connects a server and registers its tools. Returns True if the server is ready."""
+        cached = self.tool_cache.load(server) if self.tool_cache else None
+        if cached is not None:
+            # Register right away, calls made before the server is up wait for the connection
+            strict_schemas = cached.strict_schemas if cached.schema_signature == self._schema_signature else None
+            function_tools = await self._function_tools(server, cached.tools, strict_schemas)
+            await self.set_server_tools(server, MCPToolsIntegration._decorate_tools(function_tools))
+
+        if not await MCPToolsIntegration._connect_server(server, timeout):
+            if cached is not None:
+                await self.remove_server(server.name)
+            return False
+
+        if cached is None:
+            await self.refresh_server_tools(server)
         else:
-            if not tools:
-                logger.warning("No tools were found to register with the agent")
+            self._track(asyncio.create_task(self.refresh_server_tools(server, cached), name=f"mcp-revalidate-{server.name}"))
+        return True
+
+    async def refresh_server_tools(self, server: MCPServer, cached: Optional[CachedToolList] = None) -> None:
+        """
+        Fetches the tool list from a connected server and registers it, unless it matches the cached one.
+
+        Args:
+            server: The connected server
+            cached: The cached tool list the agent currently uses for this server, if any
+        """
+        try:
+            if hasattr(server, 'invalidate_tools_cache'):
+                server.invalidate_tools_cache()
+            mcp_tools = await server.list_tools()
+        except Exception as e:
+            logger.error(f"Failed to fetch tools from {server.name}: {e}")
+            return
+
+        server_info = getattr(server, 'server_info', None)
+        server_version = server_info.version if server_info else None
+        if (cached is not None and cached.server_version == server_version
+                and cached.digest == ToolListCache.digest(mcp_tools) and cached.schema_signature == self._schema_signature):
+            logger.debug(f"Cached tool list of {server.name} is up to date")
+            return
+
+        function_tools = await self._function_tools(server, mcp_tools)
+        if self.tool_cache is not None:
+            strict_schemas = {ft.name: ft.params_json_schema for ft in function_tools} if self.convert_schemas_to_strict else {}
+            self.tool_cache.store(server, mcp_tools, strict_schemas, schema_signature=self._schema_signature)
+        if cached is not None:
+            logger.info(f"Tool list of {server.name} changed, updating the agent")
+        await self.set_server_tools(server, MCPToolsIntegration._decorate_tools(function_tools))
+
+    async def _function_tools(self, server: MCPServer, mcp_tools: List[MCPTool],
+                              strict_schemas: Optional[Dict[str, Dict[str, Any]]] = None) -> List[FunctionTool]:
+        """Converts MCP tools to FunctionTools wired to this registry's caches and policies."""
+        return await MCPUtil.get_function_tools(
+            server, self.convert_schemas_to_strict, tools=mcp_tools, strict_schemas=strict_schemas, policies=self.policies
+        )
+
+    async def remove_server(self, server_name: str) -> None:
+        """
+        Unregisters all tools of a server from the agent.
+
+        Args:
+            server_name: Name of the server whose tools are removed
+        """
+        self._servers.pop(server_name, None)
+        if self._server_tools.pop(server_name, None) is not None:
+            await self._sync_agent()
+            logger.info(f"Removed MCP tools of {server_name} from agent")
+
+    async def set_server_tools(self, server: MCPServer, tools: List[Callable]) -> None:
+        """
+        Registers the tools of a server on the agent, replacing the ones it registered before.
+
+        Args:
+            server: The server providing the tools
+            tools: The decorated tool functions of that server
+        """
+        self._servers[server.name] = server
+        self._server_tools[server.name] = tools
+        await self._sync_agent()
+        logger.info(f"Registered {len(tools)} MCP tools from {server.name} with agent")
+        logger.info(f"Registered tool names: {[getattr(t, '__name__', 'unknown') for t in tools]}")
+
+    async def _sync_agent(self) -> None:
+        """Pushes the current tool list to the agent."""
+        async with self._sync_lock:
+            tools = self.tools
+            if hasattr(self.agent, 'update_tools'):
+                # Works both before the session starts and while the agent is running
+                await self.agent.update_tools(tools)
+            elif hasattr(self.agent, '_tools') and isinstance(self.agent._tools, list):
+                self.agent._tools[:] = tools
             else:
                 logger.warning("Agent does not have a '_tools' attribute, tools were not registered")
 
-        return agent
\ No newline at end of file
+    def _track(self, task: asyncio.Task) -> None:
+        """Keeps a reference to a background task until it finishes."""
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def aclose(self) -> None:
+        """Cancels the servers that are still starting and the prefetches still running in the background."""
+        for task in list(self._background_tasks):
+            task.cancel()
+        await asyncio.gather(*self._background_tasks, return_exceptions=True)
+        policies = self.policies
+        if policies.prefetcher is not None:
+            await policies.prefetcher.aclose()
+            logger.info(f"Tool prefetch stats: {policies.prefetcher.stats()}")
+        if policies.result_cache is not None:
+            logger.info(f"Tool result cache stats: {policies.result_cache.stats()}")
+        logger.info(f"Tool call coalescing stats: {policies.single_flight.stats()}")
+        for name, server in self._servers.items():
+            call_metrics = getattr(server, "call_metrics", None)
+            if call_metrics is not None:
+                logger.info(f"Tool call stats for {name}: {call_metrics.stats()}")
+            scheduler = getattr(server, "scheduler", None)
+            if scheduler is not None:
+                logger.info(f"Tool call queue stats for {name}: {scheduler.stats()}")
+        if policies.reducer is not None:
+            logger.info(f"Tool output reduction stats: {policies.reducer.stats()}")
+        if policies.progress is not None:
+            await policies.progress.aclose()
+            logger.info(f"Tool progress stats: {policies.progress.stats()}")
+        if policies.schema_compactor is not None:
+            logger.info(f"Tool schema compaction stats: {policies.schema_compactor.stats()}")
+        tool_selector = getattr(self.agent, "tool_selector", None)
+        if tool_selector is not None:
+            logger.info(f"Tool retrieval stats: {tool_selector.stats()}")
+        if policies.content_pipeline is not None and policies.content_pipeline.binary_store is not None:
+            policies.content_pipeline.binary_store.close()
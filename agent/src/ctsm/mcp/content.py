@@ -0,0 +1,201 @@
+import base64
+import binascii
+import hashlib
+import json
+import logging
+import mmap
+import tempfile
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from mcp.types import (
+    AudioContent,
+    BlobResourceContents,
+    CallToolResult,
+    EmbeddedResource,
+    ImageContent,
+    ResourceLink,
+    TextContent,
+    TextResourceContents,
+)
+
+logger = logging.getLogger(__name__)
+
+_KIB = 1024
+_MIB = _KIB * 1024
+
+
+def _format_size(size: int) -> str:
+    if size < _KIB:
+        return f"{size} B"
+    if size < _MIB:
+        return f"{size / _KIB:.1f} KB"
+    return f"{size / _MIB:.1f} MB"
+
+
+class BinaryStore:
+    """
+    Keeps binary tool output out of the prompt, in an append-only memory-mapped temp file.
+
+    Blobs are referenced by short content-derived handles such as "blob:3f2a9c1e"; storing the
+    same bytes twice returns the same handle. When the file reaches its capacity it starts over.
+    """
+
+    def __init__(self, capacity: int = 256 * 1024 * 1024, directory: Optional[str] = None):
+        """
+        Args:
+            capacity: Maximum size of the backing file in bytes
+            directory: Where the temp file is created, the system temp dir if not set
+        """
+        self.capacity = capacity
+        self._file = tempfile.TemporaryFile(prefix="ctsm-blobs-", dir=directory)
+        self._size = 0
+        self._mmap: Optional[mmap.mmap] = None
+        self._index: Dict[str, Tuple[int, int, str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def put(self, data: bytes, mime_type: str) -> str:
+        """
+        Stores a blob and returns its handle.
+
+        Args:
+            data: The raw bytes
+            mime_type: MIME type of the data
+        """
+        handle = f"blob:{hashlib.sha256(data).hexdigest()[:8]}"
+        if handle in self._index:
+            return handle
+        if len(data) > self.capacity:
+            raise ValueError(f"Blob of {len(data)} bytes exceeds the store capacity")
+        if self._size + len(data) > self.capacity:
+            logger.info("Binary store full, dropping previously stored blobs")
+            self._reset()
+
+        self._file.seek(self._size)
+        self._file.write(data)
+        self._file.flush()
+        self._index[handle] = (self._size, len(data), mime_type)
+        self._size += len(data)
+        # The mapping is recreated lazily to cover the grown file
+        self._close_mmap()
+        return handle
+
+    def get(self, handle: str) -> Optional[Tuple[bytes, str]]:
+        """Returns a blob and its MIME type, or None if the handle is unknown."""
+        entry = self._index.get(handle)
+        if entry is None:
+            return None
+        offset, length, mime_type = entry
+        if self._mmap is None:
+            self._mmap = mmap.mmap(self._file.fileno(), self._size, access=mmap.ACCESS_READ)
+        return self._mmap[offset:offset + length], mime_type
+
+    def export(self, handle: str, path: str) -> bool:
+        """Writes a blob to a file, e.g. to save a screenshot. Returns False if the handle is unknown."""
+        blob = self.get(handle)
+        if blob is None:
+            return False
+        with open(path, "wb") as f:
+            f.write(blob[0])
+        return True
+
+    def _close_mmap(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def _reset(self):
+        self._close_mmap()
+        self._index.clear()
+        self._size = 0
+        self._file.truncate(0)
+
+    def close(self):
+        """Releases the mapping and deletes the backing file."""
+        self._close_mmap()
+        self._index.clear()
+        self._file.close()
+
+
+# Converts one content block to the text the LLM sees
+BlockConverter = Callable[[Any], Optional[str]]
+
+
+class ContentPipeline:
+    """
+    Turns the typed content blocks of a tool result into text for the LLM.
+
+    Text is joined directly; images, audio and binary resources go to the BinaryStore and
+    are replaced by a short reference. Converters for other block types can be registered.
+    """
+
+    def __init__(self, binary_store: Optional[BinaryStore] = None):
+        """
+        Args:
+            binary_store: Where binary blocks are kept; without one they are only described
+        """
+        self.binary_store = binary_store
+        self._converters: Dict[type, BlockConverter] = {
+            TextContent: self._text,
+            ImageContent: self._image,
+            AudioContent: self._audio,
+            EmbeddedResource: self._embedded_resource,
+            ResourceLink: self._resource_link,
+        }
+
+    def register(self, block_type: type, converter: BlockConverter) -> None:
+        """Adds or replaces the converter for a content block type."""
+        self._converters[block_type] = converter
+
+    def to_text(self, result: CallToolResult) -> str:
+        """
+        Converts a tool result to the string returned to the LLM.
+
+        Args:
+            result: The result of the tool call
+        """
+        parts: List[str] = []
+        for block in result.content:
+            converter = self._converters.get(type(block))
+            if converter is None:
+                parts.append(block.model_dump_json(exclude_none=True))
+                continue
+            text = converter(block)
+            if text:
+                parts.append(text)
+
+        if not parts and result.structuredContent is not None:
+            parts.append(json.dumps(result.structuredContent, ensure_ascii=False))
+        text = "\n".join(parts)
+        return f"Error: {text}" if result.isError else text
+
+    def _store(self, data: str, mime_type: str, kind: str) -> str:
+        try:
+            raw = base64.b64decode(data, validate=True)
+        except (binascii.Error, ValueError):
+            return f"[{kind} {mime_type}, undecodable data omitted]"
+        if self.binary_store is None:
+            return f"[{kind} {mime_type}, {_format_size(len(raw))} omitted]"
+        handle = self.binary_store.put(raw, mime_type)
+        return f"[{kind} {mime_type}, {_format_size(len(raw))} stored as {handle}]"
+
+    def _text(self, block: TextContent) -> str:
+        return block.text
+
+    def _image(self, block: ImageContent) -> str:
+        return self._store(block.data, block.mimeType, "image")
+
+    def _audio(self, block: AudioContent) -> str:
+        return self._store(block.data, block.mimeType, "audio")
+
+    def _embedded_resource(self, block: EmbeddedResource) -> str:
+        resource = block.resource
+        if isinstance(resource, TextResourceContents):
+            return resource.text
+        if isinstance(resource, BlobResourceContents):
+            return self._store(resource.blob, resource.mimeType or "application/octet-stream", f"resource {resource.uri}")
+        return f"[resource {resource.uri}]"
+
+    def _resource_link(self, block: ResourceLink) -> str:
+        return f"[resource {block.name}: {block.uri}]"
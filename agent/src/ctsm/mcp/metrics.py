@@ -0,0 +1,55 @@
+from typing import Any, Dict, Optional
+
+
+class ToolCallMetrics:
+    """
+    Counts the tool calls of one server: completed, cancelled and timed out calls, and an
+    estimate of the server time saved by cancelling calls instead of letting them finish.
+    """
+
+    def __init__(self, smoothing: float = 0.2):
+        """
+        Args:
+            smoothing: Weight of the newest duration in the moving average per tool
+        """
+        self.smoothing = smoothing
+        self.completed = 0
+        self.cancelled = 0
+        self.timed_out = 0
+        self.saved_seconds = 0.0
+        self._avg_duration: Dict[str, float] = {}
+
+    def record_completed(self, tool_name: str, duration: float) -> None:
+        """Records a call that returned, updating the tool's average duration."""
+        self.completed += 1
+        previous = self._avg_duration.get(tool_name)
+        self._avg_duration[tool_name] = duration if previous is None else previous + self.smoothing * (duration - previous)
+
+    def record_cancelled(self, tool_name: str, elapsed: float, timeout: Optional[float] = None, timed_out: bool = False) -> float:
+        """
+        Records a cancelled call and returns the estimated server time it saved.
+
+        The estimate is the tool's average duration minus the time already spent; without any
+        history, the remaining time until the call's deadline is used instead.
+        """
+        if timed_out:
+            self.timed_out += 1
+        else:
+            self.cancelled += 1
+        expected = self._avg_duration.get(tool_name, timeout)
+        saved = max((expected or 0.0) - elapsed, 0.0)
+        self.saved_seconds += saved
+        return saved
+
+    def average_duration(self, tool_name: str) -> Optional[float]:
+        """Moving average of the tool's call duration, None if it never completed."""
+        return self._avg_duration.get(tool_name)
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters and the estimated server time saved."""
+        return {
+            "completed": self.completed,
+            "cancelled": self.cancelled,
+            "timed_out": self.timed_out,
+            "saved_seconds": round(self.saved_seconds, 3),
+        }
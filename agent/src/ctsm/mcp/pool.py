@@ -0,0 +1,687 @@
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+import socket
+import stat
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from mcp.shared.session import ProgressFnT
+from mcp.types import CallToolResult, Implementation
+from mcp.types import Tool as MCPTool
+from pydantic import BaseModel
+
+from .metrics import ToolCallMetrics
+from .scheduler import CallScheduler
+from .server import MCPServer, MCPServerStdio
+
+logger = logging.getLogger(__name__)
+
+# Key of a pooled server: the command and its arguments
+PoolKey = Tuple[str, Tuple[str, ...]]
+
+
+# Environment variable the pool host reads its token from, so it never shows up in the process list
+POOL_TOKEN_ENV = "CTSM_MCP_POOL_TOKEN"
+
+
+def pool_runtime_dir() -> str:
+    """
+    The per-user directory of the pool socket, created with mode 0700.
+
+    Raises:
+        RuntimeError: If the directory belongs to another user or others can write to it
+    """
+    base = os.environ.get("XDG_RUNTIME_DIR")
+    path = os.path.join(base, "ctsm") if base else os.path.join(tempfile.gettempdir(), f"ctsm-{os.getuid()}")
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise RuntimeError(f"{path} is not a private directory of the current user")
+    return path
+
+
+def default_pool_address() -> str:
+    """The address the pool host listens on: a unix socket in a private directory, or a localhost port on Windows."""
+    if sys.platform == "win32":
+        return "127.0.0.1:47563"
+    return os.path.join(pool_runtime_dir(), "mcp-pool.sock")
+
+
+class MCPPoolConfig(BaseModel):
+    enabled: bool = False
+    # Address of the pool host, the per-user default if not set
+    address: Optional[str] = None
+    # Seconds an unused server is kept alive
+    idle_timeout: float = 600.0
+    # Maximum number of servers the pool keeps alive
+    max_servers: int = 8
+    # Secret shared by the pool host and its clients, required on TCP addresses
+    token: Optional[str] = None
+
+
+def _proof(token: Optional[str], role: str, nonce: str) -> str:
+    """Proves knowledge of the token for a nonce, without revealing it."""
+    return hmac.new((token or "").encode(), f"{role}:{nonce}".encode(), hashlib.sha256).hexdigest()
+
+
+def _check_peer(writer: asyncio.StreamWriter) -> None:
+    """
+    Raises PermissionError if the other end of a unix socket runs as another user.
+
+    Only checked where the platform reports the peer's credentials (Linux); elsewhere the private
+    socket directory keeps other users out.
+    """
+    sock = writer.get_extra_info("socket")
+    if sock is None or sock.family != socket.AF_UNIX or not hasattr(socket, "SO_PEERCRED"):
+        return
+    _, uid, _ = struct.unpack("3i", sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i")))
+    if uid != os.getuid():
+        raise PermissionError(f"MCP server pool peer runs as uid {uid}")
+
+
+async def _open_connection(address: str) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    """Opens a connection to the pool host at the given address, refusing sockets of other users."""
+    if address.startswith("/"):
+        if os.stat(address).st_uid != os.getuid():
+            raise PermissionError(f"MCP server pool socket {address} belongs to another user")
+        reader, writer = await asyncio.open_unix_connection(address, limit=2**24)
+        try:
+            _check_peer(writer)
+        except PermissionError:
+            writer.close()
+            raise
+        return reader, writer
+    host, port = address.rsplit(":", 1)
+    return await asyncio.open_connection(host, int(port), limit=2**24)
+
+
+async def _handshake(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, token: Optional[str]) -> None:
+    """
+    Authenticates the pool host and then the client, before any request reveals server arguments.
+
+    The host answers the client's nonce with a proof of the token, so a process squatting the address
+    learns neither the token nor the arguments; the client then answers the host's nonce.
+
+    Raises:
+        PermissionError: If the host does not know the token
+    """
+    nonce = secrets.token_hex(16)
+    writer.write(json.dumps({"method": "hello", "params": {"nonce": nonce}}).encode() + b"\n")
+    await writer.drain()
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("MCP server pool closed the connection")
+    result = json.loads(line).get("result") or {}
+    if not hmac.compare_digest(str(result.get("proof", "")), _proof(token, "host", nonce)):
+        raise PermissionError("MCP server pool could not prove it knows the pool token")
+    writer.write(json.dumps({"method": "auth", "params": {"proof": _proof(token, "client", str(result.get("nonce", "")))}}).encode() + b"\n")
+    await writer.drain()
+
+
+class _PoolEntry:
+    """A pooled stdio server and the task that keeps it alive."""
+
+    def __init__(self, key: PoolKey, name: str):
+        self.key = key
+        self.server = MCPServerStdio(
+            params={"command": key[0], "args": list(key[1])},
+            cache_tools_list=True,
+            name=name,
+        )
+        self.ready = asyncio.Event()
+        self.stop = asyncio.Event()
+        self.error: Optional[BaseException] = None
+        self.leases = 0
+        self.last_used = time.monotonic()
+        self.task: Optional[asyncio.Task] = None
+
+    async def run(self):
+        """Connects the server and keeps it open until the entry is evicted."""
+        try:
+            # The server is entered and exited in this task, as the stdio transport requires
+            async with self.server:
+                self.ready.set()
+                await self.stop.wait()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.ready.set()
+
+
+class MCPServerPool:
+    """
+    Keeps stdio MCP server processes alive across agent sessions, keyed by command and args.
+    Idle servers are evicted after a timeout, and at most max_servers are kept at a time.
+    """
+
+    def __init__(self, idle_timeout: float = 600.0, max_servers: int = 8):
+        """
+        Args:
+            idle_timeout: Seconds a server without leases is kept before it is stopped
+            max_servers: Maximum number of servers kept alive at the same time
+        """
+        self.idle_timeout = idle_timeout
+        self.max_servers = max_servers
+        self._entries: Dict[PoolKey, _PoolEntry] = {}
+        self._lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def acquire(self, command: str, args: List[str], name: str) -> _PoolEntry:
+        """
+        Returns an initialized server for the command and args, starting it if needed.
+
+        Raises:
+            RuntimeError: If the pool is full of servers in use, or the server failed to start
+        """
+        key: PoolKey = (command, tuple(args))
+        evicted: List[_PoolEntry] = []
+        async with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                if len(self._entries) >= self.max_servers:
+                    lru = self._remove_lru()
+                    if lru is None:
+                        raise RuntimeError(f"MCP server pool is full ({self.max_servers} servers in use)")
+                    evicted.append(lru)
+                entry = _PoolEntry(key, name)
+                entry.task = asyncio.create_task(entry.run(), name=f"mcp-pool-{name}")
+                self._entries[key] = entry
+                logger.info(f"Starting pooled MCP server: {name}")
+            entry.leases += 1
+            entry.last_used = time.monotonic()
+        # The evicted server shuts down while the new one starts
+        await self._stop(evicted)
+
+        await entry.ready.wait()
+        if entry.error is not None or entry.server.session is None:
+            await self.release(entry)
+            await self._stop([self._remove(entry)])
+            raise RuntimeError(f"Pooled MCP server {name} failed to start: {entry.error}")
+        return entry
+
+    async def release(self, entry: _PoolEntry):
+        """Returns a lease, making the server eligible for idle eviction."""
+        entry.leases = max(entry.leases - 1, 0)
+        entry.last_used = time.monotonic()
+
+    def _remove_lru(self) -> Optional[_PoolEntry]:
+        """Removes the least recently used server without leases, None if there is none."""
+        idle = [entry for entry in self._entries.values() if entry.leases == 0]
+        if not idle:
+            return None
+        return self._remove(min(idle, key=lambda entry: entry.last_used))
+
+    def _remove(self, entry: _PoolEntry) -> _PoolEntry:
+        """Removes a server from the pool and tells it to stop; _stop() waits for it outside the lock."""
+        if self._entries.get(entry.key) is entry:
+            del self._entries[entry.key]
+        entry.stop.set()
+        return entry
+
+    @staticmethod
+    async def _stop(entries: List[_PoolEntry]):
+        """Waits for removed servers to shut down, which can take seconds, so never under the lock."""
+        await asyncio.gather(*(entry.task for entry in entries if entry.task is not None), return_exceptions=True)
+        for entry in entries:
+            logger.info(f"Evicted pooled MCP server: {entry.server.name}")
+
+    async def evict_idle(self):
+        """Stops every server that has been idle for longer than the idle timeout."""
+        now = time.monotonic()
+        async with self._lock:
+            idle = [
+                self._remove(entry) for entry in list(self._entries.values())
+                if entry.leases == 0 and now - entry.last_used > self.idle_timeout
+            ]
+        await self._stop(idle)
+
+    async def aclose(self):
+        """Stops all pooled servers."""
+        async with self._lock:
+            entries = [self._remove(entry) for entry in list(self._entries.values())]
+        await self._stop(entries)
+
+
+class MCPPoolHost:
+    """
+    Serves an MCPServerPool over a local socket using newline-delimited JSON requests.
+
+    Each client connection holds leases on the servers it acquired; they are returned
+    when the connection closes, so a crashed agent never pins a server.
+    """
+
+    def __init__(self, pool: MCPServerPool, address: Optional[str] = None, token: Optional[str] = None):
+        """
+        Args:
+            pool: The servers kept alive
+            address: Where the host listens, default_pool_address() if not set
+            token: Secret clients must prove they know, required on TCP addresses
+        """
+        self.pool = pool
+        self.address = address or default_pool_address()
+        self.token = token
+        if not self.address.startswith("/") and not token:
+            raise ValueError("The MCP server pool needs a token to listen on a TCP address")
+        self._connections = 0
+        self._last_activity = time.monotonic()
+
+    async def serve_forever(self, sweep_interval: float = 30.0):
+        """Accepts clients until the pool has been empty and unused for the idle timeout."""
+        if self.address.startswith("/"):
+            if os.path.exists(self.address):
+                try:
+                    _, writer = await _open_connection(self.address)
+                    writer.close()
+                    logger.info(f"MCP server pool already running on {self.address}")
+                    return
+                except OSError:
+                    # Stale socket left behind by a host that did not shut down cleanly
+                    os.unlink(self.address)
+            # Created with mode 0600 from the start, not chmod-ed after others could connect
+            umask = os.umask(0o177)
+            try:
+                server = await asyncio.start_unix_server(self._handle_client, self.address, limit=2**24)
+            finally:
+                os.umask(umask)
+        else:
+            host, port = self.address.rsplit(":", 1)
+            server = await asyncio.start_server(self._handle_client, host, int(port), limit=2**24)
+        logger.info(f"MCP server pool listening on {self.address}")
+
+        try:
+            async with server:
+                while True:
+                    await asyncio.sleep(sweep_interval)
+                    await self.pool.evict_idle()
+                    idle_for = time.monotonic() - self._last_activity
+                    if not self._connections and not len(self.pool) and idle_for > self.pool.idle_timeout:
+                        logger.info("MCP server pool idle, shutting down")
+                        break
+        finally:
+            await self.pool.aclose()
+            if self.address.startswith("/") and os.path.exists(self.address):
+                os.unlink(self.address)
+
+    async def _authenticate(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> bool:
+        """The host's side of _handshake(); False if the client is another user or does not know the token."""
+        try:
+            _check_peer(writer)
+            hello = json.loads(await reader.readline() or b"{}")
+            if hello.get("method") != "hello":
+                return False
+            nonce = secrets.token_hex(16)
+            proof = _proof(self.token, "host", str(hello.get("params", {}).get("nonce", "")))
+            writer.write(json.dumps({"id": None, "result": {"proof": proof, "nonce": nonce}}).encode() + b"\n")
+            await writer.drain()
+            auth = json.loads(await reader.readline() or b"{}")
+        except (PermissionError, ConnectionError, json.JSONDecodeError) as e:
+            logger.warning(f"MCP pool client rejected: {e}")
+            return False
+        return auth.get("method") == "auth" and hmac.compare_digest(
+            str(auth.get("params", {}).get("proof", "")), _proof(self.token, "client", nonce)
+        )
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        if not await self._authenticate(reader, writer):
+            logger.warning("MCP pool client failed to authenticate, closing the connection")
+            writer.close()
+            return
+        self._connections += 1
+        leases: Dict[PoolKey, _PoolEntry] = {}
+        write_lock = asyncio.Lock()
+        requests: Dict[Any, asyncio.Task] = {}
+
+        async def send(message: Dict[str, Any]):
+            async with write_lock:
+                writer.write(json.dumps(message).encode() + b"\n")
+                await writer.drain()
+
+        async def respond(request: Dict[str, Any]):
+            async def on_progress(progress: float, total: Optional[float], message: Optional[str]):
+                await send({"id": request.get("id"), "progress": {"progress": progress, "total": total, "message": message}})
+
+            try:
+                response = {"id": request.get("id"), "result": await self._dispatch(request, leases, on_progress)}
+            except Exception as e:
+                response = {"id": request.get("id"), "error": str(e)}
+            await send(response)
+
+        try:
+            while line := await reader.readline():
+                self._last_activity = time.monotonic()
+                request = json.loads(line)
+                if request.get("method") == "cancel":
+                    # Cancelling the dispatch makes the server send notifications/cancelled to the MCP server
+                    cancelled = requests.get(request.get("params", {}).get("id"))
+                    if cancelled is not None:
+                        cancelled.cancel()
+                    continue
+                request_id = request.get("id")
+                task = asyncio.create_task(respond(request))
+                requests[request_id] = task
+                task.add_done_callback(lambda _, request_id=request_id: requests.pop(request_id, None))
+        except (ConnectionError, json.JSONDecodeError) as e:
+            logger.warning(f"MCP pool client disconnected: {e}")
+        finally:
+            for task in list(requests.values()):
+                task.cancel()
+            for entry in leases.values():
+                await self.pool.release(entry)
+            self._connections -= 1
+            self._last_activity = time.monotonic()
+            writer.close()
+
+    async def _dispatch(self, request: Dict[str, Any], leases: Dict[PoolKey, _PoolEntry], on_progress: Optional[ProgressFnT] = None) -> Any:
+        method = request.get("method")
+        params = request.get("params", {})
+        if method == "ping":
+            return {}
+        if method == "acquire":
+            entry = await self.pool.acquire(params["command"], params["args"], params["name"])
+            if entry.key in leases:
+                await self.pool.release(entry)
+            leases[entry.key] = entry
+            server_info = entry.server.server_info
+            return {
+                "key": [entry.key[0], list(entry.key[1])],
+                "server_info": server_info.model_dump(mode="json", exclude_none=True) if server_info else None,
+            }
+
+        key: PoolKey = (params["key"][0], tuple(params["key"][1]))
+        entry = leases.get(key)
+        if entry is None:
+            raise RuntimeError("Server not acquired on this connection")
+        entry.last_used = time.monotonic()
+        if method == "list_tools":
+            tools = await entry.server.list_tools()
+            return [tool.model_dump(mode="json", by_alias=True, exclude_none=True) for tool in tools]
+        if method == "call_tool":
+            # Progress is forwarded only if the client asked for it
+            progress_callback = on_progress if params.get("progress") else None
+            result = await entry.server.call_tool(params["tool_name"], params.get("arguments"), progress_callback=progress_callback)
+            return result.model_dump(mode="json", by_alias=True, exclude_none=True)
+        raise RuntimeError(f"Unknown method: {method}")
+
+
+class MCPServerPooled(MCPServer):
+    """MCP server that attaches to an already initialized server kept alive by the pool host."""
+
+    def __init__(
+        self,
+        params: Dict[str, Any],
+        name: Optional[str] = None,
+        pool_config: Optional[MCPPoolConfig] = None,
+        connect_timeout: Optional[float] = None,
+        max_in_flight: int = 4,
+    ):
+        """Create a new MCP server backed by the pool host.
+
+        Args:
+            params: The params that configure the server, the command and args.
+            name: A readable name for the server.
+            pool_config: How to reach or start the pool host.
+            connect_timeout: Seconds to wait for the server to start and initialize.
+            max_in_flight: Maximum number of tool calls sent to the server at the same time.
+        """
+        self.params = params
+        self._name = name or f"Pooled Server: {self.params.get('command', 'unknown')}"
+        self.pool_config = pool_config or MCPPoolConfig(enabled=True)
+        self.address = self.pool_config.address or ""
+        self.connect_timeout = connect_timeout
+        # Local server used when the pool host cannot serve this one
+        self._fallback: Optional[MCPServerStdio] = None
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._key: Optional[List[Any]] = None
+        self._next_id = 0
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._progress_callbacks: Dict[int, ProgressFnT] = {}
+        self._read_task: Optional[asyncio.Task] = None
+        self._write_lock = asyncio.Lock()
+        self._tools_list: Optional[List[MCPTool]] = None
+        self.server_info: Optional[Implementation] = None
+        self._connect_done = asyncio.Event()
+        self.call_metrics = ToolCallMetrics()
+        self.scheduler = CallScheduler(self._name, max_in_flight)
+
+    @property
+    def name(self) -> str:
+        """A readable name for the server."""
+        return self._name
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.cleanup()
+
+    async def connect(self):
+        """Attach to the pooled server, starting the pool host if it is not running."""
+        if self._key is not None or self._fallback is not None:
+            # Already attached, e.g. a server the warm agent host keeps across sessions
+            return
+        self._connect_done.clear()
+        try:
+            await self._attach()
+        finally:
+            self._connect_done.set()
+
+    async def _attach(self):
+        try:
+            # Resolved here, a runtime directory that is not private makes the server start locally
+            self.address = self.address or default_pool_address()
+            if not self.address.startswith("/") and not self.pool_config.token:
+                raise RuntimeError("no pool token configured for a TCP address")
+            self._reader, self._writer = await ensure_pool_host(self.address, self.pool_config)
+            await _handshake(self._reader, self._writer, self.pool_config.token)
+            self._read_task = asyncio.create_task(self._read_responses())
+            result = await self._request(
+                "acquire",
+                {"command": self.params["command"], "args": self.params.get("args", []), "name": self.name},
+            )
+            self._key = result["key"]
+            if result.get("server_info"):
+                self.server_info = Implementation.model_validate(result["server_info"])
+            logger.info(f"Attached to pooled MCP server: {self.name}")
+        except (OSError, RuntimeError, json.JSONDecodeError) as e:
+            logger.warning(f"MCP server pool unavailable for {self.name}, starting it locally: {e}")
+            await self.cleanup()
+            self._fallback = MCPServerStdio(
+                params=self.params, cache_tools_list=True, name=self.name, connect_timeout=self.connect_timeout,
+                max_in_flight=self.scheduler.max_in_flight,
+            )
+            await self._fallback.connect()
+            self.server_info = self._fallback.server_info
+
+    async def list_tools(self) -> List[MCPTool]:
+        """List the tools available on the server."""
+        if self._fallback is not None:
+            return await self._fallback.list_tools()
+        if self._tools_list is None:
+            tools = await self._request("list_tools", {"key": self._key})
+            self._tools_list = [MCPTool.model_validate(tool) for tool in tools]
+        return self._tools_list
+
+    async def call_tool(self, tool_name: str, arguments: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None,
+                        progress_callback: Optional[ProgressFnT] = None) -> CallToolResult:
+        """
+        Invoke a tool on the server. A cancelled or timed out call is cancelled in the pool host as well,
+        progress notifications are relayed by the pool host to the progress callback.
+        """
+        if self._key is None and self._fallback is None and not self._connect_done.is_set():
+            # Tools registered from the on-disk cache can be invoked while attaching
+            try:
+                await asyncio.wait_for(self._connect_done.wait(), self.connect_timeout)
+            except TimeoutError:
+                raise ConnectionError(f"MCP server {self.name} not connected after {self.connect_timeout:g}s") from None
+        if self._fallback is not None:
+            return await self._fallback.call_tool(tool_name, arguments, timeout, progress_callback)
+        started = time.monotonic()
+        try:
+            async with asyncio.timeout(timeout), self.scheduler.slot():
+                params = {"key": self._key, "tool_name": tool_name, "arguments": arguments or {}, "progress": progress_callback is not None}
+                result = await self._request("call_tool", params, progress_callback)
+        except (asyncio.CancelledError, TimeoutError) as e:
+            timed_out = isinstance(e, TimeoutError)
+            elapsed = time.monotonic() - started
+            saved = self.call_metrics.record_cancelled(tool_name, elapsed, timeout, timed_out)
+            outcome = "Timed out" if timed_out else "Cancelled"
+            logger.info(f"{outcome}: {tool_name} on {self.name} after {elapsed:.2f}s, ~{saved:.2f}s of server time saved")
+            raise
+        self.call_metrics.record_completed(tool_name, time.monotonic() - started)
+        return CallToolResult.model_validate(result)
+
+    async def cleanup(self):
+        """Detach from the pool, the server itself keeps running in the pool host."""
+        if self._fallback is not None:
+            await self._fallback.cleanup()
+            self._fallback = None
+        if self._read_task is not None:
+            self._read_task.cancel()
+            await asyncio.gather(self._read_task, return_exceptions=True)
+            self._read_task = None
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        self._key = None
+
+    async def _request(self, method: str, params: Dict[str, Any], progress_callback: Optional[ProgressFnT] = None) -> Any:
+        if self._writer is None:
+            raise RuntimeError("Server not initialized. Make sure you call connect() first.")
+        self._next_id += 1
+        request_id = self._next_id
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        if progress_callback is not None:
+            self._progress_callbacks[request_id] = progress_callback
+        try:
+            async with self._write_lock:
+                self._writer.write(json.dumps({"id": request_id, "method": method, "params": params}).encode() + b"\n")
+                await self._writer.drain()
+            return await future
+        except asyncio.CancelledError:
+            if self._writer is not None and not future.done():
+                self._writer.write(json.dumps({"method": "cancel", "params": {"id": request_id}}).encode() + b"\n")
+            raise
+        finally:
+            self._pending.pop(request_id, None)
+            self._progress_callbacks.pop(request_id, None)
+
+    async def _read_responses(self):
+        assert self._reader is not None
+        try:
+            while line := await self._reader.readline():
+                response = json.loads(line)
+                if "progress" in response:
+                    progress_callback = self._progress_callbacks.get(response.get("id"))
+                    if progress_callback is not None:
+                        try:
+                            await progress_callback(**response["progress"])
+                        except Exception:
+                            logger.exception("Progress callback failed")
+                    continue
+                future = self._pending.get(response.get("id"))
+                if future is None or future.done():
+                    continue
+                if "error" in response:
+                    future.set_exception(RuntimeError(response["error"]))
+                else:
+                    future.set_result(response.get("result"))
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("Connection to MCP server pool lost"))
+
+
+_spawn_lock = asyncio.Lock()
+
+
+def _pool_host_command() -> List[str]:
+    """The command that starts the pool host, also inside the packaged executable."""
+    if getattr(sys, "frozen", False):
+        return [sys.executable, "mcp-pool"]
+    return [sys.executable, "-m", "src.ctsm.mcp.pool"]
+
+
+async def ensure_pool_host(
+    address: str, pool_config: MCPPoolConfig, start_timeout: float = 10.0
+) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    """
+    Connects to the pool host, spawning a detached one if nobody is listening yet.
+
+    Args:
+        address: Address of the pool host
+        pool_config: Idle timeout and server cap for a freshly spawned host
+        start_timeout: Seconds to wait for a freshly spawned host to accept connections
+
+    Returns:
+        The reader and writer of the connection
+    """
+    try:
+        return await _open_connection(address)
+    except (ConnectionError, FileNotFoundError):
+        pass
+
+    # Servers connect concurrently, only the first one spawns the host
+    async with _spawn_lock:
+        try:
+            return await _open_connection(address)
+        except (ConnectionError, FileNotFoundError):
+            pass
+        return await _spawn_pool_host(address, pool_config, start_timeout)
+
+
+async def _spawn_pool_host(
+    address: str, pool_config: MCPPoolConfig, start_timeout: float
+) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    logger.info(f"Starting MCP server pool host on {address}")
+    subprocess.Popen(
+        [
+            *_pool_host_command(),
+            "--address", address,
+            "--idle-timeout", str(pool_config.idle_timeout),
+            "--max-servers", str(pool_config.max_servers),
+        ],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+        env={**os.environ, POOL_TOKEN_ENV: pool_config.token or ""},
+    )
+    deadline = time.monotonic() + start_timeout
+    while True:
+        try:
+            return await _open_connection(address)
+        except (ConnectionError, FileNotFoundError):
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Keep MCP servers alive across agent sessions.")
+    parser.add_argument("--address", default=None)
+    parser.add_argument("--idle-timeout", type=float, default=600.0)
+    parser.add_argument("--max-servers", type=int, default=8)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    pool = MCPServerPool(idle_timeout=args.idle_timeout, max_servers=args.max_servers)
+    asyncio.run(MCPPoolHost(pool, args.address, token=os.environ.get(POOL_TOKEN_ENV) or None).serve_forever())
+
+
+if __name__ == "__main__":
+    main()
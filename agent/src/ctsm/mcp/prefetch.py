@@ -0,0 +1,162 @@
+import asyncio
+import json
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+from pydantic import BaseModel
+
+from .content import ContentPipeline
+from .result_cache import ToolResultCache, canonical_arguments
+from .server import MCPServer
+from .single_flight import SingleFlight
+from .util import MCPUtil
+
+logger = logging.getLogger(__name__)
+
+
+class PrefetchRule(BaseModel):
+    # Tool whose result triggers the prefetch
+    after: str
+    # Tool that is run in the background
+    run: str
+    # How many items of the result are prefetched
+    first: int = 3
+    # Dotted path to the list of items in the JSON result; the first list found if not set
+    items: Optional[str] = None
+    # Arguments of the prefetched call; "{item}" in string values is replaced by the item
+    arguments: Dict[str, Any] = {}
+    # Seconds the prefetched results stay in the result cache
+    ttl: float = 300.0
+
+
+class PrefetchConfig(BaseModel):
+    rules: List[PrefetchRule] = []
+    # Maximum number of prefetch calls running at the same time
+    max_concurrency: int = 2
+
+
+def _extract_items(value: Any, path: Optional[str]) -> List[Any]:
+    """Finds the list of items in a decoded tool result."""
+    if path:
+        for part in path.split("."):
+            if isinstance(value, dict):
+                value = value.get(part)
+            elif isinstance(value, list) and part.isdigit() and int(part) < len(value):
+                value = value[int(part)]
+            else:
+                return []
+        return value if isinstance(value, list) else []
+    if isinstance(value, list):
+        return value
+    if isinstance(value, dict):
+        for nested in value.values():
+            items = _extract_items(nested, None)
+            if items:
+                return items
+    return []
+
+
+def _fill_template(template: Any, item: Any) -> Any:
+    """
+    Replaces "{item}" in the string values of an arguments template.
+
+    A value that is exactly "{item}" becomes the item itself, so an id keeps its type and the
+    prefetched call has the same cache key as the call the LLM makes.
+    """
+    if template == "{item}":
+        return item
+    if isinstance(template, str):
+        return template.replace("{item}", str(item))
+    if isinstance(template, dict):
+        return {key: _fill_template(value, item) for key, value in template.items()}
+    if isinstance(template, list):
+        return [_fill_template(value, item) for value in template]
+    return template
+
+
+class Prefetcher:
+    """
+    Runs follow-up tool calls in the background according to the agent profile's prefetch rules,
+    so the next call the LLM makes is answered from the result cache.
+    """
+
+    def __init__(self, config: PrefetchConfig, result_cache: ToolResultCache, single_flight: SingleFlight,
+                 resolve_server: Callable[[str], Optional[MCPServer]],
+                 content_pipeline: Optional[ContentPipeline] = None):
+        """
+        Args:
+            config: The prefetch rules and concurrency budget
+            result_cache: Cache the prefetched results are stored in
+            single_flight: Shared with the tools, so a real call joins a prefetch that is still running
+            resolve_server: Returns the server providing a tool, by tool name
+            content_pipeline: Converts results to text the same way the tools do
+        """
+        self.config = config
+        self.result_cache = result_cache
+        self.single_flight = single_flight
+        self.resolve_server = resolve_server
+        self.content_pipeline = content_pipeline
+        self._semaphore = asyncio.Semaphore(config.max_concurrency)
+        self._tasks: set[asyncio.Task] = set()
+        self.prefetched = 0
+        self.failed = 0
+
+        # The prefetched tools must be looked up in the cache even if the profile does not cache them
+        for rule in config.rules:
+            result_cache.enable(rule.run, rule.ttl)
+
+    def on_result(self, tool_name: str, result: str) -> None:
+        """
+        Schedules the prefetches triggered by a tool result.
+
+        Args:
+            tool_name: The tool that returned
+            result: Its full result as text, before any output reduction
+        """
+        rules = [rule for rule in self.config.rules if rule.after == tool_name]
+        if not rules:
+            return
+        try:
+            decoded = json.loads(result)
+        except (TypeError, ValueError):
+            logger.debug(f"Result of '{tool_name}' is not JSON, nothing to prefetch")
+            return
+
+        for rule in rules:
+            server = self.resolve_server(rule.run)
+            if server is None:
+                logger.debug(f"Prefetch target '{rule.run}' is not registered")
+                continue
+            for item in _extract_items(decoded, rule.items)[:rule.first]:
+                arguments = _fill_template(rule.arguments, item)
+                key = (server.name, rule.run, canonical_arguments(arguments))
+                if self.result_cache.contains(key) or self.single_flight.in_flight(key):
+                    continue
+                task = asyncio.create_task(self._prefetch(server, rule, key, arguments))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+    async def _prefetch(self, server: MCPServer, rule: PrefetchRule, key, arguments: Dict[str, Any]) -> None:
+        async with self._semaphore:
+            try:
+                result = await self.single_flight.do(key, lambda: server.call_tool(rule.run, arguments))
+            except Exception as e:
+                self.failed += 1
+                logger.debug(f"Prefetch of '{rule.run}' failed: {e}")
+                return
+        if getattr(result, "isError", False):
+            self.failed += 1
+            return
+        self.result_cache.put(key, MCPUtil._result_to_string(result, self.content_pipeline), rule.ttl)
+        self.prefetched += 1
+        logger.debug(f"Prefetched '{rule.run}' with {arguments}")
+
+    async def aclose(self) -> None:
+        """Cancels all pending prefetches, used when the session ends."""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Number of completed, failed and pending prefetches."""
+        return {"prefetched": self.prefetched, "failed": self.failed, "pending": len(self._tasks)}
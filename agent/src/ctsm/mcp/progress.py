@@ -0,0 +1,133 @@
+import asyncio
+import contextlib
+import logging
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+# A progress message from the server is said as it is up to this many words
+MAX_MESSAGE_WORDS = 12
+
+ProgressCallback = Callable[[float, Optional[float], Optional[str]], Awaitable[None]]
+
+
+class ToolProgressConfig(BaseModel):
+    # Whether the agent says a status phrase while a slow tool call runs
+    enabled: bool = True
+    # Seconds a call runs before the first status phrase
+    threshold: float = 2.5
+    # Seconds between status phrases, across all calls
+    repeat_interval: float = 10.0
+    # Most status phrases per call
+    max_updates: int = 3
+    # Phrases said in turn when the server sends no usable progress
+    phrases: List[str] = ["One moment, I'm working on it.", "Still on it.", "Almost there, thanks for waiting."]
+    # Phrases by tool name, said instead of the generic ones
+    tools: Dict[str, str] = {}
+
+
+class _TrackedCall:
+    def __init__(self, tool_name: str):
+        self.tool_name = tool_name
+        self.started = time.monotonic()
+        self.progress: Optional[float] = None
+        self.total: Optional[float] = None
+        self.message: Optional[str] = None
+        self.updates = 0
+
+
+class ToolProgressAnnouncer:
+    """
+    Keeps the user informed while slow tool calls run.
+
+    Every call is sent with a progress callback, so the MCP server's progress notifications reach
+    the agent. Once a call runs longer than the threshold, a short status phrase is spoken straight
+    to the TTS, without an LLM request: the server's own progress message if it is short enough
+    to say, the percentage done if the server reports a total, or else a fixed phrase. Phrases are
+    spaced by repeat_interval across all calls, so parallel calls do not talk over each other.
+    """
+
+    def __init__(self, config: ToolProgressConfig, say: Callable[[str], Any]):
+        """
+        Args:
+            config: The profile's toolProgress settings
+            say: Speaks a phrase, without adding it to the chat history
+        """
+        self.config = config
+        self.say = say
+        self._tasks: set = set()
+        self._last_said = 0.0
+        self.calls = 0
+        self.notifications = 0
+        self.phrases_said = 0
+
+    @contextlib.asynccontextmanager
+    async def track(self, tool_name: str) -> AsyncIterator[Optional[ProgressCallback]]:
+        """
+        Announces a tool call while it runs.
+
+        Yields:
+            The progress callback to send the call with, None if announcements are disabled
+        """
+        if not self.config.enabled:
+            yield None
+            return
+        call = _TrackedCall(tool_name)
+        self.calls += 1
+
+        async def on_progress(progress: float, total: Optional[float], message: Optional[str]) -> None:
+            call.progress, call.total, call.message = progress, total, message
+            self.notifications += 1
+            logger.debug(f"Progress of {tool_name}: {progress}/{total} {message or ''}")
+
+        task = asyncio.create_task(self._announce(call), name=f"tool-progress-{tool_name}")
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        try:
+            yield on_progress
+        finally:
+            task.cancel()
+
+    async def _announce(self, call: _TrackedCall) -> None:
+        await asyncio.sleep(self.config.threshold)
+        while call.updates < self.config.max_updates:
+            wait = self._last_said + self.config.repeat_interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+            phrase = self.phrase(call)
+            self._last_said = time.monotonic()
+            call.updates += 1
+            try:
+                self.say(phrase)
+            except RuntimeError as e:
+                # The session is closing
+                logger.debug(f"Could not say the status of {call.tool_name}: {e}")
+                return
+            self.phrases_said += 1
+            logger.info(f"Said status of {call.tool_name} after {time.monotonic() - call.started:.1f}s: {phrase!r}")
+
+    def phrase(self, call: _TrackedCall) -> str:
+        """The status phrase for a call, from its latest progress if the server sent any."""
+        message = (call.message or "").strip()
+        if message and len(message.split()) <= MAX_MESSAGE_WORDS and "://" not in message:
+            return message if message[-1] in ".!?" else f"{message}..."
+        if call.progress is not None and call.total:
+            percent = round(100 * min(call.progress / call.total, 1.0))
+            return f"About {percent} percent done."
+        if call.tool_name in self.config.tools:
+            return self.config.tools[call.tool_name]
+        phrases = self.config.phrases or ToolProgressConfig().phrases
+        return phrases[min(call.updates, len(phrases) - 1)]
+
+    async def aclose(self) -> None:
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, int]:
+        """Number of calls tracked, progress notifications received and status phrases said."""
+        return {"calls": self.calls, "notifications": self.notifications, "phrases_said": self.phrases_said}
@@ -0,0 +1,153 @@
+import json
+import logging
+import re
+from typing import Any, Callable, Dict, List, Optional
+
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+# Rough size of a token, used to turn token budgets into byte budgets
+BYTES_PER_TOKEN = 4
+
+_DATA_URI_RE = re.compile(r"data:[\w/+.-]+;base64,[A-Za-z0-9+/=\s]+")
+_BASE64_RUN_RE = re.compile(r"[A-Za-z0-9+/]{200,}={0,2}")
+_SCRIPT_STYLE_RE = re.compile(r"<(script|style|svg|noscript)\b.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+_COMMENT_RE = re.compile(r"<!--.*?-->", re.DOTALL)
+_TAG_RE = re.compile(r"</?[a-zA-Z][^>]*>")
+_HTML_HINT_RE = re.compile(r"<(html|body|div|span|p|a|script|style|head|meta|table)\b", re.IGNORECASE)
+_BLANK_RE = re.compile(r"[ \t]+")
+_BLANK_LINES_RE = re.compile(r"\n\s*\n+")
+
+
+class ToolOutputBudget(BaseModel):
+    # Maximum size of the output in bytes
+    max_bytes: Optional[int] = None
+    # Maximum size of the output in tokens, converted with BYTES_PER_TOKEN
+    max_tokens: Optional[int] = None
+    # JSON fields to keep; applied to the result object or to each object of a result list
+    fields: List[str] = []
+
+    def byte_limit(self, default: int) -> int:
+        """The effective byte budget, the stricter of the byte and token limits."""
+        limits = [limit for limit in (self.max_bytes, self.max_tokens and self.max_tokens * BYTES_PER_TOKEN) if limit]
+        return min(limits) if limits else default
+
+
+class ToolOutputConfig(BaseModel):
+    # Byte budget for tools without one of their own
+    default_max_bytes: int = 16000
+    # Budgets by tool name
+    tools: Dict[str, ToolOutputBudget] = {}
+
+
+# A reduction stage takes the output, the tool's budget and its byte limit and returns the reduced output
+ReductionStage = Callable[[str, ToolOutputBudget, int], str]
+
+
+def strip_base64(text: str, budget: ToolOutputBudget, max_bytes: int) -> str:
+    """Replaces data URIs and long base64 runs with a short placeholder."""
+    text = _DATA_URI_RE.sub(lambda m: f"[base64 data, {len(m.group(0))} bytes]", text)
+    return _BASE64_RUN_RE.sub(lambda m: f"[base64 data, {len(m.group(0))} bytes]", text)
+
+
+def strip_markup(text: str, budget: ToolOutputBudget, max_bytes: int) -> str:
+    """Turns HTML into its visible text."""
+    if text.lstrip().startswith(("{", "[")) or not _HTML_HINT_RE.search(text):
+        return text
+    text = _SCRIPT_STYLE_RE.sub("", text)
+    text = _COMMENT_RE.sub("", text)
+    text = _TAG_RE.sub(" ", text)
+    text = _BLANK_RE.sub(" ", text)
+    return _BLANK_LINES_RE.sub("\n", text).strip()
+
+
+def _pick_fields(value: Any, fields: List[str]) -> Any:
+    if isinstance(value, list):
+        return [_pick_fields(item, fields) for item in value]
+    if isinstance(value, dict):
+        picked = {field: value[field] for field in fields if field in value}
+        if picked:
+            return picked
+        # The fields may live one level down, e.g. in a {"data": {...}} envelope
+        return {key: _pick_fields(nested, fields) for key, nested in value.items() if isinstance(nested, (dict, list))} or value
+    return value
+
+
+def select_json_fields(text: str, budget: ToolOutputBudget, max_bytes: int) -> str:
+    """Keeps only the configured fields of a JSON result and drops the whitespace."""
+    try:
+        value = json.loads(text)
+    except ValueError:
+        return text
+    if budget.fields:
+        value = _pick_fields(value, budget.fields)
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+def truncate(text: str, budget: ToolOutputBudget, max_bytes: int) -> str:
+    """Cuts the output to the byte budget, noting how much was dropped."""
+    encoded = text.encode("utf-8")
+    if len(encoded) <= max_bytes:
+        return text
+    kept = encoded[:max_bytes].decode("utf-8", errors="ignore")
+    return f"{kept}\n[truncated {len(encoded) - max_bytes} bytes]"
+
+
+DEFAULT_STAGES: List[ReductionStage] = [strip_base64, strip_markup, select_json_fields, truncate]
+
+
+class ToolOutputReducer:
+    """
+    Shrinks tool outputs to a per-tool budget before they reach the LLM.
+
+    The output runs through a list of stages (base64 and markup stripping, JSON field
+    selection, truncation); custom stages can be passed in. Bytes saved are counted per call.
+    """
+
+    def __init__(self, config: Optional[ToolOutputConfig] = None, stages: Optional[List[ReductionStage]] = None):
+        """
+        Args:
+            config: Default and per-tool budgets
+            stages: Reduction stages applied in order, DEFAULT_STAGES if not set
+        """
+        self.config = config or ToolOutputConfig()
+        self.stages = stages if stages is not None else list(DEFAULT_STAGES)
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def budget_for(self, tool_name: str) -> ToolOutputBudget:
+        """The budget of a tool, an empty one that uses the default byte limit if not configured."""
+        return self.config.tools.get(tool_name) or ToolOutputBudget()
+
+    def reduce(self, tool_name: str, text: str) -> str:
+        """
+        Reduces a tool output and records how many bytes it saved.
+
+        Args:
+            tool_name: The tool that produced the output
+            text: The output as it would be returned to the LLM
+
+        Returns:
+            The reduced output
+        """
+        budget = self.budget_for(tool_name)
+        max_bytes = budget.byte_limit(self.config.default_max_bytes)
+        reduced = text
+        for stage in self.stages:
+            try:
+                reduced = stage(reduced, budget, max_bytes)
+            except Exception as e:
+                logger.warning(f"Reduction stage {getattr(stage, '__name__', stage)} failed for '{tool_name}': {e}")
+
+        size_in = len(text.encode("utf-8"))
+        size_out = len(reduced.encode("utf-8"))
+        self.bytes_in += size_in
+        self.bytes_out += size_out
+        if size_out < size_in:
+            logger.info(f"Reduced output of '{tool_name}' from {size_in} to {size_out} bytes ({size_in - size_out} saved)")
+        return reduced
+
+    def stats(self) -> Dict[str, Any]:
+        """Total bytes before and after reduction."""
+        return {"bytes_in": self.bytes_in, "bytes_out": self.bytes_out, "bytes_saved": self.bytes_in - self.bytes_out}
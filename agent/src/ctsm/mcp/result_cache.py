@@ -0,0 +1,101 @@
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from mcp.types import Tool as MCPTool
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+# Key of a cached result: server name, tool name and canonical arguments
+ResultKey = Tuple[str, str, str]
+
+
+def canonical_arguments(arguments: Optional[Dict[str, Any]]) -> str:
+    """Serializes tool arguments so that equal arguments always produce the same string."""
+    return json.dumps(arguments or {}, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+class ToolResultCacheConfig(BaseModel):
+    # Maximum number of results kept, least recently used ones are dropped first
+    max_entries: int = 256
+    # TTL in seconds for tools the server annotates as read-only or idempotent
+    default_ttl: float = 60.0
+    # Whether the readOnlyHint/idempotentHint annotations enable caching
+    use_annotations: bool = True
+    # TTL in seconds by tool name; overrides the annotations, 0 disables caching for a tool
+    tools: Dict[str, float] = {}
+
+
+class ToolResultCache:
+    """
+    Bounded LRU cache of tool results with a TTL per tool.
+
+    Only tools configured in the profile, or annotated by their server as read-only or
+    idempotent, are cached. Hit and miss counters are kept for reporting.
+    """
+
+    def __init__(self, config: Optional[ToolResultCacheConfig] = None):
+        """
+        Args:
+            config: Size, TTLs and which tools are cached, the defaults if not set
+        """
+        self.config = config or ToolResultCacheConfig()
+        self._entries: OrderedDict[ResultKey, Tuple[float, str]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def ttl_for(self, tool: MCPTool) -> Optional[float]:
+        """
+        Returns the TTL for results of a tool, or None if the tool must not be cached.
+
+        Args:
+            tool: The MCP tool definition, including its annotations
+        """
+        if tool.name in self.config.tools:
+            return self.config.tools[tool.name] or None
+        annotations = tool.annotations
+        if self.config.use_annotations and annotations is not None and (annotations.readOnlyHint or annotations.idempotentHint):
+            return self.config.default_ttl
+        return None
+
+    def enable(self, tool_name: str, ttl: float) -> None:
+        """Caches results of a tool for the given TTL, unless the profile already configures it."""
+        self.config.tools.setdefault(tool_name, ttl)
+
+    def get(self, key: ResultKey) -> Optional[str]:
+        """Returns a cached result that has not expired, counting the hit or miss."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+        self.misses += 1
+        return None
+
+    def contains(self, key: ResultKey) -> bool:
+        """Whether an unexpired result is cached, without counting a hit or miss."""
+        entry = self._entries.get(key)
+        return entry is not None and entry[0] > time.monotonic()
+
+    def put(self, key: ResultKey, value: str, ttl: float) -> None:
+        """Stores a result, evicting the least recently used entries over the size limit."""
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.config.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit and miss counters and the current size."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+        }
@@ -0,0 +1,96 @@
+import asyncio
+import contextlib
+import logging
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class CallScheduler:
+    """
+    Limits the number of tool calls in flight on one server and admits waiting calls in FIFO order.
+
+    Each server has its own scheduler, so calls to different servers run in parallel and a slow
+    server only queues its own calls. Queue depth and wait times are recorded for reporting.
+    """
+
+    def __init__(self, name: str, max_in_flight: int = 4):
+        """
+        Args:
+            name: Name of the server, used in logs
+            max_in_flight: Maximum number of calls sent to the server at the same time
+        """
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+        self.calls = 0
+        self.queued = 0
+        self.max_queue_depth = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of calls waiting for a slot."""
+        return sum(1 for waiter in self._waiters if not waiter.done())
+
+    @contextlib.asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Waits for a free slot, in arrival order, and holds it for the duration of the call."""
+        started = time.monotonic()
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self.in_flight += 1
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            self.queued += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+            logger.debug(f"Call to {self.name} queued behind {self.in_flight} in flight, queue depth {self.queue_depth}")
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # The slot was handed over just before the cancellation, pass it on
+                    self._release()
+                else:
+                    self._waiters.remove(waiter)
+                raise
+
+        waited = time.monotonic() - started
+        self.calls += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        if waited > 1.0:
+            logger.info(f"Call to {self.name} waited {waited:.2f}s for a slot")
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _release(self) -> None:
+        # The slot goes straight to the oldest waiter, so later arrivals cannot overtake it
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Current and maximum queue depth and the wait times of admitted calls."""
+        return {
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "calls": self.calls,
+            "queued": self.queued,
+            "avg_wait_seconds": round(self.total_wait / self.calls, 3) if self.calls else 0.0,
+            "max_wait_seconds": round(self.max_wait, 3),
+        }
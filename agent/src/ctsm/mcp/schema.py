@@ -0,0 +1,295 @@
+import hashlib
+import json
+import logging
+import math
+import re
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from pydantic import BaseModel
+
+from .reducer import BYTES_PER_TOKEN
+
+logger = logging.getLogger(__name__)
+
+# Keywords that do not change what the LLM may send
+DROPPED_KEYWORDS = frozenset({
+    "$schema", "$id", "$anchor", "$comment", "title", "examples", "example", "deprecated",
+    "readOnly", "writeOnly", "contentMediaType", "contentEncoding",
+})
+# Keywords whose value maps names to subschemas
+SCHEMA_MAP_KEYWORDS = ("properties", "patternProperties", "dependentSchemas")
+# Keywords whose value is a list of subschemas
+SCHEMA_LIST_KEYWORDS = ("anyOf", "oneOf", "allOf", "prefixItems")
+# Keywords whose value is a subschema
+SCHEMA_KEYWORDS = ("items", "additionalProperties", "not", "if", "then", "else", "contains", "propertyNames")
+# Shared definitions up to this size are inlined at every use, larger ones stay in $defs
+INLINE_SHARED_BYTES = 200
+
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+")
+
+# The last compacted description and schema of each tool, with the hash of its input, shared by all
+# sessions of the process; keyed by tool name so a tool whose schema changes replaces its old entry
+_compacted: Dict[str, Tuple[str, Tuple[Optional[str], Dict[str, Any]]]] = {}
+
+
+class SchemaCompactionConfig(BaseModel):
+    # Whether tool schemas are compacted before they are sent to the LLM
+    enabled: bool = True
+    # Token budget of a tool description
+    description_tokens: int = 80
+    # Token budget of each parameter description
+    property_description_tokens: int = 30
+    # Description budgets by tool name, overriding description_tokens
+    tools: Dict[str, int] = {}
+
+
+def count_tokens(value: Any) -> int:
+    """Estimated token count of a string or of a JSON value, with BYTES_PER_TOKEN."""
+    text = value if isinstance(value, str) else json.dumps(value, separators=(",", ":"))
+    return math.ceil(len(text.encode()) / BYTES_PER_TOKEN)
+
+
+def trim_text(text: str, max_tokens: int) -> str:
+    """
+    Shortens text to a token budget, keeping whole sentences where possible.
+
+    Args:
+        text: The description
+        max_tokens: Its budget
+
+    Returns:
+        The text with whitespace collapsed, cut after the last sentence or word that fits
+    """
+    text = " ".join(text.split())
+    max_bytes = max_tokens * BYTES_PER_TOKEN
+    if len(text.encode()) <= max_bytes:
+        return text
+    kept = ""
+    for sentence in _SENTENCE_END_RE.split(text):
+        candidate = f"{kept} {sentence}" if kept else sentence
+        if len(candidate.encode()) > max_bytes:
+            break
+        kept = candidate
+    if kept:
+        return kept
+    cut = text.encode()[: max_bytes - len("…".encode())].decode(errors="ignore")
+    return cut.rsplit(" ", 1)[0].rstrip(",;:") + "…"
+
+
+def _subschemas(schema: Dict[str, Any]) -> Iterable[Any]:
+    for keyword in SCHEMA_MAP_KEYWORDS:
+        if isinstance(schema.get(keyword), dict):
+            yield from schema[keyword].values()
+    for keyword in SCHEMA_LIST_KEYWORDS:
+        if isinstance(schema.get(keyword), list):
+            yield from schema[keyword]
+    for keyword in SCHEMA_KEYWORDS:
+        if isinstance(schema.get(keyword), dict):
+            yield schema[keyword]
+
+
+def _refs(schema: Any) -> List[str]:
+    """All $ref values in a schema, nested ones included."""
+    if not isinstance(schema, dict):
+        return []
+    refs = [schema["$ref"]] if isinstance(schema.get("$ref"), str) else []
+    for subschema in _subschemas(schema):
+        refs.extend(_refs(subschema))
+    return refs
+
+
+class _RefInliner:
+    """
+    Resolves the local $refs of a schema.
+
+    Identical definitions are merged. A definition used once, or small enough, is inlined where it is
+    used; recursive and large shared ones stay in $defs under their merged name.
+    """
+
+    def __init__(self, schema: Dict[str, Any]):
+        self.definitions: Dict[str, Dict[str, Any]] = {}
+        for keyword in ("$defs", "definitions"):
+            for name, definition in (schema.get(keyword) or {}).items():
+                if isinstance(definition, dict):
+                    self.definitions[f"#/{keyword}/{name}"] = definition
+
+        # Identical definitions share the name of the first one
+        self.canonical: Dict[str, str] = {}
+        by_content: Dict[str, str] = {}
+        for pointer, definition in self.definitions.items():
+            content = json.dumps(definition, sort_keys=True)
+            self.canonical[pointer] = by_content.setdefault(content, pointer)
+
+        uses: Dict[str, int] = {}
+        body = {key: value for key, value in schema.items() if key not in ("$defs", "definitions")}
+        for ref in _refs(body) + [ref for definition in self.definitions.values() for ref in _refs(definition)]:
+            if ref in self.canonical:
+                uses[self.canonical[ref]] = uses.get(self.canonical[ref], 0) + 1
+        self.inlined = {
+            pointer for pointer in set(self.canonical.values())
+            if not self._recursive(pointer)
+            and (uses.get(pointer, 0) <= 1 or len(json.dumps(self.definitions[pointer])) <= INLINE_SHARED_BYTES)
+        }
+        self.kept: Dict[str, Dict[str, Any]] = {}
+        # Name each kept definition has in the compacted $defs
+        self._names: Dict[str, str] = {}
+
+    def _recursive(self, pointer: str) -> bool:
+        seen: Set[str] = set()
+        pending = [pointer]
+        while pending:
+            for ref in _refs(self.definitions[pending.pop()]):
+                target = self.canonical.get(ref)
+                if target == pointer:
+                    return True
+                if target is not None and target not in seen:
+                    seen.add(target)
+                    pending.append(target)
+        return False
+
+    def resolve(self, schema: Dict[str, Any]) -> Dict[str, Any]:
+        """The schema with its refs inlined or pointing to the merged definitions."""
+        ref = schema.get("$ref")
+        if not isinstance(ref, str) or ref not in self.canonical:
+            return schema
+        pointer = self.canonical[ref]
+        siblings = {key: value for key, value in schema.items() if key != "$ref"}
+        if pointer in self.inlined:
+            # Keywords next to the $ref, like a description, override the definition's;
+            # a definition that is itself a $ref is resolved in turn
+            return self.resolve({**self.definitions[pointer], **siblings})
+        name = self._kept_name(pointer)
+        self.kept.setdefault(name, self.definitions[pointer])
+        return {"$ref": f"#/$defs/{name}", **siblings}
+
+    def _kept_name(self, pointer: str) -> str:
+        """The definition's name, with a suffix if a definition under the other keyword took it."""
+        if pointer not in self._names:
+            base = name = pointer.rsplit("/", 1)[1]
+            taken = set(self._names.values())
+            suffix = 2
+            while name in taken:
+                name = f"{base}_{suffix}"
+                suffix += 1
+            self._names[pointer] = name
+        return self._names[pointer]
+
+
+class SchemaCompactor:
+    """
+    Shrinks tool descriptions and input schemas before they are sent to the LLM.
+
+    Descriptions are cut to their token budget, keywords that do not constrain the arguments are
+    dropped and local $refs are inlined. Results are memoized per tool name, together with the hash of
+    the tool's schema and description, so a tool list is compacted once per process and the memo holds
+    one entry per tool. The savings of every tool are kept, and each LLM request adds the savings of
+    the tools it is sent with.
+    """
+
+    def __init__(self, config: SchemaCompactionConfig):
+        self.config = config
+        # Estimated tokens of each tool definition before and after compaction
+        self._tokens: Dict[str, Tuple[int, int]] = {}
+        self.memo_hits = 0
+        self.requests = 0
+        self.tokens_saved = 0
+
+    def signature(self) -> str:
+        """Identifies the compaction settings, schemas compacted with other settings are compacted again."""
+        return hashlib.sha256(self.config.model_dump_json().encode()).hexdigest()[:16]
+
+    def compact(self, name: str, description: Optional[str], schema: Dict[str, Any]) -> Tuple[Optional[str], Dict[str, Any]]:
+        """
+        Compacts the description and input schema of a tool.
+
+        Args:
+            name: The tool name, used for its description budget
+            description: The tool description
+            schema: The tool's input schema, not modified
+
+        Returns:
+            The compacted description and schema, shared with other callers and not to be modified
+        """
+        if not self.config.enabled:
+            return description, schema
+        budget = self.config.tools.get(name, self.config.description_tokens)
+        key = hashlib.sha256(
+            json.dumps([description, schema, budget, self.config.property_description_tokens], sort_keys=True).encode()
+        ).hexdigest()
+        memo = _compacted.get(name)
+        if memo is not None and memo[0] == key:
+            compacted = memo[1]
+            self.memo_hits += 1
+        else:
+            compacted_description = trim_text(description, budget) if description else description
+            compacted = (compacted_description, self._compact_schema(schema))
+            _compacted[name] = (key, compacted)
+
+        before = count_tokens({"name": name, "description": description, "parameters": schema})
+        after = count_tokens({"name": name, "description": compacted[0], "parameters": compacted[1]})
+        self._tokens[name] = (before, after)
+        logger.debug(f"Compacted schema of {name} from {before} to {after} tokens")
+        return compacted
+
+    def _compact_schema(self, schema: Dict[str, Any]) -> Dict[str, Any]:
+        if not isinstance(schema, dict):
+            return schema
+        inliner = _RefInliner(schema)
+        compacted = self._compact_node(schema, inliner)
+        # Definitions still referenced, compacted the same way; compacting them may reference more
+        definitions: Dict[str, Dict[str, Any]] = {}
+        while len(definitions) < len(inliner.kept):
+            for name, definition in list(inliner.kept.items()):
+                if name not in definitions:
+                    definitions[name] = self._compact_node(definition, inliner)
+        if definitions:
+            compacted["$defs"] = definitions
+        return compacted
+
+    def _compact_node(self, schema: Any, inliner: _RefInliner) -> Any:
+        if not isinstance(schema, dict):
+            return schema
+        schema = inliner.resolve(schema)
+        compacted: Dict[str, Any] = {}
+        for keyword, value in schema.items():
+            if keyword in DROPPED_KEYWORDS or keyword in ("$defs", "definitions"):
+                continue
+            if keyword == "description":
+                if isinstance(value, str) and value.strip():
+                    compacted[keyword] = trim_text(value, self.config.property_description_tokens)
+                continue
+            if keyword in SCHEMA_MAP_KEYWORDS and isinstance(value, dict):
+                compacted[keyword] = {name: self._compact_node(subschema, inliner) for name, subschema in value.items()}
+            elif keyword in SCHEMA_LIST_KEYWORDS and isinstance(value, list):
+                compacted[keyword] = [self._compact_node(subschema, inliner) for subschema in value]
+            elif keyword in SCHEMA_KEYWORDS and isinstance(value, dict):
+                compacted[keyword] = self._compact_node(value, inliner)
+            else:
+                compacted[keyword] = value
+        return compacted
+
+    def record_request(self, tool_names: Iterable[str]) -> int:
+        """
+        Counts the tokens an LLM request saves with the given tools.
+
+        Returns:
+            The estimated prompt tokens saved
+        """
+        saved = sum(before - after for before, after in (self._tokens.get(name, (0, 0)) for name in tool_names))
+        self.requests += 1
+        self.tokens_saved += saved
+        logger.debug(f"Compacted tool schemas saved about {saved} prompt tokens on this request")
+        return saved
+
+    def stats(self) -> Dict[str, Any]:
+        """Estimated tokens of all tools before and after compaction, and the average saving per request."""
+        before = sum(tokens[0] for tokens in self._tokens.values())
+        after = sum(tokens[1] for tokens in self._tokens.values())
+        return {
+            "tools": len(self._tokens),
+            "tokens_before": before,
+            "tokens_after": after,
+            "memo_hits": self.memo_hits,
+            "requests": self.requests,
+            "average_saved_per_request": round(self.tokens_saved / self.requests) if self.requests else 0,
+        }
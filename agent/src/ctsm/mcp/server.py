@@ -1,8 +1,11 @@
 import asyncio
+import contextlib
 import logging
+import time
 from contextlib import AbstractAsyncContextManager, AsyncExitStack
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
+import anyio
 import mcp.types
 
 # Import from the installed mcp package
@@ -10,8 +13,15 @@ from anyio.streams.memory import MemoryObjectReceiveStream, MemoryObjectSendStre
 from mcp.client.session import ClientSession
 from mcp.client.sse import sse_client
 from mcp.client.stdio import StdioServerParameters, stdio_client
-from mcp.types import CallToolResult, ContentBlock, JSONRPCMessage, TextContent
+from mcp.shared.exceptions import McpError
+from mcp.shared.session import ProgressFnT
+from mcp.types import CallToolResult, JSONRPCMessage
 from mcp.types import Tool as MCPTool
+from opentelemetry import context as otel_context
+
+from .metrics import ToolCallMetrics
+from .scheduler import CallScheduler
+from .tracing import tracer
 
 
 # Base class for MCP servers
@@ -29,8 +39,13 @@ class MCPServer:
         """List the tools available on the server."""
         raise NotImplementedError
 
-    async def call_tool(self, tool_name: str, arguments: Optional[Dict[str, Any]] = None) -> CallToolResult:
-        """Invoke a tool on the server."""
+    async def call_tool(self, tool_name: str, arguments: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None,
+                        progress_callback: Optional[ProgressFnT] = None) -> CallToolResult:
+        """
+        Invoke a tool on the server, raising TimeoutError if it does not return within the timeout.
+
+        With a progress callback, the call is sent with a progress token and the callback gets the server's progress notifications.
+        """
         raise NotImplementedError
 
     async def cleanup(self):
@@ -39,9 +54,26 @@ class MCPServer:
 
 # Base class for MCP servers that use a ClientSession
 class _MCPServerWithClientSession(MCPServer):
-    """Base class for MCP servers that use a ClientSession to communicate with the server."""
+    """
+    Base class for MCP servers that use a ClientSession to communicate with the server.
+
+    The transport is owned by a supervisor task. It pings the server periodically, and when
+    the transport dies (e.g. the server process crashed) it reconnects with exponential backoff
+    and replays initialize. Calls interrupted by a lost connection are retried after the
+    reconnect, but only for tools that are safe to run twice.
+    """
 
-    def __init__(self, cache_tools_list: bool):
+    def __init__(
+        self,
+        cache_tools_list: bool,
+        connect_timeout: Optional[float] = None,
+        *,
+        ping_interval: Optional[float] = 15.0,
+        ping_timeout: float = 10.0,
+        max_backoff: float = 30.0,
+        idempotent_tools: Optional[Sequence[str]] = None,
+        max_in_flight: int = 4,
+    ):
         """
         Args:
             cache_tools_list: Whether to cache the tools list. If True, the tools list will be
@@ -49,17 +81,55 @@ class _MCPServerWithClientSession(MCPServer):
             fetched from the server on each call to list_tools(). You should set this to True
             if you know the server will not change its tools list, because it can drastically
             improve latency.
+            connect_timeout: Seconds to wait for the server to start and initialize. None means
+            the caller's default applies.
+            ping_interval: Seconds between liveness pings. None disables supervision, a dead
+            server then stays unavailable.
+            ping_timeout: Seconds a ping may take before the transport is considered dead.
+            max_backoff: Upper bound in seconds of the delay between reconnect attempts.
+            idempotent_tools: Tools that may be retried after a reconnect, in addition to the
+            ones the server annotates as read-only or idempotent.
+            max_in_flight: Maximum number of tool calls sent to the server at the same time;
+            further calls wait in FIFO order.
         """
         self.session: Optional[ClientSession] = None
-        self.exit_stack: AsyncExitStack = AsyncExitStack()
         self._cleanup_lock: asyncio.Lock = asyncio.Lock()
         self.cache_tools_list = cache_tools_list
+        self.connect_timeout = connect_timeout
 
         # The cache is always dirty at startup, so that we fetch tools at least once
         self._cache_dirty = True
         self._tools_list: Optional[List[MCPTool]] = None
         self.logger = logging.getLogger(__name__)
 
+        # Name and version the server reported when it was initialized
+        self.server_info: Optional[mcp.types.Implementation] = None
+        # Set once a connection attempt finished, so calls made while connecting can wait for it
+        self._connect_done: asyncio.Event = asyncio.Event()
+
+        # Completed, cancelled and timed out calls
+        self.call_metrics = ToolCallMetrics()
+        # Created lazily because the name of the subclass is not known yet
+        self._max_in_flight = max_in_flight
+        self._scheduler: Optional[CallScheduler] = None
+        self._notify_tasks: set[asyncio.Task] = set()
+
+        # Supervision
+        self.ping_interval = ping_interval
+        self.ping_timeout = ping_timeout
+        self.max_backoff = max_backoff
+        self.idempotent_tools = set(idempotent_tools or [])
+        self.reconnects = 0
+        self._runner: Optional[asyncio.Task] = None
+        self._stopping = False
+        # Wakes the supervisor early, to stop or to check a connection a call found broken
+        self._wakeup: asyncio.Event = asyncio.Event()
+        # Set when the current connection ends, so calls waiting on it fail fast
+        self._session_lost: asyncio.Event = asyncio.Event()
+        # Incremented on every (re)connect; notified whenever the session changes
+        self._generation = 0
+        self._session_changed: asyncio.Condition = asyncio.Condition()
+
     def create_streams(
         self,
     ) -> AbstractAsyncContextManager[
@@ -83,18 +153,144 @@ class _MCPServerWithClientSession(MCPServer):
         self._cache_dirty = True
 
     async def connect(self):
-        """Connect to the server."""
+        """Connect to the server and start supervising the connection."""
+        if self._runner is not None and not self._runner.done():
+            # Already connected or connecting, e.g. a server the warm agent host keeps across sessions
+            await self._connect_done.wait()
+            if self._runner is None:
+                raise ConnectionError(f"Could not connect to MCP server {self.name}")
+            return
+        self._connect_done.clear()
+        self._stopping = False
+        ready: asyncio.Future = asyncio.get_running_loop().create_future()
+        # The transport contexts must be entered and exited in the same task, so a dedicated task owns them
         try:
-            transport = await self.exit_stack.enter_async_context(self.create_streams())
-            read, write = transport
-            session = await self.exit_stack.enter_async_context(ClientSession(read, write))
-            await session.initialize()
-            self.session = session
+            with tracer.start_as_current_span("mcp.connect", attributes={"mcp.server.name": self.name}):
+                # Created inside the span so the supervisor's first initialize nests under it
+                self._runner = asyncio.create_task(self._run(ready))
+                await ready
             self.logger.info(f"Connected to MCP server: {self.name}")
+        except asyncio.CancelledError:
+            await self.cleanup()
+            raise
         except Exception as e:
             self.logger.error(f"Error initializing MCP server: {e}")
             await self.cleanup()
             raise
+        finally:
+            self._connect_done.set()
+
+    async def _run(self, ready: asyncio.Future) -> None:
+        """Owns the transport: connects, watches the connection and reconnects until cleanup()."""
+        attempt = 0
+        while not self._stopping:
+            try:
+                async with AsyncExitStack() as stack:
+                    with tracer.start_as_current_span("mcp.transport.open", attributes={"mcp.server.name": self.name}):
+                        read, write = await stack.enter_async_context(self.create_streams())
+                        session = await stack.enter_async_context(ClientSession(read, write))
+                    with tracer.start_as_current_span("mcp.session.initialize", attributes={"mcp.server.name": self.name}) as span:
+                        initialize_result = await session.initialize()
+                        span.set_attribute("mcp.server.version", initialize_result.serverInfo.version)
+                        span.set_attribute("mcp.reconnect", ready.done())
+                    self.server_info = initialize_result.serverInfo
+                    await self._set_session(session)
+                    if ready.done():
+                        self.reconnects += 1
+                        self.logger.info(f"Reconnected to MCP server: {self.name}")
+                    else:
+                        ready.set_result(None)
+                    attempt = 0
+                    await self._watch(session)
+            except Exception as e:
+                if not ready.done():
+                    ready.set_exception(e)
+                    return
+                self.logger.warning(f"Connection to MCP server {self.name} lost: {e}")
+            finally:
+                await self._set_session(None)
+
+            if self._stopping or self.ping_interval is None:
+                return
+            # Reconnects start their own trace instead of nesting under the long-finished connect span
+            otel_context.attach(otel_context.Context())
+            delay = min(2.0 ** attempt, self.max_backoff)
+            attempt += 1
+            self.logger.info(f"Reconnecting to MCP server {self.name} in {delay:.0f}s")
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            self._wakeup.clear()
+
+    async def _watch(self, session: ClientSession) -> None:
+        """Returns when the server is stopped, raises ConnectionError once the transport is found dead."""
+        while True:
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), self.ping_interval)
+            self._wakeup.clear()
+            if self._stopping:
+                return
+            try:
+                await asyncio.wait_for(session.send_ping(), self.ping_timeout)
+            except Exception as e:
+                raise ConnectionError(f"ping failed: {e!r}") from e
+
+    async def _set_session(self, session: Optional[ClientSession]) -> None:
+        async with self._session_changed:
+            if session is None:
+                self._session_lost.set()
+            else:
+                self._generation += 1
+                self._session_lost = asyncio.Event()
+            self.session = session
+            self._session_changed.notify_all()
+
+    async def _wait_for_session(self, after_generation: int = 0) -> Tuple[ClientSession, asyncio.Event, int]:
+        """
+        Waits until a session newer than the given generation is available.
+
+        Returns:
+            The session, the event set when it is lost, and its generation
+        """
+        wait = self.connect_timeout or 30.0
+        if not self.session and not self._connect_done.is_set():
+            # Tools registered from the on-disk cache can be invoked while the server is still starting
+            try:
+                await asyncio.wait_for(self._connect_done.wait(), wait)
+            except TimeoutError:
+                # Not a TimeoutError, which callers report as the tool's deadline running out
+                raise ConnectionError(f"MCP server {self.name} not connected after {wait:g}s") from None
+
+        def available() -> bool:
+            return self.session is not None and self._generation > after_generation
+
+        if not available():
+            if self._runner is None or self._runner.done():
+                raise RuntimeError("Server not initialized. Make sure you call connect() first.")
+            # The supervisor is reconnecting
+            try:
+                async with asyncio.timeout(wait), self._session_changed:
+                    await self._session_changed.wait_for(lambda: available() or self._runner is None or self._runner.done())
+            except TimeoutError:
+                raise ConnectionError(f"MCP server {self.name} not reconnected after {wait:g}s") from None
+            if not available():
+                raise RuntimeError(f"MCP server {self.name} is not connected")
+        return self.session, self._session_lost, self._generation
+
+    @property
+    def scheduler(self) -> CallScheduler:
+        """Limits the calls in flight on this server."""
+        if self._scheduler is None:
+            self._scheduler = CallScheduler(self.name, self._max_in_flight)
+        return self._scheduler
+
+    def is_idempotent(self, tool_name: str) -> bool:
+        """Whether a tool may be run again after its call was cut off by a lost connection."""
+        if tool_name in self.idempotent_tools:
+            return True
+        for tool in self._tools_list or []:
+            if tool.name == tool_name and tool.annotations is not None:
+                return bool(tool.annotations.readOnlyHint or tool.annotations.idempotentHint)
+        return False
 
     async def list_tools(self) -> List[MCPTool]:
         """List the tools available on the server."""
@@ -110,34 +306,134 @@ class _MCPServerWithClientSession(MCPServer):
 
         try:
             # Fetch the tools from the server
-            result = await self.session.list_tools()
+            with tracer.start_as_current_span("mcp.list_tools", attributes={"mcp.server.name": self.name}) as span:
+                result = await self.session.list_tools()
+                span.set_attribute("mcp.tools.count", len(result.tools))
             self._tools_list = result.tools
             return self._tools_list
         except Exception as e:
             self.logger.error(f"Error listing tools: {e}")
             raise
 
-    async def call_tool(self, tool_name: str, arguments: Optional[Dict[str, Any]] = None) -> CallToolResult:
-        """Invoke a tool on the server."""
-        if not self.session:
-            raise RuntimeError("Server not initialized. Make sure you call connect() first.")
+    async def call_tool(self, tool_name: str, arguments: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None,
+                        progress_callback: Optional[ProgressFnT] = None) -> CallToolResult:
+        """
+        Invoke a tool on the server, passing its progress notifications to the progress callback.
 
+        If the call is cancelled, e.g. because the user interrupted the agent, or does not return
+        within the timeout, the server is sent a cancellation notification so it can stop working on it.
+        The timeout includes the time spent waiting for a free slot and for a reconnect.
+        """
         arguments = arguments or {}
+        started = time.monotonic()
+        try:
+            with tracer.start_as_current_span("mcp.call_tool", attributes={"mcp.server.name": self.name, "mcp.tool.name": tool_name}):
+                async with asyncio.timeout(timeout):
+                    async with self.scheduler.slot():
+                        result = await self._call_with_retry(tool_name, arguments, progress_callback)
+        except (asyncio.CancelledError, TimeoutError) as e:
+            timed_out = isinstance(e, TimeoutError)
+            elapsed = time.monotonic() - started
+            saved = self.call_metrics.record_cancelled(tool_name, elapsed, timeout, timed_out)
+            reason = f"Timed out after {timeout}s" if timed_out else "Cancelled by the client"
+            self.logger.info(f"{reason}: {tool_name} on {self.name} after {elapsed:.2f}s, ~{saved:.2f}s of server time saved")
+            raise
+        self.call_metrics.record_completed(tool_name, time.monotonic() - started)
+        return result
+
+    async def _call_with_retry(self, tool_name: str, arguments: Dict[str, Any],
+                               progress_callback: Optional[ProgressFnT] = None) -> CallToolResult:
+        """Calls a tool, retrying once after a reconnect if the connection was lost and the tool is idempotent."""
+        session, session_lost, generation = await self._wait_for_session()
         try:
-            return await self.session.call_tool(tool_name, arguments)
+            return await self._send_call(session, session_lost, tool_name, arguments, progress_callback)
         except Exception as e:
-            self.logger.error(f"Error calling tool {tool_name}: {e}")
+            if not _is_connection_error(e):
+                self.logger.error(f"Error calling tool {tool_name}: {e}")
+                raise
+            # Let the supervisor check the connection now instead of at the next ping
+            self._wakeup.set()
+            if self.ping_interval is None or not self.is_idempotent(tool_name):
+                self.logger.error(f"Connection to {self.name} lost while calling {tool_name}: {e}")
+                raise
+            self.logger.warning(f"Connection to {self.name} lost while calling {tool_name}, retrying after reconnect")
+
+        session, session_lost, _ = await self._wait_for_session(after_generation=generation)
+        return await self._send_call(session, session_lost, tool_name, arguments, progress_callback)
+
+    async def _send_call(self, session: ClientSession, session_lost: asyncio.Event, tool_name: str,
+                         arguments: Dict[str, Any], progress_callback: Optional[ProgressFnT] = None) -> CallToolResult:
+        """Sends one tools/call request; fails fast if the connection is lost before the result arrives."""
+        request_id: Optional[int] = None
+
+        async def request() -> CallToolResult:
+            nonlocal request_id
+            # ClientSession has no public way to learn a request's id. send_request takes the
+            # next _request_id before its first await; mcp is pinned and tests/test_mcp_server.py
+            # checks this, and without it cancelled calls are simply not announced to the server
+            next_id = getattr(session, "_request_id", None)
+            request_id = next_id if isinstance(next_id, int) else None
+            return await session.call_tool(tool_name, arguments, progress_callback=progress_callback)
+
+        call = asyncio.create_task(request())
+        lost = asyncio.create_task(session_lost.wait())
+        try:
+            await asyncio.wait({call, lost}, return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            call.cancel()
+            if request_id is not None:
+                self._notify_cancelled(session, request_id, "Cancelled by the client")
             raise
+        finally:
+            lost.cancel()
+        if not call.done():
+            call.cancel()
+            raise ConnectionError(f"Connection to MCP server {self.name} lost")
+        return call.result()
+
+    def _notify_cancelled(self, session: ClientSession, request_id: int, reason: str) -> None:
+        """Sends notifications/cancelled for a request without blocking the cancelled caller."""
+        notification = mcp.types.ClientNotification(
+            mcp.types.CancelledNotification(
+                method="notifications/cancelled",
+                params=mcp.types.CancelledNotificationParams(requestId=request_id, reason=reason),
+            )
+        )
+
+        async def send():
+            try:
+                await session.send_notification(notification)
+            except Exception as e:
+                self.logger.debug(f"Could not send cancellation to {self.name}: {e}")
+
+        task = asyncio.create_task(send())
+        self._notify_tasks.add(task)
+        task.add_done_callback(self._notify_tasks.discard)
 
     async def cleanup(self):
-        """Cleanup the server."""
+        """Stop supervising and close the connection to the server."""
         async with self._cleanup_lock:
+            self._stopping = True
+            self._wakeup.set()
+            runner, self._runner = self._runner, None
+            if runner is None:
+                return
             try:
-                await self.exit_stack.aclose()
-                self.session = None
-                self.logger.info(f"Cleaned up MCP server: {self.name}")
+                await asyncio.wait_for(asyncio.shield(runner), 5.0)
+            except TimeoutError:
+                runner.cancel()
+                await asyncio.gather(runner, return_exceptions=True)
             except Exception as e:
                 self.logger.error(f"Error cleaning up server: {e}")
+            self.session = None
+            self.logger.info(f"Cleaned up MCP server: {self.name}")
+
+
+def _is_connection_error(e: BaseException) -> bool:
+    """Whether an exception means the transport to the server broke, rather than the tool failing."""
+    if isinstance(e, McpError):
+        return e.error.code == mcp.types.CONNECTION_CLOSED
+    return isinstance(e, (ConnectionError, anyio.ClosedResourceError, anyio.BrokenResourceError, anyio.EndOfStream))
 
 # Define parameter types for clarity
 MCPServerSseParams = Dict[str, Any]
@@ -152,6 +448,11 @@ class MCPServerSse(_MCPServerWithClientSession):
         params: MCPServerSseParams,
         cache_tools_list: bool = False,
         name: Optional[str] = None,
+        *,
+        connect_timeout: Optional[float] = None,
+        ping_interval: Optional[float] = 15.0,
+        idempotent_tools: Optional[Sequence[str]] = None,
+        max_in_flight: int = 4,
     ):
         """Create a new MCP server based on the HTTP with SSE transport.
 
@@ -160,8 +461,14 @@ class MCPServerSse(_MCPServerWithClientSession):
                    timeout, and SSE read timeout.
             cache_tools_list: Whether to cache the tools list.
             name: A readable name for the server.
+            connect_timeout: Seconds to wait for the server to start and initialize.
+            ping_interval: Seconds between liveness pings, None disables reconnecting.
+            idempotent_tools: Tools that may be retried after a reconnect.
+            max_in_flight: Maximum number of tool calls sent to the server at the same time.
         """
-        super().__init__(cache_tools_list)
+        super().__init__(
+            cache_tools_list, connect_timeout, ping_interval=ping_interval, idempotent_tools=idempotent_tools, max_in_flight=max_in_flight
+        )
         self.params = params
         self._name = name or f"SSE Server at {self.params.get('url', 'unknown')}"
 
@@ -195,6 +502,11 @@ class MCPServerStdio(_MCPServerWithClientSession):
         params: MCPServerStdioParams,
         cache_tools_list: bool = False,
         name: Optional[str] = None,
+        *,
+        connect_timeout: Optional[float] = None,
+        ping_interval: Optional[float] = 15.0,
+        idempotent_tools: Optional[Sequence[str]] = None,
+        max_in_flight: int = 4,
     ):
         """Create a new MCP server based on the stdio transport.
 
@@ -202,8 +514,14 @@ class MCPServerStdio(_MCPServerWithClientSession):
             params: The params that configure the server including the command and args.
             cache_tools_list: Whether to cache the tools list.
             name: A readable name for the server.
+            connect_timeout: Seconds to wait for the server to start and initialize.
+            ping_interval: Seconds between liveness pings, None disables reconnecting.
+            idempotent_tools: Tools that may be retried after a reconnect.
+            max_in_flight: Maximum number of tool calls sent to the server at the same time.
         """
-        super().__init__(cache_tools_list)
+        super().__init__(
+            cache_tools_list, connect_timeout, ping_interval=ping_interval, idempotent_tools=idempotent_tools, max_in_flight=max_in_flight
+        )
         self.params = params
         self._name = name or f"Stdio Server: {self.params.get('command', 'unknown')}"
 
@@ -230,4 +548,4 @@ class MCPServerStdio(_MCPServerWithClientSession):
     @property
     def name(self) -> str:
         """A readable name for the server."""
-        return self._name
\ No newline at end of file
+        return self._name
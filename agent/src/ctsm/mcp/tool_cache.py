@@ -0,0 +1,104 @@
+import hashlib
+import json
+import logging
+import os
+from importlib import metadata
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from mcp.types import Tool as MCPTool
+from pydantic import BaseModel
+
+from .server import MCPServer
+
+logger = logging.getLogger(__name__)
+
+
+def default_cache_dir() -> Path:
+    """Directory for the on-disk caches, overridable with CTSM_CACHE_DIR."""
+    if os.environ.get("CTSM_CACHE_DIR"):
+        return Path(os.environ["CTSM_CACHE_DIR"])
+    return Path.home() / ".cache" / "ctsm"
+
+
+class CachedToolList(BaseModel):
+    # Version reported by the server in its initialize result
+    server_version: Optional[str] = None
+    # Hash of the raw tool list, used to detect changes on revalidation
+    digest: str
+    tools: List[MCPTool]
+    # Strict schemas by tool name, so they are not converted again on startup
+    strict_schemas: Dict[str, Dict[str, Any]] = {}
+    # Settings the strict schemas were compacted with, None if they were not compacted
+    schema_signature: Optional[str] = None
+
+
+class ToolListCache:
+    """
+    Stores the tool lists of MCP servers on disk so tools can be registered before the server is up.
+
+    Entries are keyed by the server command, its args and the installed mcp package version;
+    the server's own version is stored in the entry and compared on revalidation.
+    """
+
+    def __init__(self, directory: Optional[Path] = None):
+        """
+        Args:
+            directory: Where the cache files are written, the user cache dir if not set
+        """
+        self.directory = (directory or default_cache_dir()) / "tools"
+
+    @staticmethod
+    def digest(tools: List[MCPTool]) -> str:
+        """A stable hash of a tool list."""
+        dumped = [tool.model_dump(mode="json", by_alias=True, exclude_none=True) for tool in tools]
+        return hashlib.sha256(json.dumps(dumped, sort_keys=True).encode()).hexdigest()
+
+    def _path(self, server: MCPServer) -> Optional[Path]:
+        params = getattr(server, "params", None)
+        if not params:
+            return None
+        try:
+            mcp_version = metadata.version("mcp")
+        except metadata.PackageNotFoundError:
+            mcp_version = "unknown"
+        key = json.dumps(
+            [params.get("command"), params.get("args", []), params.get("url"), mcp_version],
+            sort_keys=True,
+        )
+        return self.directory / f"{hashlib.sha256(key.encode()).hexdigest()}.json"
+
+    def load(self, server: MCPServer) -> Optional[CachedToolList]:
+        """Returns the cached tool list of a server, or None if there is no usable entry."""
+        path = self._path(server)
+        if path is None or not path.exists():
+            return None
+        try:
+            return CachedToolList.model_validate_json(path.read_bytes())
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable tool cache for {server.name}: {e}")
+            return None
+
+    def store(self, server: MCPServer, tools: List[MCPTool], strict_schemas: Dict[str, Dict[str, Any]],
+              schema_signature: Optional[str] = None) -> CachedToolList:
+        """Writes the tool list of a server to disk, replacing any previous entry."""
+        server_info = getattr(server, "server_info", None)
+        entry = CachedToolList(
+            server_version=server_info.version if server_info else None,
+            digest=self.digest(tools),
+            tools=tools,
+            strict_schemas=strict_schemas,
+            schema_signature=schema_signature,
+        )
+        path = self._path(server)
+        if path is None:
+            return entry
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write to a temporary file first so a crash never leaves a truncated entry
+            tmp_path = path.with_suffix(".tmp")
+            tmp_path.write_text(entry.model_dump_json(by_alias=True, exclude_none=True))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to write tool cache for {server.name}: {e}")
+        return entry
@@ -0,0 +1,187 @@
+import logging
+import math
+import re
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Sequence, Set
+
+from livekit.agents import llm
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+# Words that say nothing about what a tool does
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from get has have how i in is it its me my of on or please "
+    "so that the this to use used using want what when which will with would you your".split()
+)
+# Shorter words are not indexed
+MIN_WORD_LENGTH = 2
+# Words of up to this length ending in "s", like "gas" or "bus", are not plurals
+MIN_PLURAL_LENGTH = 3
+
+
+class ToolRetrievalConfig(BaseModel):
+    # Whether each generation is offered only the tools that match the conversation
+    enabled: bool = True
+    # Tools offered per generation, besides the pinned and recently called ones
+    top_k: int = 8
+    # Tools offered on every generation
+    pinned: List[str] = []
+    # Messages before the user's last one that are searched along with it
+    context_messages: int = 4
+
+
+def tokenize(text: str) -> List[str]:
+    """Splits text and snake_case, kebab-case or camelCase names into lowercase words."""
+    text = re.sub(r"([a-z0-9])([A-Z])", r"\1 \2", text)
+    words = []
+    for raw in re.findall(r"[a-z0-9]+", text.lower()):
+        if len(raw) < MIN_WORD_LENGTH or raw in STOPWORDS:
+            continue
+        # Crude plural stemming, so "emails" finds a tool about an "email"
+        if len(raw) > MIN_PLURAL_LENGTH and raw.endswith("s") and not raw.endswith("ss"):
+            words.append(raw[:-1])
+        else:
+            words.append(raw)
+    return words
+
+
+def tool_name(tool: Callable) -> str:
+    return getattr(tool, "__name__", "")
+
+
+class ToolIndex:
+    """
+    BM25 index over the names and descriptions of tools.
+
+    Words of the name count twice, names like GMAIL__SEND_EMAIL say more than most descriptions.
+    """
+
+    def __init__(self, tools: Sequence[Callable], k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._documents: Dict[str, Counter] = {}
+        for tool in tools:
+            name = tool_name(tool)
+            self._documents[name] = Counter(tokenize(name) * 2 + tokenize(getattr(tool, "__doc__", None) or ""))
+        lengths = [sum(document.values()) for document in self._documents.values()]
+        self._average_length = sum(lengths) / len(lengths) if lengths else 0.0
+        document_frequency: Counter = Counter()
+        for document in self._documents.values():
+            document_frequency.update(document.keys())
+        count = len(self._documents)
+        self._idf = {word: math.log(1 + (count - frequency + 0.5) / (frequency + 0.5)) for word, frequency in document_frequency.items()}
+
+    def search(self, query: Sequence[str], limit: int) -> List[str]:
+        """
+        Returns the names of the best matching tools, best first.
+
+        Args:
+            query: Words of the query, repeated words weigh more
+            limit: Maximum number of tools
+
+        Returns:
+            Names of the tools with a positive score
+        """
+        weights = Counter(word for word in query if word in self._idf)
+        if not weights:
+            return []
+        scores: Dict[str, float] = {}
+        for name, document in self._documents.items():
+            length_norm = self.k1 * (1 - self.b + self.b * sum(document.values()) / (self._average_length or 1.0))
+            score = 0.0
+            for word, weight in weights.items():
+                frequency = document.get(word)
+                if frequency:
+                    score += weight * self._idf[word] * frequency * (self.k1 + 1) / (frequency + length_norm)
+            if score > 0:
+                scores[name] = score
+        return sorted(scores, key=scores.get, reverse=True)[:limit]
+
+
+class ToolSelector:
+    """
+    Chooses the tools offered to the LLM on each generation.
+
+    The user's last message, weighted double, and the messages before it are matched against the tool
+    index; the top matches are offered together with the pinned tools and the tools called in that
+    window. The full set is offered when nothing matches, and for the rest of the turn once a tool
+    call failed, so a wrong choice costs tokens instead of an answer. Calls are executed against all
+    tools either way.
+    """
+
+    def __init__(self, config: ToolRetrievalConfig):
+        self.config = config
+        self._index: Optional[ToolIndex] = None
+        self._indexed: tuple = ()
+        self.generations = 0
+        self.full_set = 0
+        self.tools_offered = 0
+        self.tools_total = 0
+
+    def _index_for(self, tools: Sequence[Callable]) -> ToolIndex:
+        """The index of the tools, rebuilt when servers add or remove tools."""
+        names = tuple(tool_name(tool) for tool in tools)
+        if self._index is None or names != self._indexed:
+            self._index = ToolIndex(tools)
+            self._indexed = names
+        return self._index
+
+    def select(self, chat_ctx: llm.ChatContext, tools: List[Callable]) -> List[Callable]:
+        """
+        Returns the tools to offer for a generation on this chat context.
+
+        Args:
+            chat_ctx: The chat context the LLM is called with
+            tools: All tools of the agent
+
+        Returns:
+            The selected tools, in the order of the agent's tools
+        """
+        selected = self._select(chat_ctx, tools)
+        self.generations += 1
+        self.tools_offered += len(selected)
+        self.tools_total += len(tools)
+        if len(selected) == len(tools):
+            self.full_set += 1
+        else:
+            logger.debug(f"Offering {len(selected)} of {len(tools)} tools: {[tool_name(tool) for tool in selected]}")
+        return selected
+
+    def _select(self, chat_ctx: llm.ChatContext, tools: List[Callable]) -> List[Callable]:
+        config = self.config
+        if not config.enabled or len(tools) <= config.top_k + len(config.pinned):
+            return tools
+
+        query: List[str] = []
+        called: Set[str] = set()
+        messages = 0
+        for item in reversed(chat_ctx.items):
+            if item.type == "function_call_output" and item.is_error and messages == 0:
+                logger.info(f"Tool call {item.name} failed, offering all tools for the rest of the turn")
+                return tools
+            if item.type == "function_call":
+                called.add(item.name)
+            elif item.type == "message" and item.role in ("user", "assistant"):
+                words = tokenize(item.text_content or "")
+                # The user's last message says most about the tools this turn needs
+                query.extend(words * 2 if messages == 0 and item.role == "user" else words)
+                if item.role == "user" or messages > 0:
+                    messages += 1
+                if messages > config.context_messages:
+                    break
+
+        matches = self._index_for(tools).search(query, config.top_k)
+        if not matches:
+            return tools
+        wanted = set(matches) | called | set(config.pinned)
+        return [tool for tool in tools if tool_name(tool) in wanted]
+
+    def stats(self) -> Dict[str, float]:
+        """Number of generations, how many got the full set, and the average number of tools offered."""
+        return {
+            "generations": self.generations,
+            "full_set": self.full_set,
+            "average_offered": round(self.tools_offered / self.generations, 1) if self.generations else 0.0,
+            "average_total": round(self.tools_total / self.generations, 1) if self.generations else 0.0,
+        }
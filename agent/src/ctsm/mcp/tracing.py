@@ -0,0 +1,135 @@
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from opentelemetry import trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter, SpanExportResult
+
+logger = logging.getLogger(__name__)
+
+# Follows the global tracer provider, so spans are no-ops until tracing is configured
+tracer = trace.get_tracer("ctsm.mcp")
+
+
+def _any_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        # OTLP JSON encodes 64-bit integers as strings
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [_any_value(item) for item in value]}}
+    return {"stringValue": str(value)}
+
+
+def _attributes(attributes: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [{"key": key, "value": _any_value(value)} for key, value in (attributes or {}).items()]
+
+
+def _span_to_otlp(span: ReadableSpan) -> Dict[str, Any]:
+    context = span.get_span_context()
+    encoded: Dict[str, Any] = {
+        "traceId": format(context.trace_id, "032x"),
+        "spanId": format(context.span_id, "016x"),
+        "name": span.name,
+        # SpanKind values are offset by one in OTLP, where 0 means unspecified
+        "kind": span.kind.value + 1,
+        "startTimeUnixNano": str(span.start_time),
+        "endTimeUnixNano": str(span.end_time),
+        "attributes": _attributes(dict(span.attributes or {})),
+        "events": [
+            {"timeUnixNano": str(event.timestamp), "name": event.name, "attributes": _attributes(dict(event.attributes or {}))}
+            for event in span.events
+        ],
+        "status": {"code": span.status.status_code.value},
+    }
+    if span.parent is not None:
+        encoded["parentSpanId"] = format(span.parent.span_id, "016x")
+    if span.status.description:
+        encoded["status"]["message"] = span.status.description
+    return encoded
+
+
+class OTLPJsonFileExporter(SpanExporter):
+    """
+    Writes spans to a local file in the OTLP/JSON encoding, one ExportTraceServiceRequest per line.
+
+    The format is the one the OpenTelemetry collector's file exporter writes, so traces can be
+    loaded into Jaeger, otel-desktop-viewer or similar tools without running a collector.
+    """
+
+    def __init__(self, path: Path):
+        """
+        Args:
+            path: The file the spans are appended to
+        """
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        if not spans:
+            return SpanExportResult.SUCCESS
+        # Group by resource and instrumentation scope, as OTLP requires
+        grouped: Dict[Any, Dict[Any, List[ReadableSpan]]] = {}
+        resources: Dict[Any, Resource] = {}
+        for span in spans:
+            resource_key = id(span.resource)
+            resources[resource_key] = span.resource
+            grouped.setdefault(resource_key, {}).setdefault(span.instrumentation_scope, []).append(span)
+
+        request = {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": _attributes(dict(resources[resource_key].attributes))},
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": scope.name if scope else "", "version": (scope.version if scope else None) or ""},
+                            "spans": [_span_to_otlp(span) for span in scope_spans],
+                        }
+                        for scope, scope_spans in scopes.items()
+                    ],
+                }
+                for resource_key, scopes in grouped.items()
+            ]
+        }
+        try:
+            with self._lock:
+                self._file.write(json.dumps(request, separators=(",", ":")) + "\n")
+                self._file.flush()
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not write spans to {self.path}: {e}")
+            return SpanExportResult.FAILURE
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._file.close()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return True
+
+
+def configure_file_tracing(path: Path, service_name: str = "ctsm-agent") -> TracerProvider:
+    """
+    Installs a global tracer provider that exports all spans to an OTLP/JSON file.
+
+    Args:
+        path: The trace file
+        service_name: Reported as the service.name resource attribute
+
+    Returns:
+        The provider; call shutdown() on it to flush the remaining spans
+    """
+    provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+    provider.add_span_processor(BatchSpanProcessor(OTLPJsonFileExporter(path)))
+    trace.set_tracer_provider(provider)
+    logger.info(f"Writing traces to {path}")
+    return provider
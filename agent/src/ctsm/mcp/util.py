@@ -1,18 +1,31 @@
-import asyncio
-import functools
+import contextlib
 import json
 import logging
-from typing import Any, Dict, List
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
-from pydantic import BaseModel
+from livekit.agents.llm import ToolError
 from mcp.types import CallToolResult
+from mcp.types import Tool as MCPTool
+from pydantic import BaseModel
 
-logger = logging.getLogger(__name__)
+from .content import ContentPipeline
+from .pool import MCPServerPooled
+from .progress import ToolProgressAnnouncer
+from .reducer import ToolOutputReducer
+from .result_cache import ToolResultCache, canonical_arguments
+from .schema import SchemaCompactor
+from .server import MCPServerStdio
+from .single_flight import SingleFlight
+from .tracing import tracer
 
-# Import from mcp libraries
-from mcp.types import Tool as MCPTool
+if TYPE_CHECKING:
+    from .prefetch import Prefetcher
 
-from .server import MCPServer
+logger = logging.getLogger(__name__)
+
+# Used when no pipeline is configured; describes binary content without storing it
+_default_content_pipeline = ContentPipeline()
 
 
 # A minimal FunctionTool class used by the agent.
@@ -29,72 +42,142 @@ class FunctionTool:
 
 class MCPUtil:
     @classmethod
-    async def get_function_tools(cls, server, convert_schemas_to_strict: bool) -> List[FunctionTool]:
-        tools = await server.list_tools()
+    async def get_function_tools(cls, server, convert_schemas_to_strict: bool, *,
+                                 tools: Optional[List[MCPTool]] = None,
+                                 strict_schemas: Optional[Dict[str, Dict[str, Any]]] = None,
+                                 policies: Optional["ToolPolicies"] = None) -> List[FunctionTool]:
+        """
+        Converts the tools of a server to FunctionTools.
+
+        Args:
+            server: The MCP server providing the tools
+            convert_schemas_to_strict: Whether to convert JSON schemas to strict format
+            tools: Tools to convert, fetched from the server if not given
+            strict_schemas: Already converted strict schemas by tool name, e.g. from the on-disk cache
+            policies: The caches and policies the tools are invoked with, all off if not given
+        """
+        if tools is None:
+            tools = await server.list_tools()
         function_tools = []
         for tool in tools:
-            ft = cls.to_function_tool(tool, server, convert_schemas_to_strict)
+            strict_schema = (strict_schemas or {}).get(tool.name)
+            ft = cls.to_function_tool(tool, server, convert_schemas_to_strict, strict_schema=strict_schema, policies=policies)
             function_tools.append(ft)
         return function_tools
 
     @classmethod
-    def to_function_tool(cls, tool, server, convert_schemas_to_strict: bool) -> FunctionTool:
-        # Convert the JSON schema to strict format for OpenAI function calling if requested
+    def _input_schema(cls, tool, convert_schemas_to_strict: bool, strict_schema: Optional[Dict[str, Any]],
+                      schema_compactor: Optional[SchemaCompactor]) -> Tuple[Optional[str], Dict[str, Any]]:
+        """The description and input schema sent to the LLM, compacted and made strict as configured."""
         schema = tool.inputSchema
-        if convert_schemas_to_strict:
+        description = tool.description
+        if schema_compactor is not None:
+            # A strict schema from the tool cache was compacted before it was stored
+            description, schema = schema_compactor.compact(tool.name, tool.description, tool.inputSchema)
+
+        # Convert the JSON schema to strict format for OpenAI function calling if requested
+        if convert_schemas_to_strict and strict_schema is not None:
+            schema = strict_schema
+        elif convert_schemas_to_strict:
             original_schema = schema
-            schema = cls._make_schema_strict(schema)
+            with tracer.start_as_current_span("mcp.schema.make_strict", attributes={"mcp.tool.name": tool.name}) as span:
+                schema = cls._make_schema_strict(schema)
+                if span.is_recording():
+                    span.set_attribute("mcp.schema.size", len(json.dumps(schema)))
             logger.debug(f"Schema conversion for {tool.name}:")
             logger.debug(f"Original: {json.dumps(original_schema, indent=2)}")
             logger.debug(f"Strict: {json.dumps(schema, indent=2)}")
+        return description, schema
 
-        # Use a default argument to capture the current tool correctly in the closure
-        async def invoke_tool(context: Any, input_json: str, current_tool_name=tool.name) -> str:
+    @classmethod
+    def to_function_tool(cls, tool, server, convert_schemas_to_strict: bool, *,
+                         strict_schema: Optional[Dict[str, Any]] = None,
+                         policies: Optional["ToolPolicies"] = None) -> FunctionTool:
+        policies = policies or ToolPolicies()
+        result_cache, single_flight, prefetcher = policies.result_cache, policies.single_flight, policies.prefetcher
+        reducer, content_pipeline, progress = policies.reducer, policies.content_pipeline, policies.progress
+        description, schema = cls._input_schema(tool, convert_schemas_to_strict, strict_schema, policies.schema_compactor)
+
+        deadline = policies.deadlines.deadline_for(tool.name) if policies.deadlines is not None else None
+
+        # Failures raise ToolError: LiveKit passes its message to the LLM and marks the output as an error,
+        # which is what the tool selector widens the tool set on
+        async def invoke(input_json: str, current_tool_name: str, span) -> str:
             try:
-                arguments = json.loads(input_json) if input_json else {}
+                with tracer.start_as_current_span("json.loads", attributes={"json.size": len(input_json or "")}):
+                    arguments = json.loads(input_json) if input_json else {}
             except Exception as e:
-                # Return error message as string
-                return f"Error parsing input JSON for tool '{current_tool_name}': {e}"
+                raise ToolError(f"Error parsing input JSON for tool '{current_tool_name}': {e}") from e
+
+            call_key = (server.name, current_tool_name, canonical_arguments(arguments))
+
+            # Results are only cached for tools the profile or the server's annotations allow
+            cache_ttl = result_cache.ttl_for(tool) if result_cache is not None else None
+            if cache_ttl:
+                cached = result_cache.get(call_key)
+                span.set_attribute("mcp.result_cache.hit", cached is not None)
+                if cached is not None:
+                    logger.debug(f"Result cache hit for tool '{current_tool_name}'")
+                    if prefetcher is not None:
+                        prefetcher.on_result(current_tool_name, cached)
+                    return reducer.reduce(current_tool_name, cached) if reducer is not None else cached
             try:
-                result = await server.call_tool(current_tool_name, arguments)
-                # Ensure the final return value is a string
-                if "content" in result and isinstance(result["content"], list) and len(result["content"]) >= 1:
-                     # Handle single or multiple content items - convert to string
-                     if len(result["content"]) == 1:
-                         content_item = result["content"][0]
-                         # Convert simple types explicitly to string
-                         if isinstance(content_item, (str, int, float, bool)):
-                             return str(content_item)
-                         # Convert complex types (like dict, list) to JSON string
-                         else:
-                             try:
-                                 return json.dumps(content_item)
-                             except TypeError:
-                                 return str(content_item) # Fallback to default string representation
-                     else:
-                         # Multiple content items, return as JSON array string
-                          try:
-                              return json.dumps(result["content"])
-                          except TypeError:
-                              return str(result["content"]) # Fallback
-                else:
-                    # If 'content' is missing, not a list, or empty, return string representation of the whole result
-                    try:
-                        return json.dumps(result)
-                    except TypeError:
-                        return str(result) # Fallback
+                async with progress.track(current_tool_name) if progress is not None else contextlib.nullcontext() as on_progress:
+                    if single_flight is not None:
+                        # Identical calls already in flight share one server request, and the first caller's progress
+                        result = await single_flight.do(call_key, lambda: server.call_tool(current_tool_name, arguments, deadline, on_progress))
+                    else:
+                        result = await server.call_tool(current_tool_name, arguments, deadline, on_progress)
+            except TimeoutError as e:
+                raise ToolError(f"Error calling tool '{current_tool_name}': no result within {deadline} seconds, the call was cancelled") from e
             except Exception as e:
-                 # Catch errors during tool call itself
-                 return f"Error calling tool '{current_tool_name}': {e}"
+                raise ToolError(f"Error calling tool '{current_tool_name}': {e}") from e
+
+            with tracer.start_as_current_span("mcp.result.to_text", attributes={"mcp.tool.name": current_tool_name}) as text_span:
+                result_str = cls._result_to_string(result, content_pipeline)
+                text_span.set_attribute("mcp.result.size", len(result_str))
+            span.set_attribute("mcp.result.is_error", bool(getattr(result, "isError", False)))
+            if not getattr(result, "isError", False):
+                if cache_ttl:
+                    result_cache.put(call_key, result_str, cache_ttl)
+                if prefetcher is not None:
+                    prefetcher.on_result(current_tool_name, result_str)
+            # The cache and the prefetch rules see the full result, the LLM only the reduced one
+            reduced = reducer.reduce(current_tool_name, result_str) if reducer is not None else result_str
+            if getattr(result, "isError", False):
+                raise ToolError(reduced)
+            return reduced
+
+        # Use a default argument to capture the current tool correctly in the closure
+        async def invoke_tool(context: Any, input_json: str, current_tool_name=tool.name) -> str:
+            attributes = {"mcp.server.name": server.name, "mcp.tool.name": current_tool_name, "mcp.arguments.size": len(input_json or "")}
+            with tracer.start_as_current_span("mcp.invoke_tool", attributes=attributes) as span:
+                result_str = await invoke(input_json, current_tool_name, span)
+                # Size of what reaches the LLM, after output reduction
+                span.set_attribute("mcp.result.size", len(result_str))
+                return result_str
 
         return FunctionTool(
             name=tool.name,
-            description=tool.description,
+            description=description,
             params_json_schema=schema,
             on_invoke_tool=invoke_tool,
             strict_json_schema=convert_schemas_to_strict,
         )
 
+    @classmethod
+    def _result_to_string(cls, result: Any, content_pipeline: Optional[ContentPipeline] = None) -> str:
+        """Converts a tool call result to the string returned to the LLM."""
+        if isinstance(result, CallToolResult):
+            # Dispatch on the typed content blocks, binary data never ends up in the prompt
+            return (content_pipeline or _default_content_pipeline).to_text(result)
+        if isinstance(result, str):
+            return result
+        try:
+            return json.dumps(result)
+        except TypeError:
+            return str(result) # Fallback
+
     @classmethod
     def _make_schema_strict(cls, schema: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -127,6 +210,10 @@ class MCPUtil:
             if key in strict_schema:
                 strict_schema[key] = [cls._make_schema_strict(item) for item in strict_schema[key]]
 
+        # Shared definitions, e.g. the recursive ones the schema compaction keeps
+        if "$defs" in strict_schema:
+            strict_schema["$defs"] = {name: cls._make_schema_strict(definition) for name, definition in strict_schema["$defs"].items()}
+
         return strict_schema
 
 
@@ -134,17 +221,66 @@ class MCPServerConfig(BaseModel):
     command: str
     args: List[str]
     name: str
+    # Whether the session waits for this server before greeting the user
+    required: bool = False
+    # Seconds to wait for the server to start, None uses the integration default
+    connect_timeout: Optional[float] = None
+    # Seconds between liveness pings; a dead server is restarted. None disables supervision
+    ping_interval: Optional[float] = 15.0
+    # Tools that are safe to retry after a restart, besides those annotated read-only or idempotent
+    idempotent_tools: List[str] = []
+    # Maximum number of tool calls in flight on this server, further calls queue in FIFO order
+    max_in_flight: int = 4
+
 
+class ToolDeadlines(BaseModel):
+    # Seconds a tool call may run before it is cancelled, None for no limit
+    default: Optional[float] = None
+    # Deadlines by tool name, overriding the default
+    tools: Dict[str, float] = {}
 
-def get_mcps_from_config(mcp_configs: List[MCPServerConfig]):
+    def deadline_for(self, tool_name: str) -> Optional[float]:
+        """The deadline of a tool, the default if it has none of its own."""
+        return self.tools.get(tool_name, self.default)
+
+
+@dataclass
+class ToolPolicies:
+    """
+    The caches and per-feature policies the tools of an agent are invoked with.
+
+    Every one is optional, a policy that is not set leaves its feature off.
+    """
+
+    # Cache for results of read-only tools, shared by all tools of the agent
+    result_cache: Optional[ToolResultCache] = None
+    # Coalesces identical calls that are in flight at the same time
+    single_flight: Optional[SingleFlight] = None
+    # Runs the profile's follow-up calls in the background after a tool returns
+    prefetcher: Optional["Prefetcher"] = None
+    # Shrinks tool outputs to their budget before they reach the LLM
+    reducer: Optional[ToolOutputReducer] = None
+    # Converts result content blocks to text and stores binary data
+    content_pipeline: Optional[ContentPipeline] = None
+    # Seconds each tool may run before the call is cancelled
+    deadlines: Optional[ToolDeadlines] = None
+    # Shrinks the descriptions and schemas sent to the LLM
+    schema_compactor: Optional[SchemaCompactor] = None
+    # Announces slow calls from their progress notifications
+    progress: Optional[ToolProgressAnnouncer] = None
+
+
+def get_mcps_from_config(mcp_configs: List[MCPServerConfig], pool_config=None):
     """
     Create MCPServerStdio objects from configuration.
 
     Args:
         mcp_configs: List of MCPServerConfig objects
+        pool_config: Optional MCPPoolConfig; when enabled the servers attach to the
+            long-lived pool host instead of spawning their own processes
 
     Returns:
-        List of MCPServerStdio objects
+        List of MCPServerStdio (or MCPServerPooled) objects
 
     Example config:
     [
@@ -160,16 +296,26 @@ def get_mcps_from_config(mcp_configs: List[MCPServerConfig]):
         )
     ]
     """
-    from .server import MCPServerStdio
-
     servers = []
     for config in mcp_configs:
+        if pool_config is not None and pool_config.enabled:
+            servers.append(MCPServerPooled(
+                params={"command": config.command, "args": config.args},
+                name=config.name,
+                pool_config=pool_config,
+                connect_timeout=config.connect_timeout,
+                max_in_flight=config.max_in_flight,
+            ))
+            continue
         server = MCPServerStdio(
             params={"command": config.command, "args": config.args},
             cache_tools_list=True,
-            name=config.name
+            name=config.name,
+            connect_timeout=config.connect_timeout,
+            ping_interval=config.ping_interval,
+            idempotent_tools=config.idempotent_tools,
+            max_in_flight=config.max_in_flight,
         )
         servers.append(server)
 
     return servers
-    
\ No newline at end of file
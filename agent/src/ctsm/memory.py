@@ -0,0 +1,231 @@
+import asyncio
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from pydantic import BaseModel
+
+from src.ctsm.mcp.schema import count_tokens
+from src.ctsm.mcp.tool_index import STOPWORDS
+
+logger = logging.getLogger(__name__)
+
+MEMORY_PATH_ENV = "CTSM_MEMORY_DB"
+# The userContext fields kept in the store; the name stays in the instructions
+PROFILE_FIELDS = ("preferences", "additionalInfo")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS memories (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created REAL NOT NULL,
+    UNIQUE (source, content)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS memories_fts USING fts5(
+    content, content='memories', content_rowid='id', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS memories_insert AFTER INSERT ON memories BEGIN
+    INSERT INTO memories_fts(rowid, content) VALUES (new.id, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS memories_delete AFTER DELETE ON memories BEGIN
+    INSERT INTO memories_fts(memories_fts, rowid, content) VALUES ('delete', old.id, old.content);
+END;
+"""
+
+
+class MemoryConfig(BaseModel):
+    # Whether user facts come from the memory store instead of the instructions, off unless the profile turns it on
+    enabled: bool = False
+    # Most entries recalled per turn
+    top_k: int = 8
+    # Estimated token budget of the entries recalled per turn
+    max_tokens: int = 300
+    # Seconds new entries wait before they are written in one batch
+    flush_interval: float = 2.0
+    # The database file, default_memory_path() if not set
+    path: Optional[str] = None
+
+
+def default_memory_path() -> Path:
+    """The memory database, overridable with CTSM_MEMORY_DB."""
+    if os.environ.get(MEMORY_PATH_ENV):
+        return Path(os.environ[MEMORY_PATH_ENV])
+    return Path.home() / ".local" / "share" / "ctsm" / "memory.db"
+
+
+def split_facts(text: str) -> List[str]:
+    """Splits a free-text profile field into one entry per line or sentence."""
+    facts = []
+    for line in text.splitlines():
+        facts.extend(part.strip(" -•*") for part in re.split(r"(?<=[.!?;])\s+", line))
+    return [fact for fact in facts if fact]
+
+
+def match_query(text: str) -> Optional[str]:
+    """An FTS5 query matching any of the text's words, or None if it has none worth searching."""
+    words = {word for word in re.findall(r"\w+", text.lower()) if len(word) > 1 and word not in STOPWORDS}
+    if not words:
+        return None
+    return " OR ".join(f'"{word}"' for word in sorted(words))
+
+
+class MemoryStore:
+    """
+    User facts and notes of past sessions, in SQLite with a full-text index.
+
+    Searches run on the event loop against their own connection; an FTS5 query over thousands of
+    entries takes well under a millisecond. New entries are queued and written in one transaction per
+    flush_interval on a worker thread, so a turn never waits for the disk.
+    """
+
+    def __init__(self, config: MemoryConfig):
+        self.config = config
+        self.path = Path(config.path) if config.path else default_memory_path()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._writer = sqlite3.connect(self.path, check_same_thread=False)
+        self._writer.execute("PRAGMA journal_mode=WAL")
+        self._writer.executescript(_SCHEMA)
+        self._reader = sqlite3.connect(self.path, check_same_thread=False)
+        # Flushes run in executor threads, one at a time
+        self._write_lock = threading.Lock()
+
+        # Entries waiting to be written, as (source, content)
+        self._pending: List[Tuple[str, str]] = []
+        # Sources whose entries are replaced by the next flush
+        self._replaced: Dict[str, List[str]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._writes: Set[asyncio.Future] = set()
+        self.searches = 0
+        self.recalled = 0
+        self.recalled_tokens = 0
+        self.written = 0
+        self.flushes = 0
+
+    def __len__(self) -> int:
+        return self._reader.execute("SELECT count(*) FROM memories").fetchone()[0]
+
+    def search(self, text: str) -> List[str]:
+        """
+        Returns the entries that best match the text, within the token budget.
+
+        Args:
+            text: The conversation the entries should be relevant to
+
+        Returns:
+            The entries, best match first
+        """
+        query = match_query(text)
+        if query is None:
+            return []
+        try:
+            rows = self._reader.execute(
+                "SELECT m.content FROM memories_fts f JOIN memories m ON m.id = f.rowid "
+                "WHERE memories_fts MATCH ? ORDER BY bm25(memories_fts) LIMIT ?",
+                (query, self.config.top_k),
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f"Memory search failed: {e}")
+            return []
+
+        entries, tokens = [], 0
+        for (content,) in rows:
+            entry_tokens = count_tokens(content)
+            if tokens + entry_tokens > self.config.max_tokens:
+                continue
+            entries.append(content)
+            tokens += entry_tokens
+        self.searches += 1
+        self.recalled += len(entries)
+        self.recalled_tokens += tokens
+        return entries
+
+    def remember(self, content: str, source: str = "agent") -> None:
+        """Queues an entry, it is written with the next batch."""
+        content = " ".join(content.split())
+        if content:
+            self._pending.append((source, content))
+            self._schedule_flush()
+
+    def replace_source(self, source: str, contents: Sequence[str]) -> None:
+        """Queues replacing all entries of a source, like the user's profile fields, with new ones."""
+        self._replaced[source] = [" ".join(content.split()) for content in contents if content.strip()]
+        self._schedule_flush()
+
+    def sync_profile(self, user_context: Dict[str, Any]) -> None:
+        """Keeps the store in step with the userContext fields of the Electron config."""
+        for field in PROFILE_FIELDS:
+            self.replace_source(f"userContext.{field}", split_facts(user_context.get(field) or ""))
+
+    def _schedule_flush(self) -> None:
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later(), name="memory-flush")
+
+    async def _flush_later(self) -> None:
+        try:
+            await asyncio.sleep(self.config.flush_interval)
+        finally:
+            self._flush_task = None
+        await self.flush()
+
+    def _take_pending(self) -> Tuple[List[Tuple[str, str]], Dict[str, List[str]]]:
+        pending, self._pending = self._pending, []
+        replaced, self._replaced = self._replaced, {}
+        return pending, replaced
+
+    async def flush(self) -> None:
+        """Writes the queued entries in one transaction."""
+        pending, replaced = self._take_pending()
+        if pending or replaced:
+            write = asyncio.ensure_future(asyncio.to_thread(self._write, pending, replaced))
+            self._writes.add(write)
+            write.add_done_callback(self._writes.discard)
+            # A write that started finishes even if the flush is cancelled, aclose waits for it
+            await asyncio.shield(write)
+
+    def _write(self, pending: List[Tuple[str, str]], replaced: Dict[str, List[str]]) -> None:
+        now = time.time()
+        rows = pending + [(source, content) for source, contents in replaced.items() for content in contents]
+        try:
+            with self._write_lock, self._writer:
+                for source, contents in replaced.items():
+                    placeholders = ",".join("?" * len(contents))
+                    self._writer.execute(
+                        f"DELETE FROM memories WHERE source = ? AND content NOT IN ({placeholders})", (source, *contents)
+                    )
+                cursor = self._writer.executemany(
+                    "INSERT OR IGNORE INTO memories (source, content, created) VALUES (?, ?, ?)",
+                    [(source, content, now) for source, content in rows],
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Could not write {len(rows)} memory entries: {e}")
+            return
+        self.written += max(cursor.rowcount, 0)
+        self.flushes += 1
+        logger.debug(f"Wrote {cursor.rowcount} memory entries")
+
+    async def aclose(self) -> None:
+        """Writes what is still queued and closes the database."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+            self._flush_task = None
+        await self.flush()
+        await asyncio.gather(*self._writes, return_exceptions=True)
+        self._reader.close()
+        self._writer.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Number of searches, entries and estimated tokens recalled per search, and entries written."""
+        return {
+            "searches": self.searches,
+            "average_recalled": round(self.recalled / self.searches, 1) if self.searches else 0.0,
+            "average_tokens": round(self.recalled_tokens / self.searches) if self.searches else 0,
+            "written": self.written,
+            "flushes": self.flushes,
+        }
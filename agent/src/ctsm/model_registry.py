@@ -0,0 +1,142 @@
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+import psutil
+
+from src.ctsm.turn_metrics import default_metrics_dir
+
+logger = logging.getLogger(__name__)
+
+
+class _LoadedModel:
+    def __init__(self, model: Any, load_seconds: float, rss_bytes: int):
+        self.model = model
+        self.load_seconds = load_seconds
+        self.rss_bytes = rss_bytes
+        self.uses = 0
+
+
+class ModelUsage:
+    """The models one job took from the registry, and what reusing them saved."""
+
+    def __init__(self):
+        self.reused: Dict[str, Dict[str, float]] = {}
+        self.loaded: Dict[str, Dict[str, float]] = {}
+
+    def report(self) -> Dict[str, Any]:
+        """Load time and resident memory the job saved by reusing loaded models."""
+        return {
+            "reused": sorted(self.reused),
+            "loaded": sorted(self.loaded),
+            "saved_load_seconds": round(sum(model["load_seconds"] for model in self.reused.values()), 4),
+            "saved_rss_bytes": int(sum(model["rss_bytes"] for model in self.reused.values())),
+        }
+
+
+class ModelRegistry:
+    """
+    Models loaded once per process and shared by all jobs running in it.
+
+    Each model is loaded on first use, or ahead of time by the worker's prewarm function,
+    and its load time and the growth of the process RSS while loading are recorded. A job
+    that reuses a model is credited with both, since without the registry it would have
+    loaded its own copy.
+    """
+
+    def __init__(self):
+        self._models: Dict[str, _LoadedModel] = {}
+        # Jobs of a thread executor share the process, so loads may race
+        self._lock = threading.Lock()
+
+    def get(self, name: str, loader: Callable[[], Any], usage: Optional[ModelUsage] = None) -> Any:
+        """
+        Returns the model, loading it if no job loaded it before.
+
+        Args:
+            name: Key of the model in the registry
+            loader: Creates the model, called at most once per process
+            usage: Records whether this job reused or loaded the model
+        """
+        with self._lock:
+            entry = self._models.get(name)
+            reused = entry is not None
+            if entry is None:
+                entry = self._load(name, loader)
+            entry.uses += 1
+        if usage is not None:
+            record = {"load_seconds": entry.load_seconds, "rss_bytes": entry.rss_bytes}
+            (usage.reused if reused else usage.loaded)[name] = record
+        return entry.model
+
+    def prewarm(self, name: str, loader: Callable[[], Any]) -> None:
+        """Loads a model ahead of the first job."""
+        with self._lock:
+            if name not in self._models:
+                self._load(name, loader)
+
+    def _load(self, name: str, loader: Callable[[], Any]) -> _LoadedModel:
+        process = psutil.Process()
+        rss_before = process.memory_info().rss
+        started = time.perf_counter()
+        model = loader()
+        entry = _LoadedModel(model, time.perf_counter() - started, max(process.memory_info().rss - rss_before, 0))
+        self._models[name] = entry
+        logger.info(f"Loaded model {name} in {entry.load_seconds:.2f}s, +{entry.rss_bytes / 1e6:.1f} MB RSS")
+        return entry
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Load time, RSS and number of jobs of every loaded model."""
+        return {
+            name: {"load_seconds": round(entry.load_seconds, 4), "rss_bytes": entry.rss_bytes, "uses": entry.uses}
+            for name, entry in self._models.items()
+        }
+
+    def record_job(self, usage: ModelUsage, directory: Optional[Path] = None) -> Dict[str, Any]:
+        """Logs what a job saved by reusing models and appends it to models.jsonl in the metrics directory."""
+        report = usage.report()
+        logger.info(
+            f"Job reused {report['reused']} and loaded {report['loaded']}: "
+            f"saved {report['saved_load_seconds']:.2f}s and {report['saved_rss_bytes'] / 1e6:.1f} MB RSS"
+        )
+        try:
+            directory = directory or default_metrics_dir()
+            directory.mkdir(parents=True, exist_ok=True)
+            with open(directory / "models.jsonl", "a", encoding="utf-8") as f:
+                f.write(json.dumps({"timestamp": time.time(), **report, "process_rss_bytes": psutil.Process().memory_info().rss}) + "\n")
+        except OSError as e:
+            logger.warning(f"Could not record the model usage: {e}")
+        return report
+
+
+# One registry per worker process
+registry = ModelRegistry()
+
+
+def load_vad():
+    # Loaded lazily, the model registry decides when; import_plugins() imports it on the main thread before any job starts
+    from livekit.plugins import silero  # noqa: PLC0415
+
+    return silero.VAD.load()
+
+
+def load_noise_cancellation():
+    # Loaded lazily, the model registry decides when; import_plugins() imports it on the main thread before any job starts
+    from livekit.plugins import noise_cancellation  # noqa: PLC0415
+
+    return noise_cancellation.BVC()
+
+
+def prewarm(proc) -> None:
+    """
+    prewarm_fnc of the worker: loads the models every job needs before the first job arrives.
+
+    Args:
+        proc: The livekit JobProcess; the registry is also put in its userdata
+    """
+    registry.prewarm("vad", load_vad)
+    registry.prewarm("noise_cancellation", load_noise_cancellation)
+    proc.userdata["models"] = registry
@@ -1,3 +1,15 @@
+import hashlib
+from string import Template
+from typing import Any, Dict, List
+
+from pydantic import BaseModel
+
+from src.ctsm.mcp.schema import count_tokens
+
+SECTION_SEPARATOR = "\n\n"
+# OpenAI only caches prompts from this length on
+PROVIDER_CACHE_MIN_TOKENS = 1024
+
 BASE_PROMPT = """
 # Universal Voice Agent (Device-First) — Fast-Action Base Prompt
 # (Append Personality / Domain / Tools / Policies AFTER this block)
@@ -61,3 +73,98 @@ BASE_PROMPT = """
 - End with a crisp summary + one offer of help:
   - “All set—your screenshots are saved to the Desktop… Anything else I can handle for you?”
 """
+
+
+class PromptSection:
+    """
+    A part of the instructions, rendered from a template compiled once.
+
+    Static sections are the same for every session of a profile and user; volatile ones change
+    between sessions, like the date.
+    """
+
+    def __init__(self, name: str, template: str, static: bool = True):
+        """
+        Args:
+            name: Name of the section in the token accounting
+            template: A string.Template, e.g. "User name: $name"
+            static: Whether the rendered text stays the same across sessions
+        """
+        self.name = name
+        self.template = Template(template)
+        self.placeholders = self.template.get_identifiers()
+        self.static = static
+
+    @classmethod
+    def literal(cls, name: str, text: str) -> "PromptSection":
+        """A static section of fixed text, which may contain $ signs."""
+        return cls(name, text.replace("$", "$$"))
+
+    def render(self, values: Dict[str, Any]) -> str:
+        """The section's text, empty if all of its placeholders are."""
+        if self.placeholders and not any(values.get(placeholder) for placeholder in self.placeholders):
+            return ""
+        return self.template.substitute(values).strip()
+
+
+class RenderedSection(BaseModel):
+    name: str
+    text: str
+    static: bool
+    # Estimated with the tool output reducer's bytes-per-token ratio
+    tokens: int
+
+
+class AssembledPrompt(BaseModel):
+    text: str
+    sections: List[RenderedSection]
+
+    @property
+    def cacheable_prefix_tokens(self) -> int:
+        """Tokens of the leading static sections, the part a provider's prompt cache can reuse across sessions."""
+        tokens = 0
+        for section in self.sections:
+            if not section.static:
+                break
+            tokens += section.tokens
+        return tokens
+
+    def prefix_digest(self) -> str:
+        """Hash of the static prefix; sessions logging the same digest share the provider's cache entry."""
+        prefix = SECTION_SEPARATOR.join(section.text for section in self.sections if section.static)
+        return hashlib.sha256(prefix.encode()).hexdigest()[:12]
+
+    def describe(self) -> str:
+        """Tokens by section and the cacheable prefix, for the logs."""
+        sections = ", ".join(f"{section.name} {section.tokens}" for section in self.sections)
+        total = sum(section.tokens for section in self.sections)
+        prefix = self.cacheable_prefix_tokens
+        note = "" if prefix >= PROVIDER_CACHE_MIN_TOKENS else f", below the provider's {PROVIDER_CACHE_MIN_TOKENS} token cache minimum"
+        return f"instructions of about {total} tokens ({sections}); cacheable prefix {prefix} tokens{note}, digest {self.prefix_digest()}"
+
+
+class PromptAssembler:
+    """
+    Renders prompt sections in a cache-friendly order: all static sections first, in their given order,
+    then the volatile ones. Sections that render empty are left out.
+    """
+
+    def __init__(self, sections: List[PromptSection]):
+        self.sections = [section for section in sections if section.static] + [section for section in sections if not section.static]
+
+    def assemble(self, values: Dict[str, Any]) -> AssembledPrompt:
+        rendered = []
+        for section in self.sections:
+            text = section.render(values)
+            if text:
+                rendered.append(RenderedSection(name=section.name, text=text, static=section.static, tokens=count_tokens(text)))
+        return AssembledPrompt(text=SECTION_SEPARATOR.join(section.text for section in rendered), sections=rendered)
+
+# The agent's instructions. Providers cache the longest prompt prefix seen before, so everything
+# that differs between sessions goes last.
+INSTRUCTIONS = PromptAssembler([
+    PromptSection.literal("base", BASE_PROMPT),
+    PromptSection("system_prompt", "$system_prompt"),
+    PromptSection("user_profile", "About the user:\n$user_profile"),
+    PromptSection("session_context", "Session context:\n$session_context", static=False),
+])
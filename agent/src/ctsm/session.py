@@ -0,0 +1,382 @@
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from livekit.agents import Agent, AgentSession, function_tool, llm, stt, tts, vad
+
+from src.ctsm.history import HistoryConfig, HistoryManager
+from src.ctsm.mcp.agent_tools import MCPToolRegistry, MCPToolsIntegration
+from src.ctsm.mcp.content import BinaryStore, ContentPipeline
+from src.ctsm.mcp.pool import MCPPoolConfig
+from src.ctsm.mcp.prefetch import PrefetchConfig, PrefetchRule
+from src.ctsm.mcp.progress import ToolProgressAnnouncer, ToolProgressConfig
+from src.ctsm.mcp.reducer import ToolOutputBudget, ToolOutputConfig, ToolOutputReducer
+from src.ctsm.mcp.result_cache import ToolResultCache, ToolResultCacheConfig
+from src.ctsm.mcp.schema import SchemaCompactionConfig, SchemaCompactor
+from src.ctsm.mcp.server import MCPServer
+from src.ctsm.mcp.tool_cache import ToolListCache
+from src.ctsm.mcp.tool_index import ToolRetrievalConfig, ToolSelector
+from src.ctsm.mcp.util import MCPServerConfig, ToolDeadlines, ToolPolicies
+from src.ctsm.memory import MemoryConfig, MemoryStore
+from src.ctsm.prompt import INSTRUCTIONS, AssembledPrompt
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SYSTEM_PROMPT = "You are a helpful voice AI assistant."
+REMEMBER_DESCRIPTION = (
+    "Saves a fact about the user for later sessions, like a preference, a person or a recurring task. "
+    "Use it when the user asks you to remember something or shares a lasting personal detail."
+)
+
+
+def remember_tool(memory: MemoryStore) -> llm.FunctionTool:
+    """The tool the agent stores new user facts with; they are written with the store's next batch."""
+
+    async def remember(fact: str) -> str:
+        """
+        Args:
+            fact: The fact, as one short self-contained sentence
+        """
+        memory.remember(fact)
+        return "Saved."
+
+    return function_tool(remember, description=REMEMBER_DESCRIPTION)
+
+
+class Assistant(Agent):
+    """
+    The voice agent. With a tool selector, each generation is only offered the tools that match the conversation;
+    with a schema compactor, the prompt tokens its compacted tool schemas save are counted per request; with a
+    history manager, each request is sent a compacted copy of the chat history; with a memory store, each turn
+    is sent the stored user facts that match it, and the agent can store new ones.
+    """
+
+    def __init__(self, instructions: str, tool_selector: Optional[ToolSelector] = None,
+                 schema_compactor: Optional[SchemaCompactor] = None, history: Optional[HistoryManager] = None,
+                 memory: Optional[MemoryStore] = None) -> None:
+        super().__init__(instructions=instructions, tools=[remember_tool(memory)] if memory is not None else [])
+        self.tool_selector = tool_selector
+        self.schema_compactor = schema_compactor
+        self.history = history
+        self.memory = memory
+        # The memory entries recalled for the user's last message, by its id
+        self._recalled: Optional[tuple] = None
+
+    def llm_node(self, chat_ctx: llm.ChatContext, tools, model_settings):
+        if self.history is not None:
+            chat_ctx = self.history.compact(chat_ctx, self.session.llm)
+        if self.memory is not None:
+            chat_ctx = self._with_memories(chat_ctx)
+        # Only what the LLM sees is narrowed, its calls still run against all of the agent's tools
+        if self.tool_selector is not None:
+            tools = self.tool_selector.select(chat_ctx, tools)
+        if self.schema_compactor is not None:
+            self.schema_compactor.record_request(getattr(tool, "__name__", "") for tool in tools)
+        return Agent.default.llm_node(self, chat_ctx, tools, model_settings)
+
+    def _with_memories(self, chat_ctx: llm.ChatContext) -> llm.ChatContext:
+        """The chat context with the memory entries matching the user's last message after the instructions."""
+        last_user = next((item for item in reversed(chat_ctx.items) if item.type == "message" and item.role == "user"), None)
+        if last_user is None:
+            return chat_ctx
+        # Tool steps of the same turn reuse the entries recalled for its first generation
+        if self._recalled is None or self._recalled[0] != last_user.id:
+            self._recalled = (last_user.id, self.memory.search(last_user.text_content or ""))
+        entries = self._recalled[1]
+        if not entries:
+            return chat_ctx
+        items = list(chat_ctx.items)
+        instructions = [item.type == "message" and item.role in ("system", "developer") for item in items]
+        position = instructions.index(False) if False in instructions else len(items)
+        text = "What you remember about the user that may matter now:\n" + "\n".join(f"- {entry}" for entry in entries)
+        items.insert(position, llm.ChatMessage(role="system", content=[text]))
+        return llm.ChatContext(items)
+
+    async def aclose(self) -> None:
+        """Ends the background work of the history manager and the memory store and logs their stats."""
+        if self.history is not None:
+            await self.history.aclose()
+            logger.info(f"History compaction stats: {self.history.stats()}")
+        if self.memory is not None:
+            if self.history is not None and self.history.summary:
+                self.memory.remember(f"Session of {time.strftime('%Y-%m-%d')}: {self.history.summary}", source="session")
+            await self.memory.aclose()
+            logger.info(f"Memory stats: {self.memory.stats()}")
+
+
+def create_agent(electron_config: Dict[str, Any], instructions: str) -> Assistant:
+    """Creates the agent with the profile's tool retrieval, tool schema, history and memory settings."""
+    memory_settings = memory_config(electron_config.get("memory") or {})
+    memory = None
+    if memory_settings.enabled:
+        memory = MemoryStore(memory_settings)
+        memory.sync_profile(electron_config.get("userContext") or {})
+    return Assistant(
+        instructions,
+        tool_selector=ToolSelector(tool_retrieval_config(electron_config.get("toolRetrieval") or {})),
+        schema_compactor=SchemaCompactor(schema_compaction_config(electron_config.get("toolSchemas") or {})),
+        history=HistoryManager(history_config(electron_config.get("history") or {})),
+        memory=memory,
+    )
+
+
+def create_session(
+    stt_engine: stt.STT,
+    llm_engine: llm.LLM,
+    tts_engine: tts.TTS,
+    vad_engine: vad.VAD,
+    preemptive_generation: bool = True,
+) -> AgentSession:
+    """
+    Creates the AgentSession with the turn-taking options the agent runs with.
+
+    The engines are passed in, so the same wiring can run against Deepgram, OpenAI and Cartesia
+    or against the local stand-ins of the latency harness.
+
+    Args:
+        stt_engine: Speech-to-text
+        llm_engine: The LLM
+        tts_engine: Text-to-speech
+        vad_engine: Voice activity detection, also used for turn detection
+        preemptive_generation: Whether the LLM starts on the interim transcript before the turn ends
+
+    Returns:
+        The configured, not yet started session
+    """
+    return AgentSession(
+        turn_detection="vad",
+        stt=stt_engine,
+        llm=llm_engine,
+        tts=tts_engine,
+        vad=vad_engine,
+        preemptive_generation=preemptive_generation,
+        max_tool_steps=5,
+        use_tts_aligned_transcript=True,
+    )
+
+
+def create_voice_session(electron_config: Dict[str, Any], vad_engine: vad.VAD) -> AgentSession:
+    """Creates the session on Deepgram, OpenAI and Cartesia with the API keys from the Electron config."""
+    # Imported lazily to keep them off the cold start; import_plugins() loads them on the main thread before any session is created
+    from livekit.plugins import cartesia, deepgram, openai  # noqa: PLC0415
+
+    secrets = electron_config.get("secrets", {})
+    return create_session(
+        stt_engine=deepgram.STT(
+            model="nova-3",
+            language="en",
+            api_key=secrets.get("deepgramApiKey", "NOT_SET"),
+        ),
+        llm_engine=openai.LLM(
+            model="gpt-4o",  # Changed from gpt-5 to available model
+            api_key=secrets.get("openaiApiKey", "NOT_SET"),
+        ),
+        tts_engine=cartesia.TTS(
+            model="sonic-2",
+            language="en",
+            api_key=secrets.get("cartesiaApiKey", "NOT_SET"),
+        ),
+        vad_engine=vad_engine,
+    )
+
+
+def tool_result_cache_config(settings: Dict[str, Any]) -> ToolResultCacheConfig:
+    """Build the tool result cache configuration from the agent profile's toolCache settings."""
+    return ToolResultCacheConfig(
+        max_entries=settings.get("maxEntries", 256),
+        default_ttl=settings.get("defaultTtl", 60.0),
+        use_annotations=settings.get("useAnnotations", True),
+        tools=settings.get("tools", {}),
+    )
+
+
+def prefetch_config(settings: Dict[str, Any]) -> PrefetchConfig:
+    """Build the prefetch configuration from the agent profile's prefetch settings."""
+    return PrefetchConfig(
+        rules=[PrefetchRule(**rule) for rule in settings.get("rules", [])],
+        max_concurrency=settings.get("maxConcurrency", 2),
+    )
+
+
+def tool_output_config(settings: Dict[str, Any]) -> ToolOutputConfig:
+    """Build the tool output budgets from the agent profile's toolOutput settings."""
+    return ToolOutputConfig(
+        default_max_bytes=settings.get("defaultMaxBytes", 16000),
+        tools={
+            name: ToolOutputBudget(
+                max_bytes=budget.get("maxBytes"),
+                max_tokens=budget.get("maxTokens"),
+                fields=budget.get("fields", []),
+            )
+            for name, budget in settings.get("tools", {}).items()
+        },
+    )
+
+
+def tool_deadlines(settings: Dict[str, Any]) -> ToolDeadlines:
+    """Build the per-call deadlines from the agent profile's toolTimeouts settings."""
+    return ToolDeadlines(
+        default=settings.get("default", 60.0),
+        tools=settings.get("tools", {}),
+    )
+
+
+def tool_progress_config(settings: Dict[str, Any]) -> ToolProgressConfig:
+    """Build the status phrases of slow tool calls from the agent profile's toolProgress settings."""
+    defaults = ToolProgressConfig()
+    return ToolProgressConfig(
+        enabled=settings.get("enabled", True),
+        threshold=settings.get("threshold", defaults.threshold),
+        repeat_interval=settings.get("repeatInterval", defaults.repeat_interval),
+        max_updates=settings.get("maxUpdates", defaults.max_updates),
+        phrases=settings.get("phrases", defaults.phrases),
+        tools=settings.get("tools", {}),
+    )
+
+
+def tool_retrieval_config(settings: Dict[str, Any]) -> ToolRetrievalConfig:
+    """Build the per-turn tool retrieval configuration from the agent profile's toolRetrieval settings."""
+    return ToolRetrievalConfig(
+        enabled=settings.get("enabled", True),
+        top_k=settings.get("topK", 8),
+        pinned=settings.get("pinned", []),
+        context_messages=settings.get("contextMessages", 4),
+    )
+
+
+def schema_compaction_config(settings: Dict[str, Any]) -> SchemaCompactionConfig:
+    """Build the tool schema compaction configuration from the agent profile's toolSchemas settings."""
+    return SchemaCompactionConfig(
+        enabled=settings.get("enabled", True),
+        description_tokens=settings.get("descriptionTokens", 80),
+        property_description_tokens=settings.get("propertyDescriptionTokens", 30),
+        tools=settings.get("tools", {}),
+    )
+
+
+def history_config(settings: Dict[str, Any]) -> HistoryConfig:
+    """Build the chat history compaction configuration from the agent profile's history settings."""
+    return HistoryConfig(
+        enabled=settings.get("enabled", True),
+        keep_turns=settings.get("keepTurns", 6),
+        max_tokens=settings.get("maxTokens", 4000),
+        summarize=settings.get("summarize", True),
+        summary_tokens=settings.get("summaryTokens", 300),
+    )
+
+
+def memory_config(settings: Dict[str, Any]) -> MemoryConfig:
+    """Build the memory store configuration from the agent profile's memory settings."""
+    return MemoryConfig(
+        enabled=settings.get("enabled", False),
+        top_k=settings.get("topK", 8),
+        max_tokens=settings.get("maxTokens", 300),
+        flush_interval=settings.get("flushInterval", 2.0),
+        path=settings.get("path"),
+    )
+
+
+def mcp_pool_config(electron_config: Dict[str, Any]) -> MCPPoolConfig:
+    """Build the MCP server pool configuration from the mcpPool settings."""
+    pool_settings = electron_config.get("mcpPool") or {}
+    return MCPPoolConfig(
+        enabled=pool_settings.get("enabled", False),
+        idle_timeout=pool_settings.get("idleTimeout", 600.0),
+        max_servers=pool_settings.get("maxServers", 8),
+        token=pool_settings.get("token"),
+    )
+
+
+def mcp_server_configs(electron_config: Dict[str, Any]) -> List[MCPServerConfig]:
+    """Build the MCP server configurations of the agent profile, with the ACI API key filled in."""
+    configs = []
+    for server in electron_config.get("mcpServers", []):
+        args = server.get("args", [])
+        # Handle ACI server specially to inject API key
+        if "aci-mcp" in " ".join(args):
+            aci_api_key = electron_config.get("secrets", {}).get("aciApiKey", "")
+            args = [arg.replace("$ACI_API_KEY", aci_api_key) for arg in args]
+
+        configs.append(
+            MCPServerConfig(
+                command=server["command"],
+                args=args,
+                name=server["name"],
+                required=server.get("required", False),
+                connect_timeout=server.get("connectTimeout"),
+                ping_interval=server.get("pingInterval", 15.0),
+                idempotent_tools=server.get("idempotentTools", []),
+                max_in_flight=server.get("maxInFlight", 4),
+            )
+        )
+    return configs
+
+
+def assemble_instructions(electron_config: Dict[str, Any], context: Dict[str, Any]) -> AssembledPrompt:
+    """
+    The agent's instructions: the base prompt, the profile's system prompt, the user's profile and the session context.
+
+    The session context, like the date, changes between sessions and comes last, so the sections before
+    it form a prefix the provider's prompt cache can reuse. With the memory store enabled, the user's
+    preferences and additional context are recalled per turn instead, only the name stays here.
+    """
+    user_context = electron_config.get("userContext") or {}
+    user_profile_parts = []
+    if user_context.get("name"):
+        user_profile_parts.append(f"Name: {user_context['name']}")
+    if not memory_config(electron_config.get("memory") or {}).enabled:
+        if user_context.get("preferences"):
+            user_profile_parts.append(f"Preferences: {user_context['preferences']}")
+        if user_context.get("additionalInfo"):
+            user_profile_parts.append(f"Additional context: {user_context['additionalInfo']}")
+
+    return INSTRUCTIONS.assemble({
+        "system_prompt": electron_config.get("systemPrompt") or DEFAULT_SYSTEM_PROMPT,
+        "user_profile": "\n".join(user_profile_parts),
+        "session_context": "\n".join(f"{key.capitalize()}: {value}" for key, value in context.items()),
+    })
+
+
+def greeting_instructions(electron_config: Dict[str, Any]) -> str:
+    """Instructions for the first reply, greeting the user by name if it is known."""
+    user_name = (electron_config.get("userContext") or {}).get("name", "")
+    return f"Greet the user{f' by name ({user_name})' if user_name else ''} and ask how you can help."
+
+
+async def attach_mcp_tools(agent, electron_config: Dict[str, Any], server_configs: List[MCPServerConfig],
+                           mcp_servers: List[MCPServer]) -> MCPToolRegistry:
+    """
+    Starts the MCP servers and registers their tools on the agent with the profile's tool settings.
+
+    Servers that are already connected are reused as they are, only their tools are registered.
+
+    Args:
+        agent: The agent the tools are registered on
+        electron_config: The Electron config with the profile's tool settings
+        server_configs: Configurations of the servers, used for the required flags
+        mcp_servers: The servers created from the configurations
+
+    Returns:
+        The MCPToolRegistry tracking the agent's MCP tools
+    """
+    # Only the required servers delay the greeting, the rest register their tools on the running agent once they are up
+    return await MCPToolsIntegration.attach_servers(
+        agent,
+        mcp_servers,
+        required_servers=[config.name for config in server_configs if config.required],
+        min_ready_servers=electron_config.get("mcpMinReadyServers", 0),
+        tool_cache=ToolListCache(),
+        prefetch_config=prefetch_config(electron_config.get("prefetch") or {}),
+        policies=ToolPolicies(
+            result_cache=ToolResultCache(tool_result_cache_config(electron_config.get("toolCache") or {})),
+            reducer=ToolOutputReducer(tool_output_config(electron_config.get("toolOutput") or {})),
+            content_pipeline=ContentPipeline(BinaryStore()),
+            deadlines=tool_deadlines(electron_config.get("toolTimeouts") or {}),
+            schema_compactor=getattr(agent, "schema_compactor", None),
+            # Status phrases go straight to the TTS and stay out of the chat history
+            progress=ToolProgressAnnouncer(
+                tool_progress_config(electron_config.get("toolProgress") or {}),
+                say=lambda phrase: agent.session.say(phrase, add_to_chat_ctx=False),
+            ),
+        ),
+    )
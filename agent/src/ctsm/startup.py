@@ -0,0 +1,98 @@
+import importlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+import psutil
+from livekit.agents import AgentSession
+from livekit.agents.voice.events import AgentStateChangedEvent
+
+from src.ctsm.turn_metrics import default_metrics_dir
+
+logger = logging.getLogger(__name__)
+
+# Plugins the agent runs with; imported only when the executable starts as an agent
+PLUGINS = ["cartesia", "deepgram", "noise_cancellation", "openai", "silero"]
+
+
+def import_plugins() -> None:
+    """
+    Imports the LiveKit plugins the agent uses.
+
+    LiveKit registers plugins at import time and only allows it on the main thread, while
+    the console job runs the entrypoint on a worker thread. Call this on the main thread
+    before the worker starts; the entrypoint then finds the modules already loaded.
+    """
+    for name in PLUGINS:
+        importlib.import_module(f"livekit.plugins.{name}")
+
+
+def requested_at() -> float:
+    """
+    When the agent start was requested.
+
+    Electron passes the time the user pressed Start in CTSM_START_REQUESTED_AT (seconds since
+    the epoch); without it, the creation time of this process is used.
+    """
+    value = os.environ.get("CTSM_START_REQUESTED_AT")
+    if value:
+        try:
+            return float(value)
+        except ValueError:
+            logger.warning(f"Ignoring invalid CTSM_START_REQUESTED_AT: {value}")
+    return psutil.Process().create_time()
+
+
+class StartupTimer:
+    """
+    Records the time from the start request to the greeting's first audio, split into phases.
+
+    Each phase is marked with the seconds elapsed since the request. Once the agent starts
+    speaking for the first time, the record is appended to startup.jsonl in the metrics directory.
+    """
+
+    def __init__(self, started_at: Optional[float] = None, directory: Optional[Path] = None):
+        """
+        Args:
+            started_at: Start of the measurement, requested_at() if not set
+            directory: Where startup.jsonl is written, default_metrics_dir() if not set
+        """
+        self.started_at = started_at or requested_at()
+        self.directory = directory
+        self.phases: Dict[str, float] = {}
+        self.time_to_ready: Optional[float] = None
+
+    def mark(self, phase: str) -> None:
+        """Records that a phase of the startup finished now."""
+        self.phases[phase] = round(time.time() - self.started_at, 4)
+        logger.debug(f"Startup phase {phase} done after {self.phases[phase]:.2f}s")
+
+    def attach(self, session: AgentSession) -> None:
+        """Marks the agent ready when it starts speaking for the first time."""
+
+        def on_agent_state_changed(event: AgentStateChangedEvent) -> None:
+            if event.new_state == "speaking":
+                session.off("agent_state_changed", on_agent_state_changed)
+                self.ready()
+
+        session.on("agent_state_changed", on_agent_state_changed)
+
+    def ready(self) -> None:
+        """Marks the agent ready and records the startup."""
+        if self.time_to_ready is not None:
+            return
+        self.mark("first_audio")
+        self.time_to_ready = self.phases["first_audio"]
+        logger.info(f"Time to ready: {self.time_to_ready:.2f}s ({self.phases})")
+
+        record = {"timestamp": time.time(), "time_to_ready": self.time_to_ready, "phases": self.phases}
+        try:
+            directory = self.directory or default_metrics_dir()
+            directory.mkdir(parents=True, exist_ok=True)
+            with open(directory / "startup.jsonl", "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError as e:
+            logger.warning(f"Could not record the startup time: {e}")
@@ -0,0 +1,210 @@
+import json
+import logging
+import math
+import os
+import time
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from livekit.agents import AgentSession, metrics
+from livekit.agents.voice.events import (
+    FunctionToolsExecutedEvent,
+    MetricsCollectedEvent,
+    UserInputTranscribedEvent,
+    UserStateChangedEvent,
+)
+
+logger = logging.getLogger(__name__)
+
+# Order of the stages in a turn, used for the report
+STAGES = ["stt_final", "llm_first_token", "tool_calls", "tts_first_audio", "time_to_first_audio"]
+
+
+def default_metrics_dir() -> Path:
+    """Directory for the latency files, overridable with CTSM_METRICS_DIR."""
+    if os.environ.get("CTSM_METRICS_DIR"):
+        return Path(os.environ["CTSM_METRICS_DIR"])
+    return Path.home() / ".cache" / "ctsm" / "metrics"
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of a list of values, q between 0 and 1."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+class _Turn:
+    def __init__(self, index: int, vad_end: float):
+        self.index = index
+        self.vad_end = vad_end
+        self.transcript: Optional[str] = None
+        self.stt_final: Optional[float] = None
+        self.llm_first_token: Optional[float] = None
+        self.tts_first_audio: Optional[float] = None
+        self.tool_calls: List[Dict[str, Any]] = []
+
+    def offset(self, timestamp: Optional[float]) -> Optional[float]:
+        return round(timestamp - self.vad_end, 4) if timestamp is not None else None
+
+    def stage_durations(self) -> Dict[str, float]:
+        """Seconds spent in each stage; a stage that did not happen in the turn is left out."""
+        durations: Dict[str, float] = {}
+        previous = self.vad_end
+        for stage, timestamp in (("stt_final", self.stt_final), ("llm_first_token", self.llm_first_token)):
+            if timestamp is not None:
+                durations[stage] = max(timestamp - previous, 0.0)
+                previous = timestamp
+        if self.tool_calls:
+            durations["tool_calls"] = sum(call["duration"] for call in self.tool_calls)
+        if self.tts_first_audio is not None:
+            durations["tts_first_audio"] = max(self.tts_first_audio - previous - durations.get("tool_calls", 0.0), 0.0)
+            durations["time_to_first_audio"] = self.tts_first_audio - self.vad_end
+        return durations
+
+    def to_record(self) -> Dict[str, Any]:
+        return {
+            "turn": self.index,
+            "vad_end": self.vad_end,
+            "transcript_chars": len(self.transcript or ""),
+            "offsets": {
+                "stt_final": self.offset(self.stt_final),
+                "llm_first_token": self.offset(self.llm_first_token),
+                "tts_first_audio": self.offset(self.tts_first_audio),
+            },
+            "tool_calls": [
+                {"name": call["name"], "start": self.offset(call["start"]), "duration": round(call["duration"], 4), "error": call["error"]}
+                for call in self.tool_calls
+            ],
+            "stages": {stage: round(value, 4) for stage, value in self.stage_durations().items()},
+        }
+
+
+class TurnLatencyTracker:
+    """
+    Records a timestamped latency breakdown for every user turn of an AgentSession.
+
+    A turn starts when VAD detects the end of the user's speech and is followed by the final
+    transcript, the first LLM token, the MCP tool calls and the first TTS audio. Each finished
+    turn is appended to a rotating JSONL file, and a Prometheus text snapshot with p50/p95 per
+    stage across the session is rewritten after every turn.
+    """
+
+    def __init__(self, directory: Optional[Path] = None, max_bytes: int = 5 * 1024 * 1024, backup_count: int = 3):
+        """
+        Args:
+            directory: Where turns.jsonl and turns.prom are written, default_metrics_dir() if not set
+            max_bytes: Size at which the JSONL file is rotated
+            backup_count: Number of rotated JSONL files kept
+        """
+        self.directory = directory or default_metrics_dir()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.snapshot_path = self.directory / "turns.prom"
+
+        # A dedicated logger gives size-based rotation without reimplementing it
+        self._writer = logging.getLogger(f"{__name__}.jsonl.{id(self)}")
+        self._writer.propagate = False
+        self._writer.setLevel(logging.INFO)
+        self._handler = RotatingFileHandler(self.directory / "turns.jsonl", maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+        self._handler.setFormatter(logging.Formatter("%(message)s"))
+        self._writer.addHandler(self._handler)
+
+        self._turn: Optional[_Turn] = None
+        self._turn_count = 0
+        self._stage_values: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+
+    def attach(self, session: AgentSession) -> None:
+        """Subscribes to the session events the breakdown is built from."""
+        session.on("user_state_changed", self._on_user_state_changed)
+        session.on("user_input_transcribed", self._on_user_input_transcribed)
+        session.on("metrics_collected", self._on_metrics_collected)
+        session.on("function_tools_executed", self._on_function_tools_executed)
+
+    def _on_user_state_changed(self, event: UserStateChangedEvent) -> None:
+        if event.new_state == "speaking":
+            # The user started a new turn, the previous one cannot change anymore
+            self._finish_turn()
+        elif event.old_state == "speaking":
+            self._finish_turn()
+            self._turn_count += 1
+            self._turn = _Turn(self._turn_count, event.created_at)
+
+    def _on_user_input_transcribed(self, event: UserInputTranscribedEvent) -> None:
+        if self._turn is not None and event.is_final:
+            # Deepgram may send several final segments for one turn; the last one unblocks the LLM
+            self._turn.stt_final = event.created_at
+            self._turn.transcript = (self._turn.transcript or "") + event.transcript
+
+    def _on_metrics_collected(self, event: MetricsCollectedEvent) -> None:
+        turn = self._turn
+        if turn is None:
+            return
+        collected = event.metrics
+        # The metrics are emitted when a request ends; its start is the timestamp minus the duration
+        # LLM requests outside a reply, like history summaries, carry no speech id
+        if isinstance(collected, metrics.LLMMetrics) and turn.llm_first_token is None and not collected.cancelled and collected.speech_id:
+            turn.llm_first_token = collected.timestamp - collected.duration + collected.ttft
+        elif isinstance(collected, metrics.TTSMetrics) and turn.tts_first_audio is None and not collected.cancelled:
+            turn.tts_first_audio = collected.timestamp - collected.duration + collected.ttfb
+
+    def _on_function_tools_executed(self, event: FunctionToolsExecutedEvent) -> None:
+        if self._turn is None:
+            return
+        for call, output in event.zipped():
+            finished = output.created_at if output is not None else event.created_at
+            self._turn.tool_calls.append({
+                "name": call.name,
+                "start": call.created_at,
+                "duration": max(finished - call.created_at, 0.0),
+                "error": output.is_error if output is not None else True,
+            })
+
+    def _finish_turn(self) -> None:
+        turn, self._turn = self._turn, None
+        if turn is None:
+            return
+        record = turn.to_record()
+        for stage, value in record["stages"].items():
+            self._stage_values[stage].append(value)
+        self._writer.info(json.dumps(record))
+        self._write_snapshot()
+        logger.info(f"Turn {turn.index} latency: {record['stages']}")
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """p50 and p95 in seconds and the sample count of each stage across the session."""
+        return {
+            stage: {"p50": percentile(values, 0.5), "p95": percentile(values, 0.95), "count": len(values)}
+            for stage, values in self._stage_values.items()
+            if values
+        }
+
+    def _write_snapshot(self) -> None:
+        lines = [
+            "# HELP ctsm_turn_stage_seconds Latency of each stage of a user turn.",
+            "# TYPE ctsm_turn_stage_seconds summary",
+        ]
+        for stage, values in self._stage_values.items():
+            if not values:
+                continue
+            for quantile in (0.5, 0.95):
+                lines.append(f'ctsm_turn_stage_seconds{{stage="{stage}",quantile="{quantile}"}} {percentile(values, quantile):.4f}')
+            lines.append(f'ctsm_turn_stage_seconds_sum{{stage="{stage}"}} {sum(values):.4f}')
+            lines.append(f'ctsm_turn_stage_seconds_count{{stage="{stage}"}} {len(values)}')
+        lines.append("# HELP ctsm_turns_total Number of user turns recorded in the session.")
+        lines.append("# TYPE ctsm_turns_total counter")
+        lines.append(f"ctsm_turns_total {self._turn_count}")
+        lines.append(f"# Generated at {time.time():.3f}")
+
+        # Scrapers must never see a half-written file
+        temp_path = self.snapshot_path.with_suffix(".prom.tmp")
+        temp_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        os.replace(temp_path, self.snapshot_path)
+
+    async def aclose(self) -> None:
+        """Writes the last turn and logs the session summary, used as a shutdown callback."""
+        self._finish_turn()
+        logger.info(f"Turn latency summary: {self.summary()}")
+        self._writer.removeHandler(self._handler)
+        self._handler.close()
@@ -0,0 +1,99 @@
+from typing import List
+
+from livekit.agents import llm
+
+from src.ctsm.history import HistoryConfig, HistoryManager
+
+
+def _chat(turns: int, output: str = "result") -> llm.ChatContext:
+    """Instructions and turns of a user message, one tool call with its output and the assistant's reply."""
+    chat_ctx = llm.ChatContext.empty()
+    chat_ctx.add_message(role="system", content="You are a helpful assistant.")
+    for turn in range(turns):
+        chat_ctx.add_message(role="user", content=f"question {turn}", id=f"user_{turn}")
+        chat_ctx.items.append(llm.FunctionCall(call_id=f"call_{turn}", name="lookup", arguments="{}", id=f"call_{turn}"))
+        chat_ctx.items.append(llm.FunctionCallOutput(call_id=f"call_{turn}", name="lookup", output=f"{output} {turn}", is_error=False,
+                                                     id=f"output_{turn}"))
+        chat_ctx.add_message(role="assistant", content=f"answer {turn}", id=f"answer_{turn}")
+    return chat_ctx
+
+
+def _outputs(chat_ctx: llm.ChatContext) -> List[str]:
+    return [item.output for item in chat_ctx.items if item.type == "function_call_output"]
+
+
+def _texts(chat_ctx: llm.ChatContext) -> List[str]:
+    return [item.text_content or "" for item in chat_ctx.items if item.type == "message"]
+
+
+def test_outputs_of_turns_outside_the_window_are_stubbed():
+    manager = HistoryManager(HistoryConfig(keep_turns=2, summarize=False))
+    chat_ctx = _chat(4)
+
+    compacted = manager.compact(chat_ctx)
+
+    outputs = _outputs(compacted)
+    assert [output.startswith("[Output of lookup removed") for output in outputs] == [True, True, False, False]
+    assert outputs[2:] == ["result 2", "result 3"]
+    # Messages and calls of old turns are kept, and the agent's own context is not modified
+    assert _texts(compacted)[:3] == ["You are a helpful assistant.", "question 0", "answer 0"]
+    assert _outputs(chat_ctx) == ["result 0", "result 1", "result 2", "result 3"]
+    assert manager.stats()["stubbed_outputs"] == 2
+
+
+def test_summary_replaces_the_turns_it_covers():
+    manager = HistoryManager(HistoryConfig(keep_turns=2))
+    manager._summary = "The user asked two questions."
+    manager._summarized_id = "answer_1"
+
+    compacted = manager.compact(_chat(5))
+
+    texts = _texts(compacted)
+    assert texts[0] == "You are a helpful assistant."
+    assert texts[1] == "Summary of the earlier conversation:\nThe user asked two questions."
+    assert "question 0" not in texts
+    assert "question 1" not in texts
+    # Turn 2 left the window after the summary was written, it stays with its output stubbed
+    assert texts[2:4] == ["question 2", "answer 2"]
+    assert _outputs(compacted)[0].startswith("[Output of lookup removed")
+    assert _outputs(compacted)[1:] == ["result 3", "result 4"]
+
+
+def test_summary_not_covering_the_old_turns_is_not_used():
+    manager = HistoryManager(HistoryConfig(keep_turns=2))
+    manager._summary = "From another conversation."
+    manager._summarized_id = "unknown"
+
+    texts = _texts(manager.compact(_chat(3)))
+
+    assert not any(text.startswith("Summary of the earlier conversation") for text in texts)
+    assert "question 0" in texts
+
+
+def test_oldest_turns_are_dropped_above_max_tokens():
+    manager = HistoryManager(HistoryConfig(keep_turns=2, max_tokens=60, summarize=False))
+
+    compacted = manager.compact(_chat(6))
+
+    texts = _texts(compacted)
+    assert texts[0] == "You are a helpful assistant."
+    assert "question 0" not in texts
+    assert texts[-4:] == ["question 4", "answer 4", "question 5", "answer 5"]
+    assert manager.stats()["dropped_turns"] > 0
+    assert manager.stats()["average_tokens_after"] <= 60
+
+
+def test_recent_outputs_but_the_current_one_are_stubbed_when_still_too_large():
+    manager = HistoryManager(HistoryConfig(keep_turns=3, max_tokens=100, summarize=False))
+
+    compacted = manager.compact(_chat(3, output="x" * 400))
+
+    outputs = _outputs(compacted)
+    assert [output.startswith("[Output of lookup removed") for output in outputs] == [True, True, False]
+    assert outputs[2].startswith("xxx")
+
+
+def test_disabled_history_is_sent_unchanged():
+    chat_ctx = _chat(10)
+
+    assert HistoryManager(HistoryConfig(enabled=False)).compact(chat_ctx) is chat_ctx
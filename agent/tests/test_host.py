@@ -0,0 +1,30 @@
+import asyncio
+
+from livekit.agents import AgentSession
+from livekit.agents.utils import http_context
+
+from src.ctsm.host import ConsoleAudio
+
+
+def test_console_audio_starts_and_closes(monkeypatch):
+    # ConsoleAudio relies on private members of ChatCLI and http_context; this breaks if a
+    # livekit-agents release renames them. Audio devices are left out, CI has no sound card
+    toggled = []
+    monkeypatch.setattr(ConsoleAudio, "_update_microphone", lambda self, *, enable: toggled.append(("microphone", enable)))
+    monkeypatch.setattr(ConsoleAudio, "_update_speaker", lambda self, *, enable: toggled.append(("speaker", enable)))
+
+    async def run():
+        http_context._new_session_ctx()
+        try:
+            console = ConsoleAudio(AgentSession())
+            await console.start()
+            main_task = console._main_atask
+            await console.aclose()
+            return main_task
+        finally:
+            await http_context._close_http_ctx()
+
+    main_task = asyncio.run(run())
+
+    assert main_task is not None and main_task.done()
+    assert toggled == [("microphone", True), ("speaker", True), ("microphone", False), ("speaker", False)]
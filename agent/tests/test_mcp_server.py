@@ -0,0 +1,38 @@
+import asyncio
+
+import anyio
+import mcp.types
+import pytest
+from mcp.client.session import ClientSession
+from mcp.shared.message import SessionMessage
+
+from src.ctsm.mcp.server import MCPServerSse
+
+
+async def _cancel_call() -> tuple[SessionMessage, SessionMessage]:
+    client_write, server_read = anyio.create_memory_object_stream[SessionMessage](8)
+    server_write, client_read = anyio.create_memory_object_stream[SessionMessage | Exception](8)
+    server = MCPServerSse({"url": "http://localhost"}, name="test")
+    async with server_write, client_read, ClientSession(client_read, client_write) as session:
+        call = asyncio.create_task(server._send_call(session, asyncio.Event(), "slow", {}))
+        request = await server_read.receive()
+        call.cancel()
+        await asyncio.gather(call, return_exceptions=True)
+        cancelled = await server_read.receive()
+    return request, cancelled
+
+
+def test_cancelled_call_names_the_request_sent():
+    # _send_call reads ClientSession._request_id, this breaks if a new mcp release assigns ids differently
+    request, cancelled = asyncio.run(_cancel_call())
+
+    assert request.message.root.method == "tools/call"
+    notification = mcp.types.CancelledNotification.model_validate(cancelled.message.root.model_dump())
+    assert notification.params.requestId == request.message.root.id
+
+
+def test_call_before_connect_fails_with_connection_error():
+    server = MCPServerSse({"url": "http://localhost"}, name="test", connect_timeout=0.05)
+
+    with pytest.raises(ConnectionError, match="not connected after 0.05s"):
+        asyncio.run(server.call_tool("slow", {}, timeout=10.0))
@@ -0,0 +1,110 @@
+import asyncio
+from pathlib import Path
+from typing import Dict, List
+
+from src.ctsm.memory import MemoryConfig, MemoryStore, split_facts
+
+
+def _store(tmp_path: Path, **config) -> MemoryStore:
+    return MemoryStore(MemoryConfig(path=str(tmp_path / "memory.db"), **config))
+
+
+def test_search_ranks_matching_entries(tmp_path):
+    async def run():
+        store = _store(tmp_path)
+        for fact in ("The user prefers metric units.", "The user's dog is called Rex.", "The user works at the harbour office."):
+            store.remember(fact)
+        await store.flush()
+        results = store.search("How far is it in kilometers? Use metric units")
+        unrelated = store.search("what is the weather")
+        stopwords_only = store.search("what is the")
+        await store.aclose()
+        return results, unrelated, stopwords_only
+
+    results, unrelated, stopwords_only = asyncio.run(run())
+
+    assert results == ["The user prefers metric units."]
+    assert unrelated == []
+    assert stopwords_only == []
+
+
+def test_search_stays_within_the_token_budget(tmp_path):
+    async def run():
+        store = _store(tmp_path, max_tokens=20)
+        store.remember("Rex " + "likes long walks " * 10)
+        store.remember("Rex is a beagle.")
+        await store.flush()
+        results = store.search("rex")
+        await store.aclose()
+        return results
+
+    assert asyncio.run(run()) == ["Rex is a beagle."]
+
+
+def test_entries_are_written_in_one_batch_after_the_flush_interval(tmp_path):
+    async def run():
+        store = _store(tmp_path, flush_interval=0.05)
+        store.remember("First note.")
+        store.remember("Second   note.")
+        store.remember("First note.")
+        queued = len(store)
+        await asyncio.sleep(0.3)
+        written = len(store), store.stats()["flushes"], store.search("second")
+        await store.aclose()
+        return queued, written
+
+    queued, (count, flushes, results) = asyncio.run(run())
+
+    assert queued == 0
+    assert (count, flushes) == (2, 1)
+    assert results == ["Second note."]
+
+
+def test_aclose_writes_what_is_still_queued(tmp_path):
+    async def run():
+        store = _store(tmp_path, flush_interval=60.0)
+        store.remember("Remember me.")
+        await store.aclose()
+        reopened = _store(tmp_path)
+        count = len(reopened)
+        await reopened.aclose()
+        return count
+
+    assert asyncio.run(run()) == 1
+
+
+def test_sync_profile_replaces_the_previous_profile(tmp_path):
+    async def run():
+        store = _store(tmp_path)
+        store.remember("Met the user at the conference.")
+        store.sync_profile({"preferences": "Likes tea. Dislikes coffee.", "additionalInfo": "Lives in Lisbon."})
+        await store.flush()
+        before = _contents(store)
+        store.sync_profile({"preferences": "Likes tea.\n- Prefers short answers", "additionalInfo": ""})
+        await store.flush()
+        after = _contents(store)
+        await store.aclose()
+        return before, after
+
+    before, after = asyncio.run(run())
+
+    assert before == {
+        "agent": ["Met the user at the conference."],
+        "userContext.additionalInfo": ["Lives in Lisbon."],
+        "userContext.preferences": ["Dislikes coffee.", "Likes tea."],
+    }
+    assert after == {
+        "agent": ["Met the user at the conference."],
+        "userContext.preferences": ["Likes tea.", "Prefers short answers"],
+    }
+
+
+def test_split_facts():
+    assert split_facts("Likes tea. Works nights!\n- Has a cat; two kids\n\n") == ["Likes tea.", "Works nights!", "Has a cat;", "two kids"]
+
+
+def _contents(store: MemoryStore) -> Dict[str, List[str]]:
+    by_source: Dict[str, List[str]] = {}
+    for source, content in store._reader.execute("SELECT source, content FROM memories ORDER BY source, content"):
+        by_source.setdefault(source, []).append(content)
+    return by_source
@@ -0,0 +1,139 @@
+import asyncio
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from src.ctsm.mcp.pool import MCPPoolHost, MCPServerPool, _handshake, _open_connection, _PoolEntry, _proof
+
+FAKE_SERVER = [str(Path(__file__).parents[1] / "benchmarks" / "fake_mcp_server.py"), "--tools", "2"]
+
+
+async def _serve(host: MCPPoolHost) -> asyncio.AbstractServer:
+    return await asyncio.start_unix_server(host._handle_client, host.address)
+
+
+async def _request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, method: str) -> bytes:
+    writer.write(json.dumps({"id": 1, "method": method, "params": {}}).encode() + b"\n")
+    await writer.drain()
+    return await reader.readline()
+
+
+@pytest.fixture
+def address():
+    # Unix socket paths are limited to about 100 bytes, pytest's tmp_path can be longer
+    with tempfile.TemporaryDirectory(prefix="ctsm-pool-") as directory:
+        yield str(Path(directory) / "pool.sock")
+
+
+def test_client_with_the_token_is_served(address):
+    async def run():
+        host = MCPPoolHost(MCPServerPool(), address, token="secret")
+        async with await _serve(host):
+            reader, writer = await _open_connection(host.address)
+            await _handshake(reader, writer, "secret")
+            response = await _request(reader, writer, "ping")
+            writer.close()
+            return json.loads(response)
+
+    assert asyncio.run(run()) == {"id": 1, "result": {}}
+
+
+def test_client_refuses_a_host_without_the_token(address):
+    async def run():
+        host = MCPPoolHost(MCPServerPool(), address, token="other")
+        async with await _serve(host):
+            reader, writer = await _open_connection(host.address)
+            try:
+                await _handshake(reader, writer, "secret")
+            finally:
+                writer.close()
+
+    with pytest.raises(PermissionError):
+        asyncio.run(run())
+
+
+def test_host_closes_the_connection_of_a_client_without_the_token(address):
+    async def run():
+        host = MCPPoolHost(MCPServerPool(), address, token="secret")
+        async with await _serve(host):
+            reader, writer = await _open_connection(host.address)
+            writer.write(json.dumps({"method": "hello", "params": {"nonce": "n"}}).encode() + b"\n")
+            await writer.drain()
+            hello = json.loads(await reader.readline())
+            # The host proves itself, but the client's answer is made with the wrong token
+            assert hello["result"]["proof"] == _proof("secret", "host", "n")
+            auth = {"method": "auth", "params": {"proof": _proof("guess", "client", hello["result"]["nonce"])}}
+            writer.write(json.dumps(auth).encode() + b"\n")
+            await writer.drain()
+            response = await _request(reader, writer, "ping")
+            writer.close()
+            return response
+
+    assert asyncio.run(run()) == b""
+
+
+def test_tcp_host_requires_a_token():
+    with pytest.raises(ValueError):
+        MCPPoolHost(MCPServerPool(), "127.0.0.1:0")
+
+
+def test_idle_servers_are_evicted_and_leased_ones_kept():
+    async def run():
+        pool = MCPServerPool(idle_timeout=0.0)
+        idle = await pool.acquire(sys.executable, FAKE_SERVER, "idle")
+        leased = await pool.acquire(sys.executable, [*FAKE_SERVER, "--latency-ms", "1"], "leased")
+        await pool.release(idle)
+        await asyncio.sleep(0.01)
+        await pool.evict_idle()
+        remaining = len(pool)
+        idle_stopped = idle.task.done()
+        await pool.aclose()
+        return remaining, idle_stopped, leased.task.done()
+
+    remaining, idle_stopped, leased_stopped = asyncio.run(run())
+    assert remaining == 1
+    assert idle_stopped
+    assert leased_stopped
+
+
+def test_full_pool_evicts_the_least_recently_used_idle_server():
+    async def run():
+        pool = MCPServerPool(max_servers=1)
+        first = await pool.acquire(sys.executable, FAKE_SERVER, "first")
+        await pool.release(first)
+        second = await pool.acquire(sys.executable, [*FAKE_SERVER, "--latency-ms", "1"], "second")
+        with pytest.raises(RuntimeError):
+            await pool.acquire(sys.executable, [*FAKE_SERVER, "--latency-ms", "2"], "third")
+        evicted, second_running = first.task.done(), second.server.session is not None
+        await pool.aclose()
+        return evicted, second_running
+
+    evicted, second_running = asyncio.run(run())
+    assert evicted
+    assert second_running
+
+
+def test_slow_shutdown_does_not_hold_the_pool_lock():
+    async def run():
+        pool = MCPServerPool(idle_timeout=0.0)
+        entry = _PoolEntry(("slow", ()), "slow")
+
+        async def shut_down_slowly():
+            await entry.stop.wait()
+            await asyncio.sleep(0.5)
+
+        entry.task = asyncio.create_task(shut_down_slowly())
+        pool._entries[entry.key] = entry
+        eviction = asyncio.create_task(pool.evict_idle())
+        await asyncio.sleep(0.05)
+        locked_during_shutdown = pool._lock.locked()
+        await eviction
+        return locked_during_shutdown, len(pool), entry.task.done()
+
+    locked_during_shutdown, remaining, stopped = asyncio.run(run())
+    assert not locked_during_shutdown
+    assert remaining == 0
+    assert stopped
@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from src.ctsm.mcp.scheduler import CallScheduler
+
+
+async def _hold(scheduler: CallScheduler, name: str, order: list, release: asyncio.Event) -> None:
+    async with scheduler.slot():
+        order.append(name)
+        await release.wait()
+
+
+def test_waiting_calls_get_slots_in_arrival_order():
+    async def run():
+        scheduler = CallScheduler("test", max_in_flight=2)
+        order: list = []
+        releases = {name: asyncio.Event() for name in "abcde"}
+        tasks = []
+        for name in "abcde":
+            tasks.append(asyncio.create_task(_hold(scheduler, name, order, releases[name])))
+            await asyncio.sleep(0)
+        assert order == ["a", "b"]
+        assert scheduler.queue_depth == 3
+        for name in "abcde":
+            releases[name].set()
+            await asyncio.sleep(0)
+            await asyncio.sleep(0)
+            assert scheduler.in_flight <= 2
+        await asyncio.gather(*tasks)
+        return scheduler, order
+
+    scheduler, order = asyncio.run(run())
+    assert order == list("abcde")
+    assert scheduler.in_flight == 0
+    assert scheduler.stats()["max_queue_depth"] == 3
+
+
+def test_cancelled_waiter_gives_up_its_place():
+    async def run():
+        scheduler = CallScheduler("test", max_in_flight=1)
+        order: list = []
+        release = asyncio.Event()
+        holder = asyncio.create_task(_hold(scheduler, "holder", order, release))
+        await asyncio.sleep(0)
+        cancelled = asyncio.create_task(_hold(scheduler, "cancelled", order, release))
+        waiting = asyncio.create_task(_hold(scheduler, "waiting", order, release))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.gather(cancelled, return_exceptions=True)
+        assert scheduler.queue_depth == 1
+        release.set()
+        await asyncio.gather(holder, waiting)
+        return scheduler, order
+
+    scheduler, order = asyncio.run(run())
+    assert order == ["holder", "waiting"]
+    assert scheduler.in_flight == 0
+
+
+def test_slot_handed_to_a_cancelled_waiter_passes_to_the_next():
+    async def run():
+        scheduler = CallScheduler("test", max_in_flight=1)
+        order: list = []
+        release = asyncio.Event()
+        async with scheduler.slot():
+            handed = asyncio.create_task(_hold(scheduler, "handed", order, release))
+            waiting = asyncio.create_task(_hold(scheduler, "waiting", order, release))
+            await asyncio.sleep(0)
+        # The slot went to "handed", which is cancelled before it gets to run
+        handed.cancel()
+        release.set()
+        results = await asyncio.gather(handed, waiting, return_exceptions=True)
+        return scheduler, order, results
+
+    scheduler, order, results = asyncio.run(run())
+    assert isinstance(results[0], asyncio.CancelledError)
+    assert order == ["waiting"]
+    assert scheduler.in_flight == 0
+
+
+def test_max_in_flight_must_be_positive():
+    with pytest.raises(ValueError):
+        CallScheduler("test", max_in_flight=0)
@@ -0,0 +1,89 @@
+from typing import Any, Dict
+
+from src.ctsm.mcp.schema import SchemaCompactionConfig, SchemaCompactor
+
+
+def _large(label: str) -> Dict[str, Any]:
+    """A definition over INLINE_SHARED_BYTES, so it stays in $defs when it is used more than once."""
+    return {"type": "object", "properties": {f"{label}_{index}": {"type": "string", "description": "y" * 40} for index in range(6)}}
+
+
+def _compact(name: str, schema: Dict[str, Any]) -> Dict[str, Any]:
+    return SchemaCompactor(SchemaCompactionConfig()).compact(name, None, schema)[1]
+
+
+def test_definition_used_once_is_inlined_with_sibling_keywords():
+    compacted = _compact("inline_once", {
+        "type": "object",
+        "properties": {"mode": {"$ref": "#/definitions/Mode", "description": "How to run"}},
+        "definitions": {"Mode": {"type": "string", "enum": ["fast", "safe"], "description": "A mode"}},
+    })
+
+    assert compacted["properties"]["mode"] == {"type": "string", "enum": ["fast", "safe"], "description": "How to run"}
+    assert "definitions" not in compacted
+    assert "$defs" not in compacted
+
+
+def test_same_name_under_defs_and_definitions_gets_a_suffix():
+    compacted = _compact("name_collision", {
+        "type": "object",
+        "properties": {
+            "a": {"$ref": "#/$defs/Item"}, "b": {"$ref": "#/$defs/Item"},
+            "c": {"$ref": "#/definitions/Item"}, "d": {"$ref": "#/definitions/Item"},
+        },
+        "$defs": {"Item": _large("left")},
+        "definitions": {"Item": _large("right")},
+    })
+
+    assert compacted["properties"] == {
+        "a": {"$ref": "#/$defs/Item"}, "b": {"$ref": "#/$defs/Item"},
+        "c": {"$ref": "#/$defs/Item_2"}, "d": {"$ref": "#/$defs/Item_2"},
+    }
+    assert set(compacted["$defs"]) == {"Item", "Item_2"}
+    assert "left_0" in compacted["$defs"]["Item"]["properties"]
+    assert "right_0" in compacted["$defs"]["Item_2"]["properties"]
+    assert "definitions" not in compacted
+
+
+def test_identical_definitions_are_merged():
+    compacted = _compact("merged", {
+        "type": "object",
+        "properties": {"a": {"$ref": "#/$defs/First"}, "b": {"$ref": "#/definitions/Second"}},
+        "$defs": {"First": _large("same")},
+        "definitions": {"Second": _large("same")},
+    })
+
+    assert compacted["properties"] == {"a": {"$ref": "#/$defs/First"}, "b": {"$ref": "#/$defs/First"}}
+    assert list(compacted["$defs"]) == ["First"]
+
+
+def test_recursive_definitions_stay_in_defs():
+    compacted = _compact("recursive", {
+        "type": "object",
+        "properties": {"root": {"$ref": "#/definitions/Node"}},
+        "definitions": {
+            "Node": {"type": "object", "properties": {"children": {"type": "array", "items": {"$ref": "#/definitions/Branch"}}}},
+            "Branch": {"$ref": "#/definitions/Node"},
+        },
+    })
+
+    assert compacted["properties"]["root"] == {"$ref": "#/$defs/Node"}
+    assert compacted["$defs"]["Node"]["properties"]["children"]["items"] == {"$ref": "#/$defs/Branch"}
+    assert compacted["$defs"]["Branch"] == {"$ref": "#/$defs/Node"}
+    assert "definitions" not in compacted
+
+
+def test_non_recursive_definition_next_to_a_recursive_one_is_inlined():
+    compacted = _compact("recursive_mixed", {
+        "type": "object",
+        "properties": {"tree": {"$ref": "#/$defs/Tree"}},
+        "$defs": {
+            "Tree": {"type": "object", "properties": {"leaf": {"$ref": "#/$defs/Leaf"}, "next": {"$ref": "#/$defs/Tree"}}},
+            "Leaf": {"type": "integer"},
+        },
+    })
+
+    assert compacted["properties"]["tree"] == {"$ref": "#/$defs/Tree"}
+    assert compacted["$defs"] == {
+        "Tree": {"type": "object", "properties": {"leaf": {"type": "integer"}, "next": {"$ref": "#/$defs/Tree"}}},
+    }
@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+from src.ctsm.mcp.single_flight import SingleFlight
+
+
+class Call:
+    """A call that runs until released, counting how often it was started and cancelled."""
+
+    def __init__(self):
+        self.started = 0
+        self.cancelled = False
+        self.release = asyncio.Event()
+
+    async def __call__(self) -> str:
+        self.started += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return "result"
+
+
+def test_concurrent_calls_with_the_same_key_share_one_execution():
+    async def run():
+        flights, call = SingleFlight(), Call()
+        callers = [asyncio.create_task(flights.do("key", call)) for _ in range(3)]
+        await asyncio.sleep(0)
+        assert flights.in_flight("key")
+        call.release.set()
+        return flights, call, await asyncio.gather(*callers)
+
+    flights, call, results = asyncio.run(run())
+    assert results == ["result"] * 3
+    assert call.started == 1
+    assert flights.stats() == {"calls": 1, "coalesced": 2, "in_flight": 0}
+
+
+def test_one_cancelled_caller_does_not_cancel_the_shared_call():
+    async def run():
+        flights, call = SingleFlight(), Call()
+        first = asyncio.create_task(flights.do("key", call))
+        second = asyncio.create_task(flights.do("key", call))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.gather(first, return_exceptions=True)
+        call.release.set()
+        return call, await second
+
+    call, result = asyncio.run(run())
+    assert result == "result"
+    assert not call.cancelled
+
+
+def test_shared_call_is_cancelled_once_every_caller_left():
+    async def run():
+        flights, call = SingleFlight(), Call()
+        callers = [asyncio.create_task(flights.do("key", call)) for _ in range(2)]
+        await asyncio.sleep(0)
+        for caller in callers:
+            caller.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        await asyncio.sleep(0)
+        return flights, call
+
+    flights, call = asyncio.run(run())
+    assert call.cancelled
+    assert not flights.in_flight("key")
+
+
+def test_errors_reach_every_caller_and_the_next_call_runs_again():
+    async def run():
+        flights = SingleFlight()
+        started = 0
+
+        async def failing():
+            nonlocal started
+            started += 1
+            await asyncio.sleep(0)
+            raise ConnectionError("lost")
+
+        results = await asyncio.gather(*(flights.do("key", failing) for _ in range(2)), return_exceptions=True)
+        with pytest.raises(ConnectionError):
+            await flights.do("key", failing)
+        return results, started
+
+    results, started = asyncio.run(run())
+    assert all(isinstance(result, ConnectionError) for result in results)
+    assert started == 2
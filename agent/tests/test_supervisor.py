@@ -0,0 +1,129 @@
+import asyncio
+import contextlib
+from typing import Any, Dict, List
+
+import mcp.types
+import pytest
+from mcp.server.lowlevel import Server
+from mcp.shared.exceptions import McpError
+from mcp.shared.memory import create_client_server_memory_streams
+
+from src.ctsm.mcp.server import _MCPServerWithClientSession
+
+
+class _InMemoryServer(_MCPServerWithClientSession):
+    """Serves a lowlevel MCP server over memory streams; drop() cuts the current connection like a crashed process."""
+
+    def __init__(self, **kwargs):
+        super().__init__(True, 5.0, **kwargs)
+        self.calls: List[str] = []
+        self._hang = True
+        self._server_write = None
+
+    @property
+    def name(self) -> str:
+        return "memory"
+
+    def create_streams(self):
+        @contextlib.asynccontextmanager
+        async def streams():
+            async with create_client_server_memory_streams() as (client_streams, (server_read, server_write)):
+                self._server_write = server_write
+                app = self._build_app()
+                task = asyncio.create_task(app.run(server_read, server_write, app.create_initialization_options()))
+                try:
+                    yield client_streams
+                finally:
+                    task.cancel()
+                    await asyncio.gather(task, return_exceptions=True)
+
+        return streams()
+
+    def _build_app(self) -> Server:
+        app = Server("memory")
+
+        @app.list_tools()
+        async def list_tools() -> List[mcp.types.Tool]:
+            return [mcp.types.Tool(name="lookup", inputSchema={"type": "object"}),
+                    mcp.types.Tool(name="send", inputSchema={"type": "object"})]
+
+        @app.call_tool(validate_input=False)
+        async def call_tool(name: str, arguments: Dict[str, Any]) -> List[mcp.types.TextContent]:
+            self.calls.append(name)
+            if self._hang:
+                await asyncio.Event().wait()
+            return [mcp.types.TextContent(type="text", text=name)]
+
+        return app
+
+    async def drop(self) -> None:
+        """Closes the server's side of the connection once the hanging call reached it."""
+        while not self.calls:
+            await asyncio.sleep(0.01)
+        self._hang = False
+        assert self._server_write is not None
+        await self._server_write.aclose()
+
+
+async def _call_through_drop(tool_name: str):
+    server = _InMemoryServer(ping_interval=0.1, ping_timeout=1.0, idempotent_tools=["lookup"])
+    await server.connect()
+    try:
+        call = asyncio.create_task(server.call_tool(tool_name, {}, timeout=10.0))
+        await server.drop()
+        result = await asyncio.gather(call, return_exceptions=True)
+        # The supervisor reconnects either way, so later calls work again
+        while server.reconnects == 0:
+            await asyncio.sleep(0.01)
+        after = await server.call_tool("send", {}, timeout=10.0)
+        return result[0], server.calls, server.reconnects, after
+    finally:
+        await server.cleanup()
+
+
+def test_idempotent_call_is_retried_after_reconnect():
+    result, calls, reconnects, _ = asyncio.run(_call_through_drop("lookup"))
+
+    assert result.content[0].text == "lookup"
+    assert calls == ["lookup", "lookup", "send"]
+    assert reconnects == 1
+
+
+def test_non_idempotent_call_fails_instead_of_running_twice():
+    result, calls, reconnects, after = asyncio.run(_call_through_drop("send"))
+
+    assert isinstance(result, McpError)
+    assert calls == ["send", "send"]
+    assert reconnects == 1
+    assert after.content[0].text == "send"
+
+
+def test_is_idempotent_reads_tool_annotations():
+    server = _InMemoryServer(idempotent_tools=["configured"])
+    server._tools_list = [
+        mcp.types.Tool(name="read", inputSchema={}, annotations=mcp.types.ToolAnnotations(readOnlyHint=True)),
+        mcp.types.Tool(name="put", inputSchema={}, annotations=mcp.types.ToolAnnotations(idempotentHint=True)),
+        mcp.types.Tool(name="write", inputSchema={}, annotations=mcp.types.ToolAnnotations(readOnlyHint=False)),
+    ]
+
+    assert [server.is_idempotent(name) for name in ("configured", "read", "put", "write", "unknown")] == [True, True, True, False, False]
+
+
+def test_no_reconnect_without_ping_interval():
+    async def run():
+        server = _InMemoryServer(ping_interval=None)
+        await server.connect()
+        try:
+            call = asyncio.create_task(server.call_tool("lookup", {}, timeout=10.0))
+            await server.drop()
+            with pytest.raises(McpError):
+                await call
+            await asyncio.sleep(0.1)
+            return server.session, server.reconnects
+        finally:
+            await server.cleanup()
+
+    session, reconnects = asyncio.run(run())
+
+    assert session is None
+    assert reconnects == 0
@@ -0,0 +1,47 @@
+import asyncio
+
+import pytest
+from livekit.agents import llm
+from livekit.agents.voice.generation import make_tool_output
+from mcp.types import Tool as MCPTool
+
+from src.ctsm.mcp.tool_index import ToolRetrievalConfig, ToolSelector
+from src.ctsm.mcp.util import MCPUtil
+
+
+class FailingServer:
+    name = "failing"
+
+    async def call_tool(self, tool_name, arguments, deadline=None, progress_callback=None):
+        raise ConnectionError("connection reset")
+
+
+def _named(name: str):
+    async def tool():
+        return None
+
+    tool.__name__ = name
+    return tool
+
+
+def test_failed_mcp_call_offers_all_tools_for_the_rest_of_the_turn():
+    tools = [_named(f"NOTES__{verb}") for verb in ("CREATE", "DELETE", "SEARCH")] + [
+        _named(f"WEATHER__{verb}") for verb in ("FORECAST", "ALERTS", "RADAR")
+    ]
+    selector = ToolSelector(ToolRetrievalConfig(top_k=2))
+    chat_ctx = llm.ChatContext.empty()
+    chat_ctx.add_message(role="user", content="what is the weather forecast")
+    assert len(selector.select(chat_ctx, tools)) < len(tools)
+
+    mcp_tool = MCPTool(name="WEATHER__FORECAST", description="Forecast", inputSchema={"type": "object", "properties": {}})
+    function_tool = MCPUtil.to_function_tool(mcp_tool, FailingServer(), convert_schemas_to_strict=False)
+    call = llm.FunctionCall(call_id="call_1", name="WEATHER__FORECAST", arguments="{}")
+    with pytest.raises(llm.ToolError) as raised:
+        asyncio.run(function_tool.on_invoke_tool(None, "{}"))
+    # What LiveKit records in the chat context for a tool that raised
+    output = make_tool_output(fnc_call=call, output=None, exception=raised.value)
+    chat_ctx.items.extend([call, output.fnc_call_out])
+
+    assert output.fnc_call_out.is_error
+    assert "connection reset" in output.fnc_call_out.output
+    assert selector.select(chat_ctx, tools) == tools
@@ -106,8 +106,52 @@ You can fetch Hacker News content and open pages in a local browser. Act quickly
         name: "Playwright MCP Server",
         command: "npx",
         args: ["@playwright/mcp@latest"],
+        // One browser page; concurrent navigations would race each other
+        maxInFlight: 1,
       },
     ],
+    toolCache: {
+      tools: {
+        HACKERNEWS__TOP_STORIES_GET: 120,
+        HACKERNEWS__ITEM_GET: 600,
+      },
+    },
+    // Only the fields the agent announces reach the LLM
+    toolOutput: {
+      defaultMaxBytes: 16000,
+      tools: {
+        HACKERNEWS__ITEM_GET: {
+          fields: ["id", "title", "url", "by", "score", "descendants", "type"],
+        },
+        HACKERNEWS__TOP_STORIES_GET: { maxTokens: 400 },
+        playwright_get_visible_text: { maxTokens: 2000 },
+      },
+    },
+    // Page loads that hang are cancelled instead of blocking the answer
+    toolTimeouts: {
+      default: 60,
+      tools: { Playwright_navigate: 30 },
+    },
+    // Each turn only sends the schemas of the matching browser tools,
+    // the story lookups are always offered
+    toolRetrieval: {
+      topK: 8,
+      pinned: ["HACKERNEWS__TOP_STORIES_GET", "HACKERNEWS__ITEM_GET"],
+    },
+    // Fetch the first few stories while the top one is being announced,
+    // so "next story" is answered from the cache
+    prefetch: {
+      maxConcurrency: 2,
+      rules: [
+        {
+          after: "HACKERNEWS__TOP_STORIES_GET",
+          run: "HACKERNEWS__ITEM_GET",
+          first: 3,
+          arguments: { path: { id: "{item}" } },
+          ttl: 600,
+        },
+      ],
+    },
   },
 };
 
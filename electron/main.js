@@ -1,5 +1,7 @@
 const { app, BrowserWindow, ipcMain, dialog } = require("electron");
 const { spawn } = require("child_process");
+const crypto = require("crypto");
+const fs = require("fs");
 const path = require("path");
 const Store = require("electron-store");
 const { defaultAgents } = require("./defaultAgents");
@@ -19,11 +21,36 @@ const store = new Store({
       additionalInfo: "",
     },
     agentProfiles: defaultAgents,
+    mcpPool: {
+      enabled: false,
+      idleTimeout: 600,
+      maxServers: 8,
+    },
+    // Keep one warm agent process and start sessions in it instead of a process per session
+    residentAgent: true,
   },
 });
 
+// Agent profile keys forwarded to the Python agent on start
+const PROFILE_SETTINGS = [
+  "toolCache",
+  "prefetch",
+  "toolOutput",
+  "toolTimeouts",
+  "toolRetrieval",
+  "toolSchemas",
+  "history",
+  "memory",
+  "toolProgress",
+];
+
 let mainWindow;
 let pythonProcess = null;
+// Resident agent host and whether it is running a session
+let agentHost = null;
+let hostSessionActive = false;
+// Agent profile of the running session, its later edits are applied to the session
+let activeProfile = null;
 
 function createWindow() {
   mainWindow = new BrowserWindow({
@@ -54,17 +81,138 @@ function createWindow() {
   }
 }
 
-function startPythonBackend() {
+function agentPaths() {
   // Better development detection
   const isDev = process.argv.includes("--dev") || !app.isPackaged;
   const pythonPath = isDev
     ? path.join(__dirname, "../agent")
     : path.join(process.resourcesPath, "python");
+  const execName =
+    process.platform === "win32" ? "ctsm-agent.exe" : "ctsm-agent";
+  // Onedir bundle: the executable sits next to its _internal directory
+  const execPath = path.join(pythonPath, "ctsm-agent", execName);
+  return { isDev, pythonPath, execPath };
+}
 
-  const config = store.store;
+function forwardOutput(child) {
+  child.stderr.on("data", (data) => {
+    console.error(`Python stderr: ${data}`);
+    if (mainWindow && !mainWindow.isDestroyed()) {
+      mainWindow.webContents.send("python-error", data.toString());
+    }
+  });
+}
+
+function startAgentHost() {
+  const { isDev, pythonPath, execPath } = agentPaths();
+  const env = {
+    ...process.env,
+    PYTHONPATH: path.join(pythonPath, "src"),
+    LIVEKIT_CONSOLE_DISABLE_STDIN: "1",
+  };
 
-  // Prepare configuration JSON to pass to Python
-  const configJson = JSON.stringify(config);
+  agentHost = isDev
+    ? spawn(
+        "uv",
+        ["run", "--env-file", ".env", "-m", "src.ctsm.electron_main", "host"],
+        { cwd: pythonPath, env: env, stdio: "pipe" },
+      )
+    : spawn(execPath, ["host"], { env: env, stdio: "pipe" });
+
+  // stdout carries one JSON event per line
+  let buffered = "";
+  agentHost.stdout.on("data", (data) => {
+    buffered += data.toString();
+    const lines = buffered.split("\n");
+    buffered = lines.pop();
+    for (const line of lines) {
+      if (!line.trim()) continue;
+      console.log(`Agent host: ${line}`);
+      try {
+        const message = JSON.parse(line);
+        if (message.event === "stopped") {
+          hostSessionActive = false;
+          activeProfile = null;
+        }
+      } catch {
+        // Not an event, forwarded as output below
+      }
+      if (mainWindow && !mainWindow.isDestroyed()) {
+        mainWindow.webContents.send("python-output", line);
+      }
+    }
+  });
+  forwardOutput(agentHost);
+
+  agentHost.on("close", (code) => {
+    console.log(`Agent host exited with code ${code}`);
+    agentHost = null;
+    hostSessionActive = false;
+  });
+}
+
+function sendHostCommand(command) {
+  if (!agentHost) {
+    startAgentHost();
+  }
+  agentHost.stdin.write(JSON.stringify(command) + "\n");
+}
+
+// Secret the MCP server pool host and the agents prove to each other; it reaches the
+// agent only through the config file below or the agent host's stdin
+function ensurePoolToken(token = crypto.randomBytes(32).toString("hex")) {
+  if (!store.get("mcpPool.token")) {
+    store.set("mcpPool.token", token);
+  }
+}
+ensurePoolToken();
+
+// The agent reads its config from this file, not from the command line where other
+// processes can see the API keys. The running agent applies every new version of it.
+function agentConfigPath() {
+  return path.join(app.getPath("userData"), "agent-config.json");
+}
+
+function writeAgentConfig(config) {
+  const configPath = agentConfigPath();
+  const tempPath = `${configPath}.tmp`;
+  // Readable by the user only; replaced in one step so the agent never reads half a file
+  fs.writeFileSync(tempPath, JSON.stringify(config), { mode: 0o600 });
+  fs.renameSync(tempPath, configPath);
+  return configPath;
+}
+
+// The stored config with an agent profile's settings applied
+function sessionConfig(agentConfig) {
+  const currentConfig = store.store;
+  const tempConfig = {
+    ...currentConfig,
+    systemPrompt: agentConfig.systemPrompt || currentConfig.systemPrompt,
+    mcpServers: agentConfig.mcpServers || currentConfig.mcpServers,
+  };
+  // Per-profile agent settings, cleared when the profile does not set them
+  for (const key of PROFILE_SETTINGS) {
+    tempConfig[key] = agentConfig[key] ?? null;
+  }
+  return tempConfig;
+}
+
+// Sends the saved config to the agent; a running session applies what changed
+function reloadAgentConfig() {
+  const profile = activeProfile && store.get("agentProfiles")?.[activeProfile];
+  const config = profile ? sessionConfig(profile) : store.store;
+  if (pythonProcess) {
+    writeAgentConfig(config);
+  } else if (agentHost) {
+    sendHostCommand({ command: "config", config: config });
+  }
+}
+
+function startPythonBackend() {
+  const { isDev, pythonPath, execPath } = agentPaths();
+
+  const config = store.store;
+  const configPath = writeAgentConfig(config);
 
   console.log("Starting Python backend with config:", {
     isDev: isDev,
@@ -74,10 +222,17 @@ function startPythonBackend() {
     mcpServers: config.mcpServers?.length || 0,
   });
 
+  // The agent measures its time to ready from here
+  const startEnv = {
+    ...process.env,
+    CTSM_START_REQUESTED_AT: String(Date.now() / 1000),
+    CTSM_CONFIG_FILE: configPath,
+  };
+
   if (isDev) {
     // In development, use the same approach as manual: uv run -m
     const env = {
-      ...process.env,
+      ...startEnv,
       PYTHONPATH: path.join(pythonPath, "src"),
       LIVEKIT_CONSOLE_DISABLE_STDIN: "1",
     };
@@ -91,7 +246,6 @@ function startPythonBackend() {
         "-m",
         "src.ctsm.electron_main",
         "console",
-        configJson,
       ],
       {
         cwd: pythonPath,
@@ -101,11 +255,8 @@ function startPythonBackend() {
     );
   } else {
     // In production, use the bundled executable
-    const execName =
-      process.platform === "win32" ? "ctsm-agent.exe" : "ctsm-agent";
-    const execPath = path.join(pythonPath, execName);
-
-    pythonProcess = spawn(execPath, ["console", configJson], {
+    pythonProcess = spawn(execPath, ["console"], {
+      env: startEnv,
       stdio: "pipe",
     });
   }
@@ -117,16 +268,13 @@ function startPythonBackend() {
     }
   });
 
-  pythonProcess.stderr.on("data", (data) => {
-    console.error(`Python stderr: ${data}`);
-    if (mainWindow && !mainWindow.isDestroyed()) {
-      mainWindow.webContents.send("python-error", data.toString());
-    }
-  });
+  forwardOutput(pythonProcess);
 
   pythonProcess.on("close", (code) => {
     console.log(`Python process exited with code ${code}`);
     pythonProcess = null;
+    activeProfile = null;
+    fs.rmSync(configPath, { force: true });
   });
 }
 
@@ -136,7 +284,11 @@ ipcMain.handle("get-config", () => {
 });
 
 ipcMain.handle("save-config", (event, newConfig) => {
+  const poolToken = store.get("mcpPool.token");
   store.store = { ...store.store, ...newConfig };
+  // The settings page saves mcpPool without the token
+  ensurePoolToken(poolToken);
+  reloadAgentConfig();
   return true;
 });
 
@@ -188,25 +340,31 @@ ipcMain.handle("load-env-secrets", () => {
 });
 
 ipcMain.handle("start-agent", (event, agentConfig) => {
-  if (!pythonProcess) {
+  if (!pythonProcess && !hostSessionActive) {
     // If agent config is provided, temporarily update the store with it
     if (agentConfig) {
-      const currentConfig = store.store;
-      const tempConfig = {
-        ...currentConfig,
-        systemPrompt: agentConfig.systemPrompt || currentConfig.systemPrompt,
-        mcpServers: agentConfig.mcpServers || currentConfig.mcpServers,
-      };
       // Temporarily store the agent config for this session
-      store.set(tempConfig);
+      store.set(sessionConfig(agentConfig));
+    }
+    activeProfile = agentConfig?.profile ?? null;
+    if (store.get("residentAgent")) {
+      sendHostCommand({ command: "start", config: store.store });
+      hostSessionActive = true;
+    } else {
+      startPythonBackend();
     }
-    startPythonBackend();
     return { success: true, message: "Agent started" };
   }
   return { success: false, message: "Agent already running" };
 });
 
 ipcMain.handle("stop-agent", () => {
+  activeProfile = null;
+  if (hostSessionActive) {
+    sendHostCommand({ command: "stop" });
+    hostSessionActive = false;
+    return { success: true, message: "Agent stopped" };
+  }
   if (pythonProcess) {
     pythonProcess.kill();
     pythonProcess = null;
@@ -218,6 +376,11 @@ ipcMain.handle("stop-agent", () => {
 app.whenReady().then(() => {
   createWindow();
 
+  // Warm up the agent host so the first session starts on loaded models and connected servers
+  if (store.get("residentAgent")) {
+    sendHostCommand({ command: "config", config: store.store });
+  }
+
   app.on("activate", () => {
     if (BrowserWindow.getAllWindows().length === 0) {
       createWindow();
@@ -229,6 +392,9 @@ app.on("window-all-closed", () => {
   if (pythonProcess) {
     pythonProcess.kill();
   }
+  if (agentHost) {
+    agentHost.stdin.end(JSON.stringify({ command: "shutdown" }) + "\n");
+  }
   if (process.platform !== "darwin") {
     app.quit();
   }
@@ -238,4 +404,7 @@ app.on("before-quit", () => {
   if (pythonProcess) {
     pythonProcess.kill();
   }
+  if (agentHost) {
+    agentHost.kill();
+  }
 });
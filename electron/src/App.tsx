@@ -48,6 +48,13 @@ interface Config {
     additionalInfo?: string;
   };
   mcpServers?: McpServer[];
+  mcpMinReadyServers?: number;
+  mcpPool?: {
+    enabled?: boolean;
+    idleTimeout?: number;
+    maxServers?: number;
+  };
+  residentAgent?: boolean;
   agentProfiles?: Record<string, AgentProfile>;
   currentAgentProfile?: string;
 }
@@ -56,11 +63,101 @@ interface McpServer {
   name: string;
   command: string;
   args: string[];
+  required?: boolean;
+  connectTimeout?: number;
+  pingInterval?: number | null;
+  idempotentTools?: string[];
+  maxInFlight?: number;
+}
+
+interface ToolCacheSettings {
+  maxEntries?: number;
+  defaultTtl?: number;
+  useAnnotations?: boolean;
+  tools?: Record<string, number>;
+}
+
+interface PrefetchRule {
+  after: string;
+  run: string;
+  first?: number;
+  items?: string;
+  arguments?: Record<string, unknown>;
+  ttl?: number;
+}
+
+interface PrefetchSettings {
+  maxConcurrency?: number;
+  rules?: PrefetchRule[];
+}
+
+interface ToolOutputBudget {
+  maxBytes?: number;
+  maxTokens?: number;
+  fields?: string[];
+}
+
+interface ToolOutputSettings {
+  defaultMaxBytes?: number;
+  tools?: Record<string, ToolOutputBudget>;
+}
+
+interface ToolTimeoutSettings {
+  default?: number;
+  tools?: Record<string, number>;
+}
+
+interface ToolRetrievalSettings {
+  enabled?: boolean;
+  topK?: number;
+  pinned?: string[];
+  contextMessages?: number;
+}
+
+interface ToolSchemaSettings {
+  enabled?: boolean;
+  descriptionTokens?: number;
+  propertyDescriptionTokens?: number;
+  tools?: Record<string, number>;
+}
+
+interface HistorySettings {
+  enabled?: boolean;
+  keepTurns?: number;
+  maxTokens?: number;
+  summarize?: boolean;
+  summaryTokens?: number;
+}
+
+interface MemorySettings {
+  enabled?: boolean;
+  topK?: number;
+  maxTokens?: number;
+  flushInterval?: number;
+  path?: string;
+}
+
+interface ToolProgressSettings {
+  enabled?: boolean;
+  threshold?: number;
+  repeatInterval?: number;
+  maxUpdates?: number;
+  phrases?: string[];
+  tools?: Record<string, string>;
 }
 
 interface AgentProfile {
   systemPrompt?: string;
   mcpServers?: McpServer[];
+  toolCache?: ToolCacheSettings;
+  prefetch?: PrefetchSettings;
+  toolOutput?: ToolOutputSettings;
+  toolTimeouts?: ToolTimeoutSettings;
+  toolRetrieval?: ToolRetrievalSettings;
+  toolSchemas?: ToolSchemaSettings;
+  history?: HistorySettings;
+  memory?: MemorySettings;
+  toolProgress?: ToolProgressSettings;
 }
 
 // Declare electron API
@@ -253,8 +350,18 @@ function App() {
         // Get the current agent's configuration
         const agentProfile = config.agentProfiles?.[currentEditingAgent];
         const agentConfig = {
+          profile: currentEditingAgent,
           systemPrompt: agentProfile?.systemPrompt || systemPrompt,
           mcpServers: agentProfile?.mcpServers || mcpServers,
+          toolCache: agentProfile?.toolCache,
+          prefetch: agentProfile?.prefetch,
+          toolOutput: agentProfile?.toolOutput,
+          toolTimeouts: agentProfile?.toolTimeouts,
+          toolRetrieval: agentProfile?.toolRetrieval,
+          toolSchemas: agentProfile?.toolSchemas,
+          history: agentProfile?.history,
+          memory: agentProfile?.memory,
+          toolProgress: agentProfile?.toolProgress,
         };
 
         console.log("Starting agent with config:", {